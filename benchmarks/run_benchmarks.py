@@ -0,0 +1,362 @@
+"""
+性能基准测试脚本
+使用模拟数据生成器构建 1万 / 10万 / 100万 条警报的数据库，
+对数据查询、统计分析、地图渲染、风险评估和通知系统的关键路径计时，
+结果（p50/p95/p99）写入 JSON，并与存储的基线对比
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --sizes 10000 --update-baseline
+"""
+
+import sys
+import os
+import argparse
+import json
+import logging
+import platform
+import sqlite3
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+import utils.database as database
+import generate_mock_data as mock_data
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(tempfile.gettempdir(), 'emergency_response_benchmarks')
+DEFAULT_SIZES = [10000, 100000, 1000000]
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(BENCHMARK_DIR, 'results', 'latest.json')
+HAZARD_FIXTURE = os.path.join(ROOT_DIR, 'tests', 'fixtures', 'beijing_hazards.geojson')
+
+SEED_USERS = 1000
+SEED_DAYS = 90
+ANALYTICS_WINDOW_DAYS = 7
+MAP_ALERT_COUNT = 500
+CLUSTER_ALERT_COUNT = 10000
+RISK_BATCH_SIZE = 5000
+NOTIFICATION_COUNT = 2000
+PROVIDER_STUB_LATENCY = 0.02
+
+def size_label(size: int) -> str:
+    if size >= 1000000 and size % 1000000 == 0:
+        return f"{size // 1000000}m"
+    if size >= 1000 and size % 1000 == 0:
+        return f"{size // 1000}k"
+    return str(size)
+
+def uncached(func):
+    return getattr(func, '__wrapped__', func)
+
+def percentile(samples, q: float) -> float:
+    return float(np.percentile(samples, q))
+
+def summarize(samples, items: int = None) -> dict:
+    samples_ms = [sample * 1000 for sample in samples]
+    summary = {
+        'samples': len(samples_ms),
+        'p50_ms': round(percentile(samples_ms, 50), 3),
+        'p95_ms': round(percentile(samples_ms, 95), 3),
+        'p99_ms': round(percentile(samples_ms, 99), 3),
+        'mean_ms': round(float(np.mean(samples_ms)), 3),
+        'min_ms': round(min(samples_ms), 3),
+        'max_ms': round(max(samples_ms), 3)
+    }
+    
+    if items:
+        summary['items'] = items
+        summary['throughput_per_s'] = round(items / (np.median(samples) or 1e-9), 1)
+    
+    return summary
+
+def measure(func, repeat: int, min_repeat: int, time_budget: float, setup=None, items: int = None) -> dict:
+    samples = []
+    started = time.perf_counter()
+    
+    func(setup() if setup else None)
+    
+    while len(samples) < repeat:
+        argument = setup() if setup else None
+        sample_started = time.perf_counter()
+        func(argument)
+        samples.append(time.perf_counter() - sample_started)
+        
+        if len(samples) >= min_repeat and time.perf_counter() - started > time_budget:
+            break
+    
+    return summarize(samples, items)
+
+def seed_database(size: int, seed: int, fresh: bool = False) -> str:
+    os.makedirs(DATA_DIR, exist_ok=True)
+    db_path = os.path.join(DATA_DIR, f'alerts_{size_label(size)}_seed{seed}.db')
+    
+    if os.path.exists(db_path) and not fresh:
+        try:
+            conn = sqlite3.connect(db_path)
+            alert_count = conn.execute('SELECT COUNT(*) FROM alerts').fetchone()[0]
+            conn.close()
+            if alert_count == size:
+                database.DB_PATH = db_path
+                database.init_database()
+                return db_path
+        except sqlite3.Error:
+            pass
+    
+    database.close_pool()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    
+    database.DB_PATH = db_path
+    database.init_database()
+    
+    now = datetime.now().replace(tzinfo=timezone.utc).timestamp()
+    batch_size = database.BULK_INSERT_BATCH_SIZE
+    
+    user_ids = database.bulk_insert_users(mock_data.iter_mock_users(SEED_USERS, seed), defer_aggregates=True)
+    alert_ids = database.bulk_insert_alerts(
+        mock_data.iter_alert_rows(size, batch_size, user_ids, SEED_DAYS, now, seed),
+        defer_aggregates=True,
+        defer_indexes=True
+    )
+    database.bulk_insert_response_logs(
+        mock_data.iter_response_rows(size, batch_size, alert_ids, user_ids, SEED_DAYS, now, seed),
+        defer_aggregates=True,
+        defer_indexes=True
+    )
+    
+    with database.get_connection() as conn:
+        conn.execute('ANALYZE')
+    
+    return db_path
+
+def benchmark_size(size: int, args) -> dict:
+    print(f"\n📦 {size:,} 条警报")
+    
+    started = time.perf_counter()
+    seed_database(size, args.seed, args.fresh)
+    print(f"  数据库就绪 ({time.perf_counter() - started:.1f} 秒)")
+    
+    options = {'repeat': args.repeat, 'min_repeat': args.min_repeat, 'time_budget': args.time_budget}
+    results = {}
+    
+    def run(name: str, func, **kwargs):
+        results[name] = measure(func, **options, **kwargs)
+        summary = results[name]
+        print(f"  {name:<36} p50 {summary['p50_ms']:>10.2f} ms   p95 {summary['p95_ms']:>10.2f} ms   p99 {summary['p99_ms']:>10.2f} ms")
+    
+    get_alerts_with_details = uncached(database.get_alerts_with_details)
+    get_statistics = uncached(database.get_statistics)
+    
+    deep_page = max(1, size // 100 // 2)
+    run('get_alerts_with_details', lambda _: get_alerts_with_details(page=1, page_size=100))
+    run('get_alerts_with_details_deep_page', lambda _: get_alerts_with_details(page=deep_page, page_size=100))
+    run('get_statistics', lambda _: get_statistics())
+    
+    from utils.dashboard_analytics import calculate_metrics
+    
+    window_start = (datetime.now() - timedelta(days=ANALYTICS_WINDOW_DAYS)).strftime('%Y-%m-%d %H:%M:%S')
+    window_alerts = database.get_alerts_in_window(window_start)
+    window_logs = database.get_response_logs_bulk(start_time=window_start)
+    
+    run(
+        'calculate_metrics',
+        lambda _: calculate_metrics(window_alerts, window_logs['logs'], window_logs['first_responses']),
+        items=len(window_alerts)
+    )
+    
+    from utils.map_component import create_alert_map
+    
+    map_alerts = get_alerts_with_details(page=1, page_size=MAP_ALERT_COUNT)['data']
+    run('create_alert_map', lambda _: create_alert_map(map_alerts), items=len(map_alerts))
+    run('create_alert_map_render', lambda _: create_alert_map(map_alerts).get_root().render(), items=len(map_alerts))
+    
+    cluster_alerts = get_alerts_with_details(page=1, page_size=CLUSTER_ALERT_COUNT)['data']
+    for mode in ('cluster', 'grid'):
+        run(
+            f'create_alert_map_{mode}_render',
+            lambda _, mode=mode: create_alert_map(cluster_alerts, mode=mode).get_root().render(),
+            items=len(cluster_alerts)
+        )
+    
+    from utils.hazard_geometry import load_hazard_layer
+    from utils.risk_assessment import RiskAssessment
+    
+    risk_assessment = RiskAssessment(hazard_layers=[load_hazard_layer(HAZARD_FIXTURE)])
+    locations = [
+        {
+            'id': alert['id'],
+            'lat': alert['location_lat'],
+            'lng': alert['location_lng'],
+            'time': str(alert['alert_time'])[:19]
+        }
+        for alert in get_alerts_with_details(page=1, page_size=RISK_BATCH_SIZE)['data']
+    ]
+    run('risk_batch_assess', lambda _: risk_assessment.batch_assess(locations), items=len(locations))
+    
+    run(
+        'notification_throughput',
+        run_notifications,
+        setup=lambda: create_notification_system(NOTIFICATION_COUNT),
+        items=NOTIFICATION_COUNT
+    )
+    
+    from utils.notification_transport import ProviderTransport, StubProviderServer
+    
+    stub = StubProviderServer(latency=PROVIDER_STUB_LATENCY).start()
+    run(
+        'notification_provider_throughput',
+        run_notifications,
+        setup=lambda: create_notification_system(NOTIFICATION_COUNT, ProviderTransport(stub.endpoints())),
+        items=NOTIFICATION_COUNT
+    )
+    stub.stop()
+    
+    return results
+
+def create_notification_system(count: int, transport=None):
+    from utils.notification_system import NotificationSystem
+    
+    with database.get_connection() as conn:
+        conn.execute('DELETE FROM notification_outbox')
+    
+    system = NotificationSystem(rate_limited=False, transport=transport)
+    for channel in system.channels.values():
+        channel.simulation_delay = 0
+    
+    priorities = ["high", "medium", "low"]
+    channel_types = ["sms", "voice", "app"]
+    for i in range(count):
+        system.add_notification(f"1380000{i:04d}", f"基准测试通知 #{i}", priorities[i % 3], channel_types[i % 3])
+    
+    return system
+
+def run_notifications(system):
+    system.start()
+    system.wait_until_idle()
+    system.stop()
+
+def compare_with_baseline(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> dict:
+    comparison = {}
+    
+    for label, benchmarks in results.items():
+        baseline_benchmarks = baseline.get('results', {}).get(label, {})
+        
+        for name, summary in benchmarks.items():
+            if name not in baseline_benchmarks:
+                continue
+            
+            baseline_p50 = baseline_benchmarks[name]['p50_ms']
+            change = (summary['p50_ms'] - baseline_p50) / baseline_p50 if baseline_p50 else 0.0
+            significant = abs(summary['p50_ms'] - baseline_p50) >= min_delta_ms
+            
+            if significant and change > threshold:
+                status = "regression"
+            elif significant and change < -threshold:
+                status = "improvement"
+            else:
+                status = "unchanged"
+            
+            comparison[f"{label}/{name}"] = {
+                'baseline_p50_ms': baseline_p50,
+                'p50_ms': summary['p50_ms'],
+                'change_pct': round(change * 100, 1),
+                'status': status
+            }
+    
+    return comparison
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="应急响应系统性能基准测试")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES), help="警报数量，逗号分隔（默认 10000,100000,1000000）")
+    parser.add_argument("--repeat", type=int, default=30, help="每项最多采样次数（默认 30）")
+    parser.add_argument("--min-repeat", type=int, default=5, help="每项最少采样次数（默认 5）")
+    parser.add_argument("--time-budget", type=float, default=10.0, help="每项采样时间预算，秒（默认 10）")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--fresh", action="store_true", help="重新生成基准数据库")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="结果 JSON 路径")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线 JSON 路径")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 变化超过该比例视为回归/提升（默认 0.2）")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="p50 绝对变化小于该值（毫秒）时视为噪声（默认 1.0）")
+    parser.add_argument("--update-baseline", action="store_true", help="将本次结果写入基线")
+    parser.add_argument("--fail-on-regression", action="store_true", help="出现回归时以非零状态退出")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    
+    logging.getLogger('utils.notification_system').setLevel(logging.WARNING)
+    logging.getLogger('utils.notification_transport').setLevel(logging.WARNING)
+    
+    print("=" * 60)
+    print("        应急响应系统 - 性能基准测试")
+    print("=" * 60)
+    
+    results = {}
+    for size in sizes:
+        results[size_label(size)] = benchmark_size(size, args)
+    
+    database.close_pool()
+    
+    report = {
+        'meta': {
+            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'git_commit': get_git_commit(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'sizes': sizes,
+            'repeat': args.repeat,
+            'seed': args.seed
+        },
+        'results': results
+    }
+    
+    regressions = []
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        
+        report['baseline'] = baseline.get('meta', {})
+        report['comparison'] = compare_with_baseline(results, baseline, args.threshold, args.min_delta_ms)
+        
+        print("\n📊 与基线对比（p50）")
+        for key, item in report['comparison'].items():
+            badge = {"regression": "❌", "improvement": "🚀", "unchanged": "✅"}[item['status']]
+            print(f"  {badge} {key:<44} {item['baseline_p50_ms']:>10.2f} → {item['p50_ms']:>10.2f} ms ({item['change_pct']:+.1f}%)")
+        
+        regressions = [key for key, item in report['comparison'].items() if item['status'] == "regression"]
+    
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 结果已写入 {args.output}")
+    
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'meta': report['meta'], 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"💾 基线已更新 {args.baseline}")
+    
+    if regressions:
+        print(f"\n❌ {len(regressions)} 项出现性能回归: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+查询计划回归检查脚本
+按接近生产规模的数据量批量生成模拟数据并执行 ANALYZE，
+再对 utils/database.py 中登记的所有查询执行 EXPLAIN QUERY PLAN，
+若任一查询退化为全表扫描（SCAN）或临时排序，则以非零状态退出
+"""
+
+import sys
+import os
+import argparse
+import tempfile
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import utils.database as database
+import generate_mock_data as mock_data
+
+DEFAULT_ALERTS = 100000
+DEFAULT_USERS = 1000
+DEFAULT_DAYS = 90
+
+def seed_database(alert_count: int, user_count: int = DEFAULT_USERS, days: int = DEFAULT_DAYS, seed: int = 42):
+    now = datetime.now().replace(tzinfo=timezone.utc).timestamp()
+    batch_size = database.BULK_INSERT_BATCH_SIZE
+    
+    user_ids = database.bulk_insert_users(mock_data.iter_mock_users(user_count, seed), defer_aggregates=True)
+    alert_ids = database.bulk_insert_alerts(
+        mock_data.iter_alert_rows(alert_count, batch_size, user_ids, days, now, seed),
+        defer_aggregates=True,
+        defer_indexes=True
+    )
+    database.bulk_insert_response_logs(
+        mock_data.iter_response_rows(alert_count, batch_size, alert_ids, user_ids, days, now, seed),
+        defer_aggregates=True,
+        defer_indexes=True
+    )
+    
+    with database.get_connection() as conn:
+        conn.execute('ANALYZE')
+
+def check_query_plans(alert_count: int = DEFAULT_ALERTS, seed: int = 42, verbose: bool = False) -> dict:
+    previous_path = database.DB_PATH
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        database.close_pool()
+        database.DB_PATH = os.path.join(tmp_dir, 'query_plan_check.db')
+        
+        try:
+            database.init_database()
+            seed_database(alert_count, seed=seed)
+            
+            regressions = database.find_query_plan_regressions()
+            
+            if verbose:
+                for name, sql in database.QUERIES.items():
+                    status = "❌" if name in regressions else "✅"
+                    print(f"{status} {name}")
+                    for detail in database.explain_query_plan(sql):
+                        print(f"      {detail}")
+        finally:
+            database.close_pool()
+            database.DB_PATH = previous_path
+    
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="查询计划回归检查")
+    parser.add_argument("--alerts", type=int, default=DEFAULT_ALERTS, help=f"生成的警报数量（默认 {DEFAULT_ALERTS}）")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"生成 {args.alerts:,} 条警报并执行 ANALYZE ...")
+    regressions = check_query_plans(args.alerts, args.seed, verbose=True)
+    
+    print()
+    if regressions:
+        print(f"❌ {len(regressions)} 条查询出现全表扫描或临时排序: {', '.join(regressions)}")
+        sys.exit(1)
+    
+    print(f"✅ 全部 {len(database.QUERIES)} 条查询均未出现全表扫描或临时排序")
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,60 @@
 """
 快速生成模拟数据脚本
 用于快速生成应急响应系统的模拟数据
+
+不带参数运行时进入交互模式；指定 --alerts 时进入批量模式，用于压力测试：
+    python generate_mock_data.py --users 10000 --alerts 10000000 --days 365 --responses
 """
 
 import sys
 import os
+import argparse
+import time
+import numpy as np
+from datetime import datetime, timezone
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+import utils.database as database
 from utils.database import generate_mock_data, get_users, get_alerts
 
+DISTRICT_CENTERS = [
+    ("朝阳区", 39.9219, 116.4436, 0.22),
+    ("海淀区", 39.9599, 116.2982, 0.20),
+    ("丰台区", 39.8585, 116.2870, 0.12),
+    ("东城区", 39.9288, 116.4160, 0.08),
+    ("西城区", 39.9123, 116.3660, 0.09),
+    ("石景山区", 39.9056, 116.2229, 0.05),
+    ("通州区", 39.9097, 116.6566, 0.12),
+    ("昌平区", 40.2207, 116.2312, 0.12),
+]
+
+HOURLY_WEIGHTS = [
+    1, 1, 1, 1, 1, 2, 4, 7, 8, 7, 6, 6,
+    6, 5, 5, 5, 6, 7, 8, 7, 5, 4, 2, 1
+]
+
+STATUSES = ["pending", "processing", "resolved"]
+RISK_LEVELS = ["low", "medium", "high"]
+
+DESCRIPTIONS = [
+    "老人在家中跌倒，需要紧急救助",
+    "突发心脏病，请求医疗急救",
+    "家中发生火灾，请求消防支援",
+    "发现可疑人员，请求治安协助",
+    "老人感到身体不适，需要医疗检查",
+    "忘记服药，需要提醒",
+    "家中燃气泄漏，请求紧急处理",
+    "老人走失，请求协助寻找",
+    "突发高血压，需要医疗救助",
+    "家中水管破裂，请求维修"
+]
+
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗"
+GIVEN_NAMES = ["秀英", "桂英", "秀兰", "玉兰", "建国", "建华", "国强", "淑珍", "德明", "志强", "凤英", "文华"]
+RESPONDERS = ["社区网格员", "120急救中心", "社区医生", "志愿者", "物业值班"]
+ACTION_TYPES = ["电话联系", "现场处理", "派遣救援"]
+
 def print_header():
     print("=" * 60)
     print("        应急响应系统 - 模拟数据生成工具")
@@ -86,15 +131,203 @@ def main():
         print("  2. 查看'📊 后台仪表盘'查看数据统计")
         print("  3. 查看'👴 老人端模拟界面'测试用户功能")
         print()
-        
+    
     except Exception as e:
         print(f"❌ 生成模拟数据时出错: {e}")
         import sys
         sys.exit(1)
 
+def iter_mock_users(count: int, seed: int):
+    rng = np.random.default_rng([seed, 0])
+    districts = rng.integers(0, len(DISTRICT_CENTERS), count)
+    
+    for i in range(count):
+        name = SURNAMES[i % len(SURNAMES)] + GIVEN_NAMES[(i // len(SURNAMES)) % len(GIVEN_NAMES)]
+        district = DISTRICT_CENTERS[districts[i]][0]
+        yield (
+            name,
+            f"138{i:08d}",
+            f"北京市{district}模拟小区{i // 100 + 1}号楼",
+            f"139{i:08d}"
+        )
+
+def generate_alert_batch(batch_index: int, size: int, user_ids: range, days: int, now: float, seed: int):
+    rng = np.random.default_rng([seed, 1, batch_index])
+    
+    hour_weights = np.array(HOURLY_WEIGHTS, dtype=float)
+    hours = rng.choice(24, size=size, p=hour_weights / hour_weights.sum())
+    day_offsets = rng.integers(0, days, size)
+    seconds_in_hour = rng.integers(0, 3600, size)
+    
+    midnight = now - now % 86400
+    timestamps = midnight - day_offsets * 86400 + hours * 3600 + seconds_in_hour
+    timestamps = np.where(timestamps > now, timestamps - 86400, timestamps).astype('int64')
+    age_hours = (now - timestamps) / 3600
+    
+    district_weights = np.array([district[3] for district in DISTRICT_CENTERS])
+    districts = rng.choice(len(DISTRICT_CENTERS), size=size, p=district_weights / district_weights.sum())
+    centers = np.array([(district[1], district[2]) for district in DISTRICT_CENTERS])
+    lat = centers[districts, 0] + rng.normal(0, 0.02, size)
+    lng = centers[districts, 1] + rng.normal(0, 0.025, size)
+    
+    night = (hours >= 22) | (hours < 6)
+    risk_draw = rng.random(size)
+    risk_codes = np.where(risk_draw < np.where(night, 0.40, 0.50), 0, np.where(risk_draw < 0.85, 1, 2))
+    
+    status_draw = rng.random(size)
+    recent = age_hours < 24
+    status_codes = np.where(
+        recent,
+        np.where(status_draw < 0.4, 0, np.where(status_draw < 0.75, 1, 2)),
+        np.where(status_draw < 0.02, 0, np.where(status_draw < 0.05, 1, 2))
+    )
+    
+    user_index = (len(user_ids) * rng.random(size) ** 2).astype('int64')
+    description_codes = rng.integers(0, len(DESCRIPTIONS), size)
+    
+    return {
+        'user_id': user_ids.start + user_index,
+        'timestamp': timestamps,
+        'lat': lat,
+        'lng': lng,
+        'status': status_codes,
+        'risk_level': risk_codes,
+        'description': description_codes
+    }
+
+def format_timestamps(timestamps) -> list:
+    values = np.datetime_as_string(timestamps.astype('datetime64[s]'), unit='s')
+    return np.char.replace(values, 'T', ' ').tolist()
+
+def iter_alert_rows(count: int, batch_size: int, user_ids: range, days: int, now: float, seed: int):
+    statuses = np.array(STATUSES, dtype=object)
+    risk_levels = np.array(RISK_LEVELS, dtype=object)
+    descriptions = np.array(DESCRIPTIONS, dtype=object)
+    
+    for batch_index, start in enumerate(range(0, count, batch_size)):
+        batch = generate_alert_batch(batch_index, min(batch_size, count - start), user_ids, days, now, seed)
+        yield from zip(
+            batch['user_id'].tolist(),
+            format_timestamps(batch['timestamp']),
+            batch['lat'].tolist(),
+            batch['lng'].tolist(),
+            statuses[batch['status']].tolist(),
+            risk_levels[batch['risk_level']].tolist(),
+            descriptions[batch['description']].tolist()
+        )
+
+def iter_response_rows(count: int, batch_size: int, alert_ids: range, user_ids: range, days: int, now: float, seed: int):
+    median_minutes = np.array([15.0, 8.0, 4.0])
+    
+    for batch_index, start in enumerate(range(0, count, batch_size)):
+        size = min(batch_size, count - start)
+        batch = generate_alert_batch(batch_index, size, user_ids, days, now, seed)
+        rng = np.random.default_rng([seed, 2, batch_index])
+        
+        responded = batch['status'] > 0
+        delays = median_minutes[batch['risk_level']] * rng.lognormal(0, 0.6, size) * 60
+        action_times = np.minimum(batch['timestamp'] + delays.astype('int64'), int(now))
+        ids = np.arange(alert_ids.start + start, alert_ids.start + start + size)
+        responders = rng.integers(0, len(RESPONDERS), size)
+        actions = rng.integers(0, len(ACTION_TYPES), size)
+        
+        yield from zip(
+            ids[responded].tolist(),
+            [RESPONDERS[i] for i in responders[responded]],
+            format_timestamps(action_times[responded]),
+            [ACTION_TYPES[i] for i in actions[responded]],
+            [None] * int(responded.sum())
+        )
+
+def run_stage(label: str, total: int, insert) -> range:
+    started = time.perf_counter()
+    written = {"at": started}
+    
+    def progress(inserted: int):
+        written["at"] = time.perf_counter()
+        elapsed = max(written["at"] - started, 1e-9)
+        count = f"{inserted:,} / {total:,}" if total else f"{inserted:,}"
+        print(f"\r  {label}: {count} 条 (写入 {inserted / elapsed:,.0f} 条/秒)", end="", flush=True)
+    
+    ids = insert(progress)
+    finished = time.perf_counter()
+    print()
+    print(
+        f"  {label}: 写入 {written['at'] - started:.1f} 秒，索引重建和汇总表更新 {finished - written['at']:.1f} 秒，"
+        f"端到端 {len(ids) / max(finished - started, 1e-9):,.0f} 条/秒"
+    )
+    return ids
+
+def run_bulk(args):
+    if args.db:
+        database.DB_PATH = os.path.abspath(args.db)
+    
+    database.init_database()
+    
+    print_header()
+    print(f"批量模式：{args.users:,} 个用户，{args.alerts:,} 条警报，时间跨度 {args.days} 天")
+    print(f"数据库: {database.DB_PATH}")
+    print("-" * 60)
+    
+    now = datetime.now().replace(tzinfo=timezone.utc).timestamp()
+    total_started = time.perf_counter()
+    
+    user_ids = run_stage("用户", args.users, lambda progress: database.bulk_insert_users(
+        iter_mock_users(args.users, args.seed),
+        batch_size=args.batch_size,
+        defer_aggregates=True,
+        progress_callback=progress
+    ))
+    
+    alert_ids = run_stage("警报", args.alerts, lambda progress: database.bulk_insert_alerts(
+        iter_alert_rows(args.alerts, args.batch_size, user_ids, args.days, now, args.seed),
+        batch_size=args.batch_size,
+        defer_aggregates=True,
+        defer_indexes=True,
+        progress_callback=progress
+    ))
+    
+    response_count = 0
+    if args.responses:
+        response_ids = run_stage("响应日志", None, lambda progress: database.bulk_insert_response_logs(
+            iter_response_rows(args.alerts, args.batch_size, alert_ids, user_ids, args.days, now, args.seed),
+            batch_size=args.batch_size,
+            defer_aggregates=True,
+            defer_indexes=True,
+            progress_callback=progress
+        ))
+        response_count = len(response_ids)
+    
+    database.close_pool()
+    
+    elapsed = time.perf_counter() - total_started
+    print("-" * 60)
+    print(f"✅ 生成用户 {len(user_ids):,} 个，警报 {len(alert_ids):,} 条，响应日志 {response_count:,} 条")
+    print(f"⏱️ 总耗时 {elapsed:.1f} 秒，端到端平均 {(len(user_ids) + len(alert_ids) + response_count) / elapsed:,.0f} 行/秒")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="应急响应系统模拟数据生成工具")
+    parser.add_argument("--alerts", type=int, help="批量生成的警报数量，指定后进入批量模式")
+    parser.add_argument("--users", type=int, default=1000, help="批量生成的用户数量（默认 1000）")
+    parser.add_argument("--days", type=int, default=90, help="警报时间分布的天数（默认 90）")
+    parser.add_argument("--responses", action="store_true", help="为处理中/已解决的警报生成响应日志")
+    parser.add_argument("--batch-size", type=int, default=database.BULK_INSERT_BATCH_SIZE, help="每批写入的行数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    parser.add_argument("--db", help="数据库文件路径（默认使用应用数据库）")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
+    args = parse_args()
+    
+    if args.alerts is not None and (args.alerts < 0 or args.users < 1 or args.days < 1):
+        print("❌ --alerts 不能为负数，--users 和 --days 至少为 1")
+        sys.exit(2)
+    
     try:
-        main()
+        if args.alerts is not None:
+            run_bulk(args)
+        else:
+            main()
     except KeyboardInterrupt:
         print("\n\n操作已取消")
     except Exception as e:
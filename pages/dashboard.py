@@ -4,14 +4,13 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.database import get_alerts_with_details, get_statistics, update_alert_status, add_response_log, get_response_logs
-from utils.map_component import display_alert_map, create_single_alert_map
+from utils.database import get_alerts_with_details, get_alerts_with_details_page, get_statistics, update_alert_status, add_response_log, get_response_logs
+from utils.map_component import display_alert_map, show_alert_location
 from utils.alert_simulator import run_alert_simulation
 from utils.voice_player import show_voice_player
 from utils.risk_assessment import RiskAssessment, show_risk_assessment_ui
 from utils.dashboard_analytics import show_dashboard_analytics
 from utils.notification_system import show_notification_system_ui, send_emergency_notification
-from streamlit_folium import st_folium
 
 def rerun():
     if 'rerun' not in st.session_state:
@@ -54,12 +53,8 @@ def show_dashboard():
     tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs(["🗺️ 求助地图", "📋 求助列表", "📝 响应日志", "🔄 实时模拟", "🔊 语音安抚", "🎯 风险评估", "📈 数据看板", "📢 通知系统"])
     
     with tab1:
-        with st.spinner("正在加载地图数据..."):
-            alerts_result = get_alerts_with_details(page=1, page_size=100)
-            alerts = alerts_result['data']
-        
         display_alert_map(
-            alerts=alerts,
+            alerts=None,
             center_lat=39.9042,
             center_lng=116.4074,
             zoom=10,
@@ -75,6 +70,10 @@ def show_dashboard():
         if "alerts_page" not in st.session_state:
             st.session_state.alerts_page = 1
         
+        if "alerts_cursor" not in st.session_state:
+            st.session_state.alerts_cursor = None
+            st.session_state.alerts_direction = "next"
+        
         if "alerts_page_size" not in st.session_state:
             st.session_state.alerts_page_size = 10
         
@@ -95,13 +94,22 @@ def show_dashboard():
                 index=1,
                 key="alert_page_size_select"
             )
+            if page_size != st.session_state.alerts_page_size:
+                st.session_state.alerts_page = 1
+                st.session_state.alerts_cursor = None
+                st.session_state.alerts_direction = "next"
             st.session_state.alerts_page_size = page_size
         
         with col3:
             st.caption(f"当前页: {st.session_state.alerts_page}")
         
-        alerts_result = get_alerts_with_details(page=st.session_state.alerts_page, page_size=st.session_state.alerts_page_size)
+        alerts_result = get_alerts_with_details_page(
+            cursor=st.session_state.alerts_cursor,
+            direction=st.session_state.alerts_direction,
+            page_size=st.session_state.alerts_page_size
+        )
         alerts = alerts_result['data']
+        total_pages = max(1, (stats['total_alerts'] + st.session_state.alerts_page_size - 1) // st.session_state.alerts_page_size)
         
         if alerts:
             df = pd.DataFrame(alerts)
@@ -131,8 +139,7 @@ def show_dashboard():
                             if alert.get('location_lat') and alert.get('location_lng'):
                                 st.markdown("---")
                                 st.markdown("#### 位置地图")
-                                m = create_single_alert_map(alert, height=300)
-                                st_folium(m, width='100%', height=300)
+                                show_alert_location(alert, height=300)
                         
                         with col2:
                             status_badge = {
@@ -172,22 +179,30 @@ def show_dashboard():
                 
                 st.markdown("---")
                 
-                st.markdown(f"共 {alerts_result['total']} 条记录，第 {alerts_result['page']} / {alerts_result['total_pages']} 页")
+                st.markdown(f"共 {stats['total_alerts']} 条记录，第 {st.session_state.alerts_page} / {total_pages} 页")
                 
                 col1, col2, col3 = st.columns(3)
                 
                 with col1:
-                    if st.button("⬅️ 上一页", disabled=alerts_result['page'] <= 1, key="alert_prev_page"):
-                        st.session_state.alerts_page -= 1
+                    if st.button("⬅️ 上一页", disabled=not alerts_result['has_prev'], key="alert_prev_page"):
+                        st.session_state.alerts_page = max(1, st.session_state.alerts_page - 1)
+                        if st.session_state.alerts_page == 1:
+                            st.session_state.alerts_cursor = None
+                            st.session_state.alerts_direction = "next"
+                        else:
+                            st.session_state.alerts_cursor = alerts_result['prev_cursor']
+                            st.session_state.alerts_direction = "prev"
                         st.session_state.rerun = True
                         rerun()
                 
                 with col2:
-                    st.write(f"第 {alerts_result['page']} 页 / 共 {alerts_result['total_pages']} 页")
+                    st.write(f"第 {st.session_state.alerts_page} 页 / 共 {total_pages} 页")
                 
                 with col3:
-                    if st.button("➡️ 下一页", disabled=alerts_result['page'] >= alerts_result['total_pages'], key="alert_next_page"):
+                    if st.button("➡️ 下一页", disabled=not alerts_result['has_next'], key="alert_next_page"):
                         st.session_state.alerts_page += 1
+                        st.session_state.alerts_cursor = alerts_result['next_cursor']
+                        st.session_state.alerts_direction = "next"
                         st.session_state.rerun = True
                         rerun()
             else:
@@ -258,15 +273,7 @@ def show_dashboard():
         show_risk_assessment_ui()
     
     with tab7:
-        alerts_result = get_alerts_with_details()
-        alerts = alerts_result.get('data', []) if isinstance(alerts_result, dict) else alerts_result
-        all_response_logs = []
-        
-        for alert in alerts:
-            logs = get_response_logs(alert['id'])
-            all_response_logs.extend(logs)
-        
-        show_dashboard_analytics(alerts, all_response_logs)
+        show_dashboard_analytics()
     
     with tab8:
         show_notification_system_ui()
@@ -4,12 +4,17 @@ import os
 import re
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.database import add_user, create_alert, get_user_by_id
+from utils.database import add_user, create_alert, get_user_by_id, get_last_alert_time
 from utils.voice_player import show_voice_player, play_soothing_message
-from utils.risk_assessment import RiskAssessment, show_risk_assessment_ui
+from utils.risk_assessment import get_shared_assessor, show_risk_assessment_ui
 from utils.notification_system import show_notification_system_ui, send_emergency_notification
 
 
+@st.cache_data(ttl=30)
+def _load_last_alert_time(user_id, exclude_alert_id):
+    return get_last_alert_time(user_id, exclude_alert_id=exclude_alert_id)
+
+
 def validate_phone(phone):
     if not phone:
         return False, "电话号码不能为空"
@@ -65,6 +70,9 @@ def show_elderly_page():
     if "elderly_quick_help" not in st.session_state:
         st.session_state.elderly_quick_help = None
     
+    if "elderly_submitted_alert_id" not in st.session_state:
+        st.session_state.elderly_submitted_alert_id = None
+    
     col1, col2 = st.columns([1, 1])
     
     with col1:
@@ -129,6 +137,7 @@ def show_elderly_page():
                             risk_level=risk_level.lower(),
                             description=description
                         )
+                        st.session_state.elderly_submitted_alert_id = alert_id
                         st.success(f"紧急求助已发送！求助ID: {alert_id}")
                         st.balloons()
                         st.session_state.elderly_quick_help = None
@@ -142,8 +151,11 @@ def show_elderly_page():
         st.markdown("---")
         st.subheader("🎯 自动风险评估")
         
-        assessor = RiskAssessment()
-        result = assessor.assess_risk(location_lat, location_lng, None, weather)
+        last_alert_time = _load_last_alert_time(
+            st.session_state.elderly_user_id,
+            st.session_state.elderly_submitted_alert_id
+        ) if st.session_state.elderly_user_id else None
+        result = get_shared_assessor().assess_cached(location_lat, location_lng, None, weather, last_alert_time=last_alert_time)
         
         risk_emoji = {
             "low": "🟢",
@@ -1,10 +1,13 @@
 import streamlit as st
 import os
 import sys
+import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.database import get_users, get_alerts, generate_mock_data
+from utils.database import get_users, get_alerts, generate_mock_data, get_pool_metrics
 from utils.config_manager import get_config_manager, reload_config
+from utils.data_export import EXPORT_FORMATS, ExportJob
+from utils.risk_assessment import get_risk_cache_metrics
 
 def rerun():
     if 'rerun' not in st.session_state:
@@ -210,59 +213,69 @@ def show_settings():
                 
                 st.metric("待处理求助", pending)
                 st.metric("已解决求助", resolved)
+            
+            with st.expander("🔌 数据库连接池"):
+                pool_metrics = get_pool_metrics()
+                st.metric("连接数", f"{pool_metrics['in_use']} / {pool_metrics['size']} (上限 {pool_metrics['max_size']})")
+                st.metric("借出次数", pool_metrics['checkouts'])
+                st.metric("等待次数", pool_metrics['waits'])
+                st.metric("锁超时", pool_metrics['lock_timeouts'], delta_color="inverse")
+                st.json(pool_metrics)
+            
+            with st.expander("🎯 风险评估缓存"):
+                cache_metrics = get_risk_cache_metrics()
+                st.metric("缓存条目", f"{cache_metrics['size']} / {cache_metrics['max_size']}")
+                st.metric("命中 / 未命中", f"{cache_metrics['hits']} / {cache_metrics['misses']}")
+                st.metric("命中率", f"{cache_metrics['hit_rate']:.1%}")
+                st.json(cache_metrics)
         
         with col2:
             st.markdown("### 数据导出")
             
-            export_format = st.selectbox("导出格式", ["CSV", "JSON"])
+            export_format = st.selectbox(
+                "导出格式",
+                list(EXPORT_FORMATS.keys()),
+                format_func=lambda key: EXPORT_FORMATS[key]['label']
+            )
             
-            if st.button("导出用户数据"):
-                if users:
-                    if export_format == "CSV":
-                        import pandas as pd
-                        df = pd.DataFrame(users)
-                        csv = df.to_csv(index=False)
-                        st.download_button(
-                            label="下载用户数据 (CSV)",
-                            data=csv,
-                            file_name="users_export.csv",
-                            mime="text/csv"
-                        )
-                    else:
-                        import json
-                        json_data = json.dumps(users, ensure_ascii=False, indent=2)
-                        st.download_button(
-                            label="下载用户数据 (JSON)",
-                            data=json_data,
-                            file_name="users_export.json",
-                            mime="application/json"
-                        )
-                else:
-                    st.warning("暂无用户数据可导出")
+            if 'export_jobs' not in st.session_state:
+                st.session_state.export_jobs = {}
             
-            if st.button("导出求助数据"):
-                if alerts:
-                    if export_format == "CSV":
-                        import pandas as pd
-                        df = pd.DataFrame(alerts)
-                        csv = df.to_csv(index=False)
-                        st.download_button(
-                            label="下载求助数据 (CSV)",
-                            data=csv,
-                            file_name="alerts_export.csv",
-                            mime="text/csv"
-                        )
-                    else:
-                        import json
-                        json_data = json.dumps(alerts, ensure_ascii=False, indent=2)
+            export_jobs = st.session_state.export_jobs
+            
+            for source, label in [('users', "用户数据"), ('alerts', "求助数据")]:
+                job = export_jobs.get(source)
+                
+                if st.button(f"导出{label}", disabled=job is not None and job.is_running):
+                    if job is not None:
+                        job.cleanup()
+                    job = ExportJob(source, export_format).start()
+                    export_jobs[source] = job
+                
+                if job is None:
+                    continue
+                
+                if job.is_running:
+                    st.progress(job.progress)
+                    st.caption(f"正在导出{label}: {job.rows_written} / {job.total_rows} 条")
+                elif job.status == "failed":
+                    st.error(f"导出{label}失败: {job.error_message}")
+                elif job.rows_written == 0:
+                    st.warning(f"暂无{label}可导出")
+                elif job.path and os.path.exists(job.path):
+                    with open(job.path, 'rb') as export_file:
                         st.download_button(
-                            label="下载求助数据 (JSON)",
-                            data=json_data,
-                            file_name="alerts_export.json",
-                            mime="application/json"
+                            label=f"下载{label} ({EXPORT_FORMATS[job.export_format]['label']}, {job.rows_written} 条)",
+                            data=export_file,
+                            file_name=job.file_name,
+                            mime=job.mime,
+                            key=f"download_{source}_export"
                         )
-                else:
-                    st.warning("暂无求助数据可导出")
+            
+            if any(job.is_running for job in export_jobs.values()):
+                time.sleep(0.5)
+                st.session_state.rerun = True
+                rerun()
         
         st.markdown("---")
         st.warning("⚠️ 危险操作区域")
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def temp_database(tmp_path):
+    from utils import database
+    
+    previous_path = database.DB_PATH
+    database.close_pool()
+    database.DB_PATH = str(tmp_path / 'test.db')
+    try:
+        database.init_database()
+        yield database
+    finally:
+        database.close_pool()
+        database.DB_PATH = previous_path
@@ -0,0 +1,33 @@
+def counters(database):
+    with database.get_connection() as conn:
+        return dict(conn.cursor().execute('SELECT name, value FROM alert_counters WHERE value <> 0').fetchall())
+
+def rebuilt_counters(database):
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        database.rebuild_alert_counters(cursor)
+    return counters(database)
+
+def test_null_status_and_risk_level_are_counted(temp_database):
+    user_id = temp_database.add_user('张三', '13800000000')
+    alert_id = temp_database.create_alert(user_id, 39.9, 116.4, risk_level=None)
+    with temp_database.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO alerts (user_id, status, risk_level) VALUES (?, NULL, 'high')", (user_id,))
+        cursor.execute('UPDATE alerts SET risk_level = ? WHERE id = ?', ('low', alert_id))
+        cursor.execute("UPDATE alerts SET risk_level = NULL WHERE risk_level = 'high'")
+    
+    incremental = counters(temp_database)
+    assert incremental['total_alerts'] == 2
+    assert incremental['status:'] == 1
+    assert incremental['risk_level:'] == 1
+    assert incremental == rebuilt_counters(temp_database)
+
+def test_existing_database_picks_up_trigger_fix(temp_database):
+    with temp_database.get_connection() as conn:
+        conn.cursor().execute('DROP TRIGGER trg_alert_counters_alerts_insert')
+    temp_database.init_database()
+    
+    user_id = temp_database.add_user('张三', '13800000000')
+    temp_database.create_alert(user_id, risk_level=None)
+    assert counters(temp_database)['risk_level:'] == 1
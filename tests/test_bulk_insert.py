@@ -0,0 +1,93 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+AGGREGATE_SNAPSHOTS = {
+    'alert_counters': 'SELECT name, value FROM alert_counters WHERE value <> 0',
+    'alert_rollups': 'SELECT granularity, bucket, risk_level, status, alert_count FROM alert_rollups WHERE alert_count <> 0',
+    'response_rollups': '''
+        SELECT granularity, bucket, risk_level, responded_count, latency_count,
+               ROUND(latency_sum, 6), ROUND(latency_min, 6), ROUND(latency_max, 6)
+        FROM response_rollups
+    ''',
+    'alert_density': 'SELECT day, cell_row, cell_col, alert_count FROM alert_density WHERE alert_count <> 0',
+    'alert_geo_index': 'SELECT id, min_lat, max_lat, min_lng, max_lng FROM alert_geo_index'
+}
+
+def snapshot(cursor):
+    return {name: sorted(map(tuple, cursor.execute(sql).fetchall())) for name, sql in AGGREGATE_SNAPSHOTS.items()}
+
+def schema_objects(database, object_type: str):
+    with database.get_connection() as conn:
+        rows = conn.cursor().execute('SELECT name, sql FROM sqlite_master WHERE type = ?', (object_type,)).fetchall()
+    return sorted(map(tuple, rows))
+
+def alert_rows(user_ids, count: int, rng: random.Random):
+    base = datetime(2024, 5, 1, 8, 0, 0)
+    return [
+        (rng.choice(user_ids), (base + timedelta(minutes=rng.randrange(0, 3 * 24 * 60))).strftime('%Y-%m-%d %H:%M:%S'),
+         39.9 + rng.uniform(-0.2, 0.2), 116.4 + rng.uniform(-0.2, 0.2),
+         rng.choice(['pending', 'processing', 'resolved']), rng.choice(['low', 'medium', 'high', None]), None)
+        for _ in range(count)
+    ]
+
+def log_rows(alert_ids, alerts, rng: random.Random):
+    rows = []
+    for alert_id, alert in zip(alert_ids, alerts):
+        alert_time = datetime.strptime(alert[1], '%Y-%m-%d %H:%M:%S')
+        for _ in range(rng.randint(0, 2)):
+            action_time = (alert_time + timedelta(minutes=rng.randrange(1, 120))).strftime('%Y-%m-%d %H:%M:%S')
+            rows.append((alert_id, '值班员', action_time, 'update', None))
+    return rows
+
+@pytest.mark.parametrize('deferred', [False, True])
+def test_bulk_insert_returns_ids_and_keeps_aggregates_in_sync(temp_database, deferred):
+    rng = random.Random(11)
+    triggers = schema_objects(temp_database, 'trigger')
+    indexes = schema_objects(temp_database, 'index')
+    options = {'defer_aggregates': deferred, 'defer_indexes': deferred, 'batch_size': 64}
+    
+    user_ids = temp_database.bulk_insert_users([('张三', '13800000000', None, None), ('李四', '13800000001', None, None)], **options)
+    existing = temp_database.create_alert(user_ids[0], 39.9, 116.4, risk_level='high')
+    
+    progress = []
+    alerts = alert_rows(list(user_ids), 300, rng)
+    alert_ids = temp_database.bulk_insert_alerts(alerts, progress_callback=progress.append, **options)
+    log_ids = temp_database.bulk_insert_response_logs(log_rows(alert_ids, alerts, rng), **options)
+    
+    assert alert_ids == range(existing + 1, existing + 301)
+    assert progress == [64, 128, 192, 256, 300]
+    assert schema_objects(temp_database, 'trigger') == triggers
+    assert schema_objects(temp_database, 'index') == indexes
+    
+    with temp_database.get_connection() as conn:
+        cursor = conn.cursor()
+        stored = [tuple(row) for row in cursor.execute(
+            'SELECT user_id, alert_time, location_lat, location_lng, status, risk_level, description FROM alerts WHERE id >= ? ORDER BY id',
+            (alert_ids[0],)
+        ).fetchall()]
+        assert stored == alerts
+        assert [row[0] for row in cursor.execute('SELECT id FROM response_logs ORDER BY id').fetchall()] == list(log_ids)
+        
+        incremental = snapshot(cursor)
+        temp_database.rebuild_alert_counters(cursor)
+        temp_database.rebuild_rollups(cursor)
+        temp_database.rebuild_density(cursor)
+        temp_database.rebuild_spatial_index(cursor)
+        rebuilt = snapshot(cursor)
+    
+    assert dict(incremental['alert_counters'])['total_alerts'] == 301
+    assert incremental['response_rollups']
+    assert incremental == rebuilt
+    
+    created = temp_database.create_alert(user_ids[1], 39.95, 116.45, risk_level='low')
+    with temp_database.get_connection() as conn:
+        assert conn.cursor().execute('SELECT value FROM alert_counters WHERE name = ?', ('total_alerts',)).fetchone()[0] == 302
+    assert created == existing + 301
+
+def test_bulk_insert_rejects_unknown_table_and_columns(temp_database):
+    with pytest.raises(ValueError):
+        temp_database.bulk_insert('alerts_archive', ['user_id'], [])
+    with pytest.raises(ValueError):
+        temp_database.bulk_insert('alerts', ['user_id', 'password'], [])
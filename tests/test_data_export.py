@@ -0,0 +1,49 @@
+import gc
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from utils import data_export
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_export, 'EXPORT_DIR', str(tmp_path / 'exports'))
+    return tmp_path / 'exports'
+
+def test_frame_export_is_written_in_chunks(export_dir):
+    frame = pd.DataFrame({'hour': range(24), 'alert_count': [hour * 2 for hour in range(24)]})
+    chunks = list(data_export.frame_chunks(frame, chunk_size=5))
+    assert [len(rows) for _, rows in chunks] == [5, 5, 5, 5, 4]
+    
+    path = data_export.write_export(iter(chunks), 'csv', prefix='dashboard')
+    assert os.path.dirname(path) == str(export_dir)
+    pd.testing.assert_frame_equal(pd.read_csv(path, encoding='utf-8-sig'), frame)
+
+def test_old_export_files_are_swept(export_dir):
+    export_dir.mkdir()
+    stale = export_dir / 'alerts_old.csv.gz'
+    stale.write_text('old')
+    old_time = time.time() - data_export.EXPORT_FILE_TTL - 10
+    os.utime(stale, (old_time, old_time))
+    
+    path = data_export.write_export(iter([(['a'], [(1,)])]), 'csv')
+    assert not stale.exists()
+    assert os.path.exists(path)
+
+def test_export_job_files_are_removed_when_replaced_or_dropped(temp_database, export_dir):
+    temp_database.add_user("张三", "13800000000")
+    
+    job = data_export.ExportJob('users', 'ndjson').start()
+    assert job.wait(10) and job.status == 'completed'
+    path = job.path
+    job.cleanup()
+    assert not os.path.exists(path)
+    
+    job = data_export.ExportJob('users', 'ndjson').start()
+    assert job.wait(10) and job.status == 'completed'
+    path = job.path
+    del job
+    gc.collect()
+    assert not os.path.exists(path)
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+
+import pytest
+from folium.plugins import FastMarkerCluster, HeatMap
+
+from utils import map_component
+
+def make_alerts(count: int, lat: float = 39.9, lng: float = 116.4):
+    return [
+        {
+            'id': index,
+            'location_lat': lat + index * 0.001,
+            'location_lng': lng + index * 0.001,
+            'risk_level': ('low', 'medium', 'high')[index % 3],
+            'status': 'pending',
+            'alert_time': '2024-07-01 12:00:00',
+            'user_name': f'用户{index}',
+            'phone': '13800000000'
+        }
+        for index in range(count)
+    ]
+
+@pytest.fixture
+def session_caches(monkeypatch):
+    caches = {}
+    monkeypatch.setattr(map_component, '_session_cache', lambda name: caches.setdefault(name, OrderedDict()))
+    return caches
+
+def test_marker_groups_update_without_remounting(session_caches):
+    assert map_component.SUPPORTS_FEATURE_GROUP_UPDATE
+    
+    alerts = make_alerts(9)
+    groups = map_component.get_marker_groups(alerts)
+    assert len(groups) == 3
+    assert map_component.get_marker_groups(alerts) == groups
+    
+    base_map = map_component.create_alert_map(alerts=[], zoom=12, height=400)
+    map_state = map_component.st_folium(
+        base_map, width='100%', height=400, center=(39.9, 116.4),
+        feature_group_to_add=groups, key='map_incremental'
+    )
+    assert map_state is not None
+
+def map_state(south: float, west: float, north: float, east: float, zoom: int = 12):
+    return {
+        'bounds': {'_southWest': {'lat': south, 'lng': west}, '_northEast': {'lat': north, 'lng': east}},
+        'center': {'lat': (south + north) / 2, 'lng': (west + east) / 2},
+        'zoom': zoom
+    }
+
+def test_remount_bounds_are_not_treated_as_a_pan():
+    mount = {'key': 'map_markers_a', 'bounds': None}
+    marker_extent = map_state(39.90, 116.40, 39.91, 116.41)
+    
+    assert map_component._interaction_viewport({'bounds': {}}, mount, 12) is None
+    assert map_component._interaction_viewport(marker_extent, mount, 12) is None
+    assert map_component._interaction_viewport(marker_extent, mount, 12) is None
+    
+    panned = map_component._interaction_viewport(map_state(39.80, 116.30, 39.90, 116.40), mount, 12)
+    assert panned['query_bounds'] == map_component.viewport_query_bounds(39.80, 116.30, 39.90, 116.40)
+
+def layers_of(folium_map, layer_type):
+    return [child for child in folium_map._children.values() if isinstance(child, layer_type)]
+
+def test_render_mode_follows_point_count():
+    assert map_component.resolve_render_mode('auto', map_component.MARKER_MODE_LIMIT) == 'markers'
+    assert map_component.resolve_render_mode('auto', map_component.MARKER_MODE_LIMIT + 1) == 'cluster'
+    assert map_component.resolve_render_mode('auto', map_component.CLUSTER_MODE_LIMIT + 1) == 'grid'
+    assert map_component.resolve_render_mode('markers', 10 ** 6) == 'markers'
+
+def test_grid_aggregation_conserves_counts_and_caps_cells():
+    alerts = make_alerts(600) + [
+        {'id': 'missing', 'location_lat': None, 'location_lng': 116.4, 'risk_level': 'high'},
+        {'id': 'nan', 'location_lat': float('nan'), 'location_lng': 116.4, 'risk_level': 'high'}
+    ]
+    
+    for zoom, max_cells in [(16, map_component.GRID_MAX_CELLS), (16, 10), (8, map_component.GRID_MAX_CELLS)]:
+        features = map_component.aggregate_alerts_grid(alerts, zoom, max_cells)['features']
+        assert 0 < len(features) <= max_cells
+        assert sum(feature['properties']['count'] for feature in features) == 600
+        for feature in features:
+            properties = feature['properties']
+            assert properties['low'] + properties['medium'] + properties['high'] == properties['count']
+            assert properties['risk_level'] == max(
+                (level for level in map_component.RISK_LEVEL_ORDER if properties[level]),
+                key=map_component.RISK_LEVEL_ORDER.index
+            )
+    
+    single = map_component.aggregate_alerts_grid(make_alerts(3), 4)['features']
+    assert len(single) == 1 and single[0]['properties']['risk_level'] == 'high'
+    assert map_component.aggregate_alerts_grid([], 12) == {'type': 'FeatureCollection', 'features': []}
+
+def test_cluster_and_grid_modes_build_a_single_layer():
+    alerts = make_alerts(300)
+    
+    cluster_map = map_component.create_alert_map(alerts, zoom=12, mode='cluster')
+    [cluster] = layers_of(cluster_map, FastMarkerCluster)
+    assert len(cluster.data) == 300
+    assert [row[2:4] for row in cluster.data[:3]] == [[0, 'low'], [1, 'medium'], [2, 'high']]
+    assert layers_of(map_component.create_alert_map(alerts, zoom=12, mode='auto'), FastMarkerCluster)
+    
+    grid_map = map_component.create_alert_map(alerts, zoom=12, mode='grid')
+    [grid] = layers_of(grid_map, map_component.GridAggregateLayer)
+    assert sum(feature['properties']['count'] for feature in grid.data['features']) == 300
+    assert 'L.geoJson' in grid_map.get_root().render()
+
+def test_density_tracks_alert_changes_and_feeds_the_heatmap(temp_database, session_caches):
+    user_id = temp_database.add_user('张三', '13800000000')
+    with temp_database.get_connection() as conn:
+        cursor = conn.cursor()
+        insert = 'INSERT INTO alerts (user_id, alert_time, location_lat, location_lng, risk_level) VALUES (?, ?, ?, ?, ?)'
+        for alert_time in ('2024-07-01 08:00:00', '2024-07-01 09:00:00', '2024-07-02 10:00:00'):
+            cursor.execute(insert, (user_id, alert_time, 39.9011, 116.4011, 'low'))
+        cursor.execute(insert, (user_id, '2024-07-02 11:00:00', 39.9511, 116.4511, 'high'))
+        moved = cursor.execute(insert, (user_id, '2024-07-02 12:00:00', 39.8, 116.3, 'high')).lastrowid
+        cursor.execute(insert, (user_id, '2024-07-05 12:00:00', 39.9511, 116.4511, 'high'))
+        cursor.execute(insert, (user_id, '2024-07-02 12:00:00', None, None, 'high'))
+        cursor.execute('UPDATE alerts SET location_lat = 39.9511, location_lng = 116.4511 WHERE id = ?', (moved,))
+        cursor.execute("DELETE FROM alerts WHERE alert_time = '2024-07-01 09:00:00'")
+    
+    temp_database.get_alert_density.clear()
+    density = temp_database.get_alert_density('2024-07-01', '2024-07-02')
+    cell_degrees = density['cell_degrees']
+    
+    assert density['total'] == 4
+    assert [count for _, _, count in density['cells']] == [2, 2]
+    for (lat, lng, _), (alert_lat, alert_lng) in zip(density['cells'], [(39.9011, 116.4011), (39.9511, 116.4511)]):
+        assert abs(lat - alert_lat) <= cell_degrees / 2 and abs(lng - alert_lng) <= cell_degrees / 2
+    
+    layer = map_component.get_density_layer(density)
+    [heatmap] = [child for child in layer._children.values() if isinstance(child, HeatMap)]
+    assert [weight for _, _, weight in heatmap.data] == [1.0, 1.0]
+    assert map_component.get_density_layer(dict(density)) is layer
+    assert map_component.get_density_layer({**density, 'end_day': '2024-07-05'}) is not layer
+    
+    empty = map_component.create_density_layer({'cells': []})
+    assert not any(isinstance(child, HeatMap) for child in empty._children.values())
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from utils import notification_system
+from utils.database import claim_notifications, enqueue_notification
+from utils.notification_system import NotificationSystem
+
+def outbox_states(database):
+    with database.get_connection() as conn:
+        return dict(conn.cursor().execute('SELECT id, state FROM notification_outbox').fetchall())
+
+def wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return predicate()
+
+@pytest.fixture
+def short_leases(monkeypatch):
+    monkeypatch.setattr(notification_system, 'OUTBOX_LEASE_SECONDS', 0.3)
+    monkeypatch.setattr(notification_system, 'OUTBOX_LEASE_RENEW_INTERVAL', 0.1)
+
+def make_system(delay: float = 0.0) -> NotificationSystem:
+    system = NotificationSystem(rate_limited=False)
+    for channel in system.channels.values():
+        channel.simulation_delay = delay
+    return system
+
+def test_restart_releases_claims_of_previous_process(temp_database, short_leases):
+    ids = [enqueue_notification(f'1380000{i:04d}', '紧急通知', 'sms', 1) for i in range(5)]
+    assert len(claim_notifications('sms', 10, coalesce_limit=20, owner='crashed-process')) == 5
+    
+    system = make_system()
+    system.start()
+    try:
+        assert wait_for(lambda: all(state == 'sent' for state in outbox_states(temp_database).values()))
+    finally:
+        system.stop()
+    
+    assert sorted(outbox_states(temp_database)) == ids
+    assert system.channels['sms'].sent_count == 5
+
+def test_live_owner_keeps_its_leases(temp_database, short_leases):
+    for i in range(3):
+        enqueue_notification(f'1380000{i:04d}', '紧急通知', 'sms', 0)
+    
+    system = make_system(delay=1.0)
+    system.start()
+    try:
+        assert wait_for(lambda: all(state == 'sent' for state in outbox_states(temp_database).values()))
+    finally:
+        system.stop()
+    
+    assert system.channels['sms'].sent_count == 3
@@ -0,0 +1,153 @@
+import threading
+import time
+
+from utils.notification_system import CircuitBreaker, NotificationChannel, NotificationSystem, retry_delay
+
+class RecordingChannel(NotificationChannel):
+    def __init__(self, name: str = "SMS", delay: float = 0.0, fail: bool = False):
+        super().__init__(name)
+        self.delay = delay
+        self.fail = fail
+        self.started = []
+        self.active_low = 0
+        self.max_active_low = 0
+    
+    def send(self, notification) -> bool:
+        with self.lock:
+            self.started.append((time.monotonic(), notification.priority, notification.recipient))
+            if notification.priority != "high":
+                self.active_low += 1
+                self.max_active_low = max(self.max_active_low, self.active_low)
+        
+        time.sleep(self.delay)
+        
+        with self.lock:
+            if notification.priority != "high":
+                self.active_low -= 1
+        self.log(notification, not self.fail, "Send failed" if self.fail else None)
+        return not self.fail
+
+def make_system(channels=None, **options) -> NotificationSystem:
+    system = NotificationSystem(rate_limited=False, **options)
+    for channel in system.channels.values():
+        channel.simulation_delay = 0
+    for name, channel in (channels or {}).items():
+        system.channels[name] = channel
+        system.dispatchers[name].channel = channel
+    return system
+
+def outbox_rows(database):
+    with database.get_connection() as conn:
+        rows = conn.cursor().execute('SELECT id, state, retry_count FROM notification_outbox ORDER BY id').fetchall()
+    return [tuple(row) for row in rows]
+
+def wait_for(predicate, timeout: float = 10.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+def test_high_priority_preempts_backlog_on_reserved_worker(temp_database):
+    channel = RecordingChannel(delay=0.1)
+    system = make_system({"sms": channel}, concurrency={"sms": 3})
+    for index in range(12):
+        system.add_notification(f"1380000{index:04d}", "例行通知", "low", "sms")
+    
+    system.start()
+    try:
+        assert wait_for(lambda: len(channel.started) >= 2)
+        started_before = len(channel.started)
+        system.add_notification("13900000000", "紧急求助", "high", "sms")
+        assert system.wait_until_idle(10)
+    finally:
+        system.stop()
+    
+    priorities = [priority for _, priority, _ in channel.started]
+    assert len(priorities) == 13
+    assert priorities.index("high") <= started_before + 1
+    assert channel.max_active_low == 2
+    assert all(state == "sent" for _, state, _ in outbox_rows(temp_database))
+
+def test_retry_delay_backs_off_exponentially_with_jitter_and_cap():
+    policy = {"base_delay": 10, "max_delay": 60}
+    for retry_count, full_delay in [(1, 10), (2, 20), (3, 40), (4, 60), (8, 60)]:
+        delays = [retry_delay(policy, retry_count) for _ in range(200)]
+        assert all(full_delay / 2 <= delay <= full_delay for delay in delays)
+        assert max(delays) - min(delays) > 0
+
+def test_failed_notification_backs_off_then_moves_to_dead(temp_database):
+    channel = RecordingChannel(fail=True)
+    system = make_system({"sms": channel}, retry_policies={"sms": {"max_retries": 2, "base_delay": 0.2, "max_delay": 0.4}})
+    notification_id = system.add_notification("13800000000", "紧急通知", "medium", "sms")
+    
+    system.start()
+    try:
+        assert wait_for(lambda: outbox_rows(temp_database) == [(notification_id, "dead", 2)])
+    finally:
+        system.stop()
+    
+    attempts = [started for started, _, _ in channel.started]
+    assert len(attempts) == 3
+    assert attempts[1] - attempts[0] >= 0.1
+    assert attempts[2] - attempts[1] >= 0.2
+    assert system.get_statistics()["dead"] == 1
+
+def test_low_priority_merges_per_recipient_but_high_is_never_merged(temp_database):
+    channel = RecordingChannel()
+    system = make_system({"sms": channel})
+    for index in range(5):
+        system.add_notification("13800000000", f"例行通知 {index}", "low", "sms")
+    for index in range(3):
+        system.add_notification("13800000000", f"紧急通知 {index}", "high", "sms")
+    
+    system.start()
+    try:
+        assert wait_for(lambda: all(state == "sent" for _, state, _ in outbox_rows(temp_database)))
+    finally:
+        system.stop()
+    
+    assert sorted(priority for _, priority, _ in channel.started) == ["high", "high", "high", "low"]
+    assert system.merged_counts["sms"] == 4
+    assert system.get_statistics()["merged"] == 4
+
+def test_circuit_breaker_opens_then_probes_half_open_then_closes():
+    breaker = CircuitBreaker(latency_limit=1.0, window=4, min_samples=4, min_success_rate=0.5,
+                             open_seconds=0.1, half_open_probes=2)
+    states = [breaker.record(success, 0.01) for success in (True, False, False, False)]
+    assert states == [None, None, None, "open"]
+    assert not breaker.allow()
+    
+    time.sleep(0.15)
+    assert breaker.allow() and breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    assert breaker.record(False, 0.01) == "open"
+    assert breaker.opened_count == 2
+    
+    time.sleep(0.15)
+    assert breaker.allow() and breaker.allow()
+    assert breaker.record(True, 0.01) is None
+    assert breaker.record(True, 0.01) == "closed"
+    assert breaker.allow() and breaker.snapshot()["success_rate"] == 1.0
+
+def test_open_breaker_fails_high_priority_over_and_defers_low(temp_database):
+    sms = RecordingChannel()
+    voice = RecordingChannel("Voice")
+    system = make_system({"sms": sms, "voice": voice})
+    system.breakers["sms"]._open()
+    high_id = system.add_notification("13800000000", "紧急通知", "high", "sms")
+    low_id = system.add_notification("13800000001", "例行通知", "low", "sms")
+    
+    system.start()
+    try:
+        assert wait_for(lambda: (high_id, "sent", 0) in outbox_rows(temp_database))
+        time.sleep(0.2)
+    finally:
+        system.stop()
+    
+    assert sms.started == []
+    assert [priority for _, priority, _ in voice.started] == ["high"]
+    assert system.failover_counts == {"sms": 1, "voice": 0, "app": 0}
+    assert (low_id, "pending", 0) in outbox_rows(temp_database)
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from utils.notification_system import Notification
+from utils.notification_transport import (
+    PROVIDER_PATHS, HTTPConnectionPool, ProviderTransport, StubProviderServer, encode_message, read_message
+)
+
+CHANNEL_LIMITS = {
+    "sms": {"max_in_flight": 64, "max_connections": 4},
+    "voice": {"max_in_flight": 64, "max_connections": 2},
+    "app": {"max_in_flight": 64, "max_connections": 3}
+}
+
+@pytest.fixture
+def stub_server(request):
+    server = StubProviderServer(**getattr(request, "param", {})).start()
+    yield server
+    server.stop()
+
+def make_notifications(count: int):
+    return [Notification(id=i, recipient=f"1380000{i:04d}", message="测试通知") for i in range(count)]
+
+def test_each_channel_keeps_its_own_connection_limit(stub_server):
+    stub_server.latency = 0.02
+    transport = ProviderTransport(stub_server.endpoints(), limits=CHANNEL_LIMITS).start()
+    try:
+        futures = [
+            transport.submit(name, notification)
+            for notification in make_notifications(40)
+            for name in CHANNEL_LIMITS
+        ]
+        assert all(future.result()[0] for future in futures)
+        metrics = transport.get_metrics()
+    finally:
+        transport.stop()
+    
+    for name, limits in CHANNEL_LIMITS.items():
+        assert 0 < stub_server.path_max_active[PROVIDER_PATHS[name]] <= limits["max_connections"]
+        assert metrics[name]["connections_opened"] <= limits["max_connections"]
+    assert stub_server.max_active > max(limits["max_connections"] for limits in CHANNEL_LIMITS.values())
+
+@pytest.mark.parametrize("stub_server", [{"framing": "chunked"}, {"framing": "close"}], indirect=True)
+def test_reads_chunked_and_close_delimited_responses(stub_server):
+    transport = ProviderTransport({"sms": stub_server.url("sms")}).start()
+    try:
+        results = [transport.send("sms", notification) for notification in make_notifications(20)]
+        metrics = transport.get_metrics()["sms"]
+    finally:
+        transport.stop()
+    
+    assert results == [(True, None)] * 20
+    if stub_server.framing == "close":
+        assert metrics["connections_reused"] == 0
+    else:
+        assert metrics["connections_opened"] == 1
+
+async def serve_scripted(scripts):
+    received = []
+    
+    async def handle(reader, writer):
+        script = scripts[len(received)] if len(received) < len(scripts) else []
+        received.append([])
+        try:
+            if not script:
+                return
+            for action in script:
+                request = await read_message(reader)
+                if request is None:
+                    return
+                received[-1].append(request[2])
+                if action == "drop":
+                    return
+                if action == "partial":
+                    writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\n" + b"x" * 10)
+                    await writer.drain()
+                    return
+                writer.write(encode_message("HTTP/1.1 200 OK", {"Connection": "keep-alive"}, b"{}"))
+                await writer.drain()
+            await reader.read()
+        finally:
+            writer.close()
+    
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1], received
+
+def run_pool_requests(scripts, count: int):
+    async def main():
+        server, port, received = await serve_scripted(scripts)
+        pool = HTTPConnectionPool("127.0.0.1", port, max_connections=1, connect_timeout=1)
+        results = []
+        try:
+            for index in range(count):
+                try:
+                    status, _ = await asyncio.wait_for(pool.request("POST", "/sms", f"{index}".encode(), {}), 5)
+                    results.append(status)
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    results.append(type(e))
+        finally:
+            await pool.close()
+            server.close()
+            await server.wait_closed()
+        return results, received, pool
+    
+    return asyncio.run(main())
+
+def test_reused_connection_closed_before_response_is_retried_once():
+    results, received, pool = run_pool_requests([["ok", "drop"], ["ok"]], 2)
+    
+    assert results == [200, 200]
+    assert received == [[b"0", b"1"], [b"1"]]
+    assert pool.opened_count == 2
+
+def test_partial_response_is_not_resent():
+    results, received, pool = run_pool_requests([["ok", "partial"], ["ok"]], 3)
+    
+    assert results == [200, asyncio.IncompleteReadError, 200]
+    assert received == [[b"0", b"1"], [b"2"]]
+    assert pool.opened_count == 2
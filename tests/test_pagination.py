@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+def seed_alerts(database, count: int = 23):
+    user_id = database.add_user('张三', '13800000000')
+    base = datetime(2024, 5, 1, 8, 0, 0)
+    rows = [
+        (user_id, (base + timedelta(minutes=index // 3)).strftime('%Y-%m-%d %H:%M:%S'), 39.9, 116.4,
+         'pending' if index % 2 else 'resolved', 'low', None)
+        for index in range(count)
+    ]
+    database.bulk_insert_alerts(rows)
+    
+    with database.get_connection() as conn:
+        ordered = conn.cursor().execute('SELECT id, status FROM alerts ORDER BY alert_time DESC, id DESC').fetchall()
+    return [tuple(row) for row in ordered]
+
+def walk_pages(database, source: str, status: str = None, page_size: int = 5):
+    pages = []
+    page = database._fetch_keyset_page(source, status, page_size=page_size, include_total=True)
+    while True:
+        pages.append(page)
+        if not page['has_next']:
+            return pages
+        page = database._fetch_keyset_page(source, status, page['next_cursor'], 'next', page_size)
+
+def ids(page):
+    return [row['id'] for row in page['data']]
+
+@pytest.mark.parametrize('source', ['alerts', 'alerts_with_details'])
+def test_keyset_pages_cover_ties_in_order_and_walk_back(temp_database, source):
+    expected = [alert_id for alert_id, _ in seed_alerts(temp_database)]
+    pages = walk_pages(temp_database, source)
+    
+    assert [len(page['data']) for page in pages] == [5, 5, 5, 5, 3]
+    assert [alert_id for page in pages for alert_id in ids(page)] == expected
+    assert pages[0]['total'] == 23 and not pages[0]['has_prev']
+    assert pages[-1]['next_cursor'] is None
+    
+    for previous, page in zip(pages, pages[1:]):
+        assert page['has_prev']
+        back = temp_database._fetch_keyset_page(source, cursor=page['prev_cursor'], direction='prev', page_size=5)
+        assert ids(back) == ids(previous)
+        assert back['has_next']
+
+def test_keyset_pages_filter_by_status(temp_database):
+    expected = [alert_id for alert_id, status in seed_alerts(temp_database) if status == 'pending']
+    pages = walk_pages(temp_database, 'alerts', 'pending', page_size=4)
+    
+    assert pages[0]['total'] == len(expected)
+    assert [alert_id for page in pages for alert_id in ids(page)] == expected
+    assert all(row['status'] == 'pending' for page in pages for row in page['data'])
+
+def test_keyset_page_rejects_bad_cursor_and_direction(temp_database):
+    with pytest.raises(ValueError):
+        temp_database._fetch_keyset_page('alerts', cursor='not-a-cursor')
+    with pytest.raises(ValueError):
+        temp_database._fetch_keyset_page('alerts', direction='sideways')
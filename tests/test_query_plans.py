@@ -0,0 +1,18 @@
+from check_query_plans import check_query_plans
+from utils.database import is_plan_regression
+
+def test_registered_queries_use_indexes_at_realistic_size():
+    regressions = check_query_plans()
+    assert regressions == {}, "\n".join(f"{name}: {plan}" for name, plan in regressions.items())
+
+def test_any_scan_of_a_table_is_a_regression():
+    assert is_plan_regression('SCAN alerts')
+    assert is_plan_regression('SCAN a USING INDEX idx_alerts_alert_time')
+    assert is_plan_regression('SCAN alerts USING COVERING INDEX idx_alerts_status_risk_level')
+    assert is_plan_regression('SCAN g VIRTUAL TABLE INDEX 0:')
+    assert is_plan_regression('USE TEMP B-TREE FOR ORDER BY')
+    
+    assert not is_plan_regression('SEARCH a USING INDEX idx_alerts_status_time (status=?)')
+    assert not is_plan_regression('SCAN g VIRTUAL TABLE INDEX 2:D1B0D3B2')
+    assert not is_plan_regression('SCAN CONSTANT ROW')
+    assert not is_plan_regression('SCAN f', {'f'})
@@ -0,0 +1,113 @@
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.risk_assessment import RiskAssessment
+
+RIVER_POINT = (39.9100, 116.4000)
+DEFAULT_POINT = (39.9042, 116.4074)
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def river_factors(result):
+    return [factor for factor in result["risk_factors"] if factor["factor"] == "靠近河流"]
+
+def test_river_mutations_invalidate_engine_and_cache():
+    assessor = RiskAssessment(hazard_layers=[])
+    assert river_factors(assessor.assess_cached(*RIVER_POINT))
+    
+    version = assessor.cache_version
+    assert assessor.update_river_location("永定河", 30.0, 100.0)
+    assert assessor.cache_version != version
+    assert not river_factors(assessor.assess_cached(*RIVER_POINT))
+    
+    assessor.river_locations = list(assessor.river_locations) + [{"name": "新河", "lat": RIVER_POINT[0], "lng": RIVER_POINT[1]}]
+    assert river_factors(assessor.assess_cached(*RIVER_POINT))
+    
+    assert assessor.remove_river_location("新河")
+    assert assessor.assess_cached(*RIVER_POINT) == assessor.assess_risk(*RIVER_POINT)
+
+def test_river_additions_update_engine_in_place():
+    assessor = RiskAssessment(hazard_layers=[])
+    engine = assessor.engine
+    
+    for index in range(50):
+        assessor.add_river_location(f"河{index}", 39.0 + index * 0.01, 116.0)
+        assessor.assess_cached(*RIVER_POINT)
+    assessor.add_weather_risk("冰雹", 2)
+    
+    assert assessor.engine is engine
+    fresh = RiskAssessment(hazard_layers=[])
+    fresh.river_locations = assessor.river_locations
+    fresh.weather_risk_map = assessor.weather_risk_map
+    now = datetime(2024, 7, 1, 23, 30)
+    points = [(39.0 + index * 0.005, 116.0) for index in range(100)]
+    for lat, lng in points:
+        assert assessor.assess_cached(lat, lng, now, "冰雹") == fresh.assess_risk(lat, lng, now, "冰雹")
+    
+    locations = [{"lat": lat, "lng": lng, "time": now} for lat, lng in points]
+    assert assessor.batch_assess(locations).to_list() == fresh.batch_assess(locations).to_list()
+
+def test_hazard_layers_are_loaded_only_from_configured_dir(monkeypatch):
+    monkeypatch.delenv("HAZARD_LAYER_DIR", raising=False)
+    assert RiskAssessment().hazard_layers == ()
+    assert RiskAssessment().assess_risk(*DEFAULT_POINT, datetime(2024, 7, 1, 12, 0))["risk_level"] == "low"
+    
+    monkeypatch.setenv("HAZARD_LAYER_DIR", FIXTURE_DIR)
+    result = RiskAssessment().assess_risk(*DEFAULT_POINT, datetime(2024, 7, 1, 12, 0))
+    assert "洪涝风险区" in [factor["factor"] for factor in result["risk_factors"]]
+
+def test_cache_key_buckets_day_night_and_weather():
+    assessor = RiskAssessment(hazard_layers=[])
+    point = (40.2000, 116.0000)
+    calls = [
+        (datetime(2024, 7, 1, 9, 0), "晴"),
+        (datetime(2024, 7, 1, 15, 30), "晴"),
+        (datetime(2024, 7, 1, 15, 30), "暴雨"),
+        (datetime(2024, 7, 1, 23, 10), "暴雨"),
+        (datetime(2024, 7, 1, 23, 10), "暴雨"),
+        (datetime(2024, 7, 1, 23, 40), "暴雨")
+    ]
+    for current_time, weather in calls:
+        assert assessor.assess_cached(*point, current_time, weather, age=82) == assessor.assess_risk(*point, current_time, weather, age=82)
+    
+    metrics = assessor.get_cache_metrics()
+    assert (metrics["hits"], metrics["misses"]) == (2, 4)
+
+def test_river_locations_are_read_only():
+    assessor = RiskAssessment(hazard_layers=[])
+    with pytest.raises(TypeError):
+        assessor.river_locations[0]["lat"] = 0.0
+    with pytest.raises(AttributeError):
+        assessor.river_locations.append({"name": "新河", "lat": 0.0, "lng": 0.0})
+
+def test_last_alert_time_excludes_alert_being_created(temp_database):
+    user_id = temp_database.add_user("张三", "13800000000")
+    first_id = temp_database.create_alert(user_id, *RIVER_POINT, risk_level="low")
+    assert temp_database.get_last_alert_time(user_id, exclude_alert_id=first_id) is None
+    
+    second_id = temp_database.create_alert(user_id, *RIVER_POINT, risk_level="low")
+    assert temp_database.get_last_alert_time(user_id, exclude_alert_id=second_id) is not None
+    assert temp_database.get_last_alert_time(user_id) is not None
+
+@pytest.fixture
+def shanghai_time(monkeypatch):
+    monkeypatch.setenv("TZ", "Asia/Shanghai")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+def test_repeat_alert_compares_database_time_in_utc(temp_database, shanghai_time):
+    user_id = temp_database.add_user("张三", "13800000000")
+    temp_database.create_alert(user_id, *RIVER_POINT, risk_level="low")
+    assessor = RiskAssessment(hazard_layers=[])
+    
+    recent = (datetime.now(timezone.utc) - timedelta(minutes=10)).strftime("%Y-%m-%d %H:%M:%S.%f")
+    for last_alert_time in (temp_database.get_last_alert_time(user_id), recent):
+        result = assessor.assess_cached(*RIVER_POINT, last_alert_time=last_alert_time)
+        assert [factor["factor"] for factor in result["risk_factors"]].count("短时间内再次求助") == 1
+        
+        batch = assessor.batch_assess([{"lat": RIVER_POINT[0], "lng": RIVER_POINT[1], "last_alert_time": last_alert_time}])
+        assert batch.factor_mask("repeat_alert").tolist() == [True]
@@ -0,0 +1,141 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+ROLLUP_SNAPSHOTS = {
+    'alert_rollups': 'SELECT granularity, bucket, risk_level, status, alert_count FROM alert_rollups WHERE alert_count <> 0',
+    'response_rollups': '''
+        SELECT granularity, bucket, risk_level, responded_count, latency_count,
+               ROUND(latency_sum, 6), ROUND(latency_min, 6), ROUND(latency_max, 6)
+        FROM response_rollups
+    '''
+}
+
+def snapshot(cursor):
+    return {name: sorted(map(tuple, cursor.execute(sql).fetchall())) for name, sql in ROLLUP_SNAPSHOTS.items()}
+
+def assert_matches_rebuild(database):
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        incremental = snapshot(cursor)
+        database.rebuild_rollups(cursor)
+        rebuilt = snapshot(cursor)
+    
+    assert incremental['response_rollups']
+    assert incremental == rebuilt
+
+def timestamp(base: datetime, minutes: float) -> str:
+    return (base + timedelta(minutes=minutes)).strftime('%Y-%m-%d %H:%M:%S')
+
+@pytest.fixture
+def seeded_database(temp_database):
+    rng = random.Random(7)
+    base = datetime(2024, 5, 1, 8, 0, 0)
+    user_id = temp_database.add_user('张三', '13800000000')
+    
+    alert_rows = [
+        (user_id, timestamp(base, rng.randrange(0, 3 * 24 * 60)), 39.9, 116.4,
+         rng.choice(['pending', 'processing', 'resolved']), rng.choice(['low', 'medium', 'high']), None)
+        for _ in range(200)
+    ]
+    alert_ids = temp_database.bulk_insert_alerts(alert_rows)
+    
+    log_rows = []
+    for alert_id, alert in zip(alert_ids, alert_rows):
+        if rng.random() < 0.7:
+            alert_time = datetime.strptime(alert[1], '%Y-%m-%d %H:%M:%S')
+            for _ in range(rng.randint(1, 3)):
+                log_rows.append((alert_id, '值班员', timestamp(alert_time, rng.randrange(1, 120)), 'update', None))
+    temp_database.bulk_insert_response_logs(log_rows)
+    
+    return temp_database, list(alert_ids), rng, base
+
+def test_seeded_rollups_match_rebuild(seeded_database):
+    database, _, _, _ = seeded_database
+    assert_matches_rebuild(database)
+
+def test_alert_updates_and_deletes_keep_rollups_in_sync(seeded_database):
+    database, alert_ids, rng, base = seeded_database
+    
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        for alert_id in rng.sample(alert_ids, 40):
+            cursor.execute('UPDATE alerts SET risk_level = ? WHERE id = ?', (rng.choice(['low', 'medium', 'high']), alert_id))
+        for alert_id in rng.sample(alert_ids, 40):
+            cursor.execute('UPDATE alerts SET alert_time = ? WHERE id = ?', (timestamp(base, rng.randrange(0, 3 * 24 * 60)), alert_id))
+        for alert_id in rng.sample(alert_ids, 20):
+            cursor.execute('UPDATE alerts SET status = ? WHERE id = ?', ('resolved', alert_id))
+        for alert_id in rng.sample(alert_ids, 30):
+            cursor.execute('DELETE FROM response_logs WHERE alert_id = ?', (alert_id,))
+            cursor.execute('DELETE FROM alerts WHERE id = ?', (alert_id,))
+    
+    assert_matches_rebuild(database)
+
+def test_response_log_changes_keep_rollups_in_sync(seeded_database):
+    database, alert_ids, rng, base = seeded_database
+    
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        log_ids = [row[0] for row in cursor.execute('SELECT id FROM response_logs').fetchall()]
+        
+        for log_id in rng.sample(log_ids, 30):
+            cursor.execute("UPDATE response_logs SET action_time = datetime(action_time, '-30 minutes') WHERE id = ?", (log_id,))
+        for log_id in rng.sample(log_ids, 10):
+            cursor.execute('UPDATE response_logs SET alert_id = ? WHERE id = ?', (rng.choice(alert_ids), log_id))
+        for log_id in rng.sample(log_ids, 30):
+            cursor.execute('DELETE FROM response_logs WHERE id = ?', (log_id,))
+        for alert_id in rng.sample(alert_ids, 30):
+            cursor.execute(
+                "INSERT INTO response_logs (alert_id, responder, action_time, action_type) "
+                "SELECT id, '值班员', datetime(alert_time, '+1 minute'), 'update' FROM alerts WHERE id = ?",
+                (alert_id,)
+            )
+    
+    assert_matches_rebuild(database)
+
+def test_bulk_response_logs_with_earlier_actions_match_rebuild(seeded_database):
+    database, alert_ids, rng, _ = seeded_database
+    
+    with database.get_connection() as conn:
+        alert_times = dict(conn.cursor().execute('SELECT id, alert_time FROM alerts').fetchall())
+    
+    rows = [
+        (alert_id, '值班员', timestamp(datetime.strptime(alert_times[alert_id], '%Y-%m-%d %H:%M:%S'), 0.5), 'update', None)
+        for alert_id in rng.sample(alert_ids, 50)
+    ]
+    database.bulk_insert_response_logs(rows, defer_aggregates=True)
+    
+    assert_matches_rebuild(database)
+
+@pytest.mark.parametrize('time_range', ['today', 'week', 'month', 'all'])
+def test_dashboard_rollups_match_loaded_alerts(temp_database, time_range):
+    from utils.dashboard_analytics import AlertAnalytics, RollupAnalytics
+    
+    rng = random.Random(11)
+    now = datetime.now()
+    user_id = temp_database.add_user('张三', '13800000000')
+    temp_database.bulk_insert_alerts(
+        (user_id, timestamp(now, -rng.randrange(0, 40 * 24 * 60)), 39.9, 116.4,
+         rng.choice(['pending', 'processing', 'resolved']), rng.choice(['low', 'medium', 'high']), None)
+        for _ in range(300)
+    )
+    with temp_database.get_connection() as conn:
+        conn.cursor().execute(
+            "INSERT INTO response_logs (alert_id, responder, action_time, action_type) "
+            "SELECT id, '值班员', datetime(alert_time, '+' || (id % 50 + 1) || ' minutes'), 'update' FROM alerts WHERE id % 3 <> 0"
+        )
+    temp_database.get_alert_rollups.clear()
+    
+    rollups = RollupAnalytics.load(time_range)
+    loaded = AlertAnalytics.load(time_range)
+    
+    assert len(rollups) == len(loaded) > 0
+    assert rollups.metrics() == loaded.metrics()
+    assert rollups.risk_counts() == loaded.risk_counts()
+    assert rollups.hourly_counts().tolist() == loaded.hourly_counts().tolist()
+    assert sorted(rollups.detail_frame()['id']) == sorted(loaded.detail_frame()['id'])
+    for risk_level, item in rollups.response_summary_by_risk().items():
+        expected = loaded.response_summary_by_risk()[risk_level]
+        assert item['count'] == expected['count']
+        assert item['mean'] == pytest.approx(expected['mean'])
@@ -1,9 +1,17 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
 import io
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import get_alert_rollups, get_alerts_in_window, get_response_logs_bulk
+from utils.data_export import frame_chunks, remove_export_file, write_export
 
 def rerun():
     if 'rerun' not in st.session_state:
@@ -13,45 +21,262 @@ def rerun():
         st.session_state.rerun = False
         st.experimental_rerun()
 
-def get_time_range_data(alerts, time_range):
-    now = datetime.now()
+RISK_LEVELS = ['low', 'medium', 'high']
+STATUSES = ['pending', 'processing', 'resolved']
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+WINDOW_START = '0000-01-01 00:00:00'
+DETAIL_ROW_LIMIT = 1000
+
+def parse_timestamps(values) -> pd.Series:
+    series = pd.Series(values, dtype=object)
+    return pd.to_datetime(series.astype(str).str.slice(0, 19), format=TIMESTAMP_FORMAT, errors='coerce')
+
+def get_time_range_start(time_range):
+    current_hour = datetime.now().replace(minute=0, second=0, microsecond=0)
     
     if time_range == "today":
-        start_time = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        return current_hour.replace(hour=0)
     elif time_range == "week":
-        start_time = now - timedelta(days=7)
+        return current_hour - timedelta(days=7)
     elif time_range == "month":
-        start_time = now - timedelta(days=30)
-    else:
-        return alerts
+        return current_hour - timedelta(days=30)
+    return None
+
+class AlertAnalytics:
+    def __init__(self, alerts, response_logs=None, first_responses=None, frame: pd.DataFrame = None, columns=None):
+        if frame is not None:
+            self.frame = frame
+            self.columns = columns
+            return
+        
+        frame = pd.DataFrame(list(alerts) if alerts is not None else [])
+        self.columns = list(frame.columns)
+        
+        if 'id' not in frame:
+            frame['id'] = pd.Series(dtype='int64')
+        
+        frame['alert_dt'] = parse_timestamps(frame['alert_time']) if 'alert_time' in frame else pd.Series(pd.NaT, index=frame.index, dtype='datetime64[ns]')
+        frame['status_key'] = frame['status'].fillna('pending') if 'status' in frame else 'pending'
+        frame['risk_key'] = frame['risk_level'].fillna('low').astype(str).str.lower() if 'risk_level' in frame else 'low'
+        frame['first_response_minutes'] = self._first_response_minutes(frame, response_logs, first_responses)
+        
+        self.frame = frame
+    
+    @staticmethod
+    def _first_response_minutes(frame, response_logs, first_responses) -> pd.Series:
+        if frame.empty:
+            return pd.Series(dtype='float64')
+        
+        if first_responses is not None:
+            minutes = {alert_id: response.get('response_minutes') for alert_id, response in first_responses.items()}
+            return frame['id'].map(minutes).astype('float64')
+        
+        if not response_logs:
+            return pd.Series(np.nan, index=frame.index, dtype='float64')
+        
+        logs = pd.DataFrame(list(response_logs), columns=['alert_id', 'action_time'])
+        logs['action_dt'] = parse_timestamps(logs['action_time'])
+        first_action = logs.dropna(subset=['alert_id', 'action_dt']).groupby('alert_id')['action_dt'].min()
+        
+        return (frame['id'].map(first_action) - frame['alert_dt']).dt.total_seconds() / 60
+    
+    @classmethod
+    def from_data(cls, data, response_logs=None, first_responses=None) -> 'AlertAnalytics':
+        if isinstance(data, (AlertAnalytics, RollupAnalytics)):
+            return data
+        return cls(data, response_logs, first_responses)
+    
+    @classmethod
+    def load(cls, time_range) -> 'AlertAnalytics':
+        start_time = get_time_range_start(time_range)
+        alerts = get_alerts_in_window(start_time.strftime(TIMESTAMP_FORMAT) if start_time else WINDOW_START)
+        response_logs = get_response_logs_bulk(alert_ids=[alert['id'] for alert in alerts])
+        return cls(alerts, response_logs['logs'], response_logs['first_responses'])
+    
+    def _derive(self, mask) -> 'AlertAnalytics':
+        return AlertAnalytics(None, frame=self.frame[mask], columns=self.columns)
+    
+    def __len__(self):
+        return len(self.frame)
+    
+    def __bool__(self):
+        return not self.frame.empty
+    
+    def filter_time_range(self, time_range) -> 'AlertAnalytics':
+        start_time = get_time_range_start(time_range)
+        if start_time is None:
+            return self
+        return self._derive(self.frame['alert_dt'] >= pd.Timestamp(start_time))
+    
+    def to_frame(self) -> pd.DataFrame:
+        return self.frame[self.columns]
+    
+    def to_records(self):
+        return self.to_frame().to_dict('records')
+    
+    def detail_frame(self, limit: int = DETAIL_ROW_LIMIT) -> pd.DataFrame:
+        return self.frame.sort_values('alert_dt', ascending=False).head(limit)[self.columns]
+    
+    def hourly_counts(self) -> np.ndarray:
+        hours = self.frame['alert_dt'].dropna().dt.hour.to_numpy(dtype='int64')
+        return np.bincount(hours, minlength=24)
+    
+    def risk_counts(self):
+        counts = self.frame['risk_key'].value_counts()
+        return {risk_level: int(counts.get(risk_level, 0)) for risk_level in RISK_LEVELS}
+    
+    def status_counts(self):
+        counts = self.frame['status_key'].value_counts()
+        return {status: int(counts.get(status, 0)) for status in STATUSES}
+    
+    def response_times_by_risk(self):
+        responded = self.frame.dropna(subset=['first_response_minutes'])
+        grouped = responded.groupby('risk_key')['first_response_minutes']
+        return {
+            risk_level: grouped.get_group(risk_level).to_numpy() if risk_level in grouped.groups else np.array([])
+            for risk_level in RISK_LEVELS
+        }
+    
+    def response_summary_by_risk(self):
+        return {
+            risk_level: {
+                'responded_count': len(times),
+                'count': len(times),
+                'mean': float(times.mean()) if len(times) else None,
+                'min': float(times.min()) if len(times) else None,
+                'max': float(times.max()) if len(times) else None
+            }
+            for risk_level, times in self.response_times_by_risk().items()
+        }
+    
+    def metrics(self):
+        total = len(self.frame)
+        status_counts = self.status_counts()
+        response_times = self.frame['first_response_minutes'].dropna()
+        
+        return {
+            'total_alerts': total,
+            'pending_alerts': status_counts['pending'],
+            'processing_alerts': status_counts['processing'],
+            'resolved_alerts': status_counts['resolved'],
+            'high_risk_alerts': self.risk_counts()['high'],
+            'avg_response_time': round(float(response_times.mean()), 2) if not response_times.empty else 0,
+            'response_rate': round(len(response_times) / total * 100, 1) if total else 0
+        }
+
+class RollupAnalytics:
+    def __init__(self, alert_rollups, response_rollups, partial: AlertAnalytics, start_time: str = WINDOW_START):
+        self.alert_rollups = pd.DataFrame(list(alert_rollups), columns=['bucket', 'risk_level', 'status', 'alert_count'])
+        self.alert_rollups['risk_level'] = self.alert_rollups['risk_level'].str.lower()
+        self.response_rollups = pd.DataFrame(
+            list(response_rollups),
+            columns=['bucket', 'risk_level', 'responded_count', 'latency_count', 'latency_sum', 'latency_min', 'latency_max']
+        )
+        self.response_rollups['risk_level'] = self.response_rollups['risk_level'].str.lower()
+        self.partial = partial
+        self.start_time = start_time
+    
+    @classmethod
+    def load(cls, time_range) -> 'RollupAnalytics':
+        start_time = get_time_range_start(time_range)
+        current_hour = datetime.now().replace(minute=0, second=0, microsecond=0).strftime(TIMESTAMP_FORMAT)
+        start_bucket = start_time.strftime(TIMESTAMP_FORMAT) if start_time else ''
+        
+        rollups = get_alert_rollups(start_bucket, current_hour, 'hour')
+        if rollups is None:
+            return None
+        
+        partial_logs = get_response_logs_bulk(start_time=current_hour)
+        partial = AlertAnalytics(get_alerts_in_window(current_hour), partial_logs['logs'], partial_logs['first_responses'])
+        
+        return cls(rollups['alerts'], rollups['responses'], partial, start_bucket or WINDOW_START)
+    
+    def __len__(self):
+        return int(self.alert_rollups['alert_count'].sum()) + len(self.partial)
+    
+    def detail_frame(self, limit: int = DETAIL_ROW_LIMIT) -> pd.DataFrame:
+        return pd.DataFrame(get_alerts_in_window(self.start_time, limit=limit))
+    
+    def __bool__(self):
+        return len(self) > 0
+    
+    def hourly_counts(self) -> np.ndarray:
+        rollups = self.alert_rollups[self.alert_rollups['bucket'].str.len() >= 13]
+        hours = rollups['bucket'].str.slice(11, 13).astype('int64').to_numpy()
+        counts = np.bincount(hours, weights=rollups['alert_count'].to_numpy(), minlength=24)
+        return counts.astype('int64') + self.partial.hourly_counts()
+    
+    def risk_counts(self):
+        counts = self.alert_rollups.groupby('risk_level')['alert_count'].sum()
+        partial_counts = self.partial.risk_counts()
+        return {risk_level: int(counts.get(risk_level, 0)) + partial_counts[risk_level] for risk_level in RISK_LEVELS}
+    
+    def status_counts(self):
+        counts = self.alert_rollups.groupby('status')['alert_count'].sum()
+        partial_counts = self.partial.status_counts()
+        return {status: int(counts.get(status, 0)) + partial_counts[status] for status in STATUSES}
+    
+    def response_summary_by_risk(self):
+        grouped = self.response_rollups.groupby('risk_level').agg(
+            responded_count=('responded_count', 'sum'),
+            latency_count=('latency_count', 'sum'),
+            latency_sum=('latency_sum', 'sum'),
+            latency_min=('latency_min', 'min'),
+            latency_max=('latency_max', 'max')
+        )
+        partial_times = self.partial.response_times_by_risk()
+        
+        summary = {}
+        for risk_level in RISK_LEVELS:
+            row = grouped.loc[risk_level] if risk_level in grouped.index else None
+            times = partial_times[risk_level]
+            
+            count = (int(row['latency_count']) if row is not None else 0) + len(times)
+            total = (float(row['latency_sum']) if row is not None else 0.0) + float(times.sum())
+            minimums = [value for value in [row['latency_min'] if row is not None else None, times.min() if len(times) else None] if pd.notna(value)]
+            maximums = [value for value in [row['latency_max'] if row is not None else None, times.max() if len(times) else None] if pd.notna(value)]
+            
+            summary[risk_level] = {
+                'responded_count': (int(row['responded_count']) if row is not None else 0) + len(times),
+                'count': count,
+                'mean': total / count if count else None,
+                'min': float(min(minimums)) if minimums else None,
+                'max': float(max(maximums)) if maximums else None
+            }
+        
+        return summary
     
-    filtered_alerts = []
-    for alert in alerts:
-        try:
-            alert_time = datetime.strptime(alert['alert_time'], "%Y-%m-%d %H:%M:%S")
-            if alert_time >= start_time:
-                filtered_alerts.append(alert)
-        except:
-            continue
+    def metrics(self):
+        total = len(self)
+        status_counts = self.status_counts()
+        summary = self.response_summary_by_risk()
+        
+        responded = sum(item['responded_count'] for item in summary.values())
+        latency_count = sum(item['count'] for item in summary.values())
+        latency_sum = sum(item['mean'] * item['count'] for item in summary.values() if item['count'])
+        
+        return {
+            'total_alerts': total,
+            'pending_alerts': status_counts['pending'],
+            'processing_alerts': status_counts['processing'],
+            'resolved_alerts': status_counts['resolved'],
+            'high_risk_alerts': self.risk_counts()['high'],
+            'avg_response_time': round(latency_sum / latency_count, 2) if latency_count else 0,
+            'response_rate': round(responded / total * 100, 1) if total else 0
+        }
+
+def get_time_range_data(alerts, time_range):
+    if get_time_range_start(time_range) is None:
+        return alerts
     
-    return filtered_alerts
+    return AlertAnalytics.from_data(alerts).filter_time_range(time_range).to_records()
 
 def create_alert_time_distribution_chart(alerts):
     if not alerts:
         return None
     
-    hourly_counts = {i: 0 for i in range(24)}
-    
-    for alert in alerts:
-        try:
-            alert_time = datetime.strptime(alert['alert_time'], "%Y-%m-%d %H:%M:%S")
-            hour = alert_time.hour
-            hourly_counts[hour] += 1
-        except:
-            continue
-    
-    hours = list(hourly_counts.keys())
-    counts = list(hourly_counts.values())
+    hours = list(range(24))
+    counts = AlertAnalytics.from_data(alerts).hourly_counts().tolist()
     
     fig = go.Figure()
     fig.add_trace(go.Scatter(
@@ -84,12 +309,7 @@ def create_risk_level_pie_chart(alerts):
     if not alerts:
         return None
     
-    risk_counts = {'low': 0, 'medium': 0, 'high': 0}
-    
-    for alert in alerts:
-        risk_level = alert.get('risk_level', 'low').lower()
-        if risk_level in risk_counts:
-            risk_counts[risk_level] += 1
+    risk_counts = AlertAnalytics.from_data(alerts).risk_counts()
     
     labels = ['低风险', '中风险', '高风险']
     values = [risk_counts['low'], risk_counts['medium'], risk_counts['high']]
@@ -113,44 +333,11 @@ def create_risk_level_pie_chart(alerts):
     
     return fig
 
-def create_response_time_boxplot(alerts, response_logs):
-    if not alerts or not response_logs:
+def create_response_time_boxplot(alerts, response_logs=None, first_responses=None):
+    if not alerts:
         return None
     
-    alert_response_times = {}
-    
-    for log in response_logs:
-        alert_id = log.get('alert_id')
-        action_time_str = log.get('action_time')
-        
-        if alert_id and action_time_str:
-            try:
-                action_time = datetime.strptime(action_time_str, "%Y-%m-%d %H:%M:%S")
-                
-                if alert_id not in alert_response_times:
-                    alert_response_times[alert_id] = []
-                
-                alert_response_times[alert_id].append(action_time)
-            except:
-                continue
-    
-    response_times_by_risk = {'low': [], 'medium': [], 'high': []}
-    
-    for alert in alerts:
-        alert_id = alert.get('id')
-        alert_time_str = alert.get('alert_time')
-        risk_level = alert.get('risk_level', 'low').lower()
-        
-        if alert_id in alert_response_times and alert_time_str:
-            try:
-                alert_time = datetime.strptime(alert_time_str, "%Y-%m-%d %H:%M:%S")
-                first_response_time = min(alert_response_times[alert_id])
-                response_minutes = (first_response_time - alert_time).total_seconds() / 60
-                
-                if risk_level in response_times_by_risk:
-                    response_times_by_risk[risk_level].append(response_minutes)
-            except:
-                continue
+    response_times_by_risk = AlertAnalytics.from_data(alerts, response_logs, first_responses).response_times_by_risk()
     
     fig = go.Figure()
     
@@ -158,7 +345,7 @@ def create_response_time_boxplot(alerts, response_logs):
     risk_colors = {'low': '#66BB6A', 'medium': '#FFA726', 'high': '#EF5350'}
     
     for risk_level, times in response_times_by_risk.items():
-        if times:
+        if len(times):
             fig.add_trace(go.Box(
                 y=times,
                 name=risk_labels[risk_level],
@@ -179,85 +366,69 @@ def create_response_time_boxplot(alerts, response_logs):
     
     return None
 
-def calculate_metrics(alerts, response_logs):
-    metrics = {
-        'total_alerts': len(alerts),
-        'pending_alerts': 0,
-        'processing_alerts': 0,
-        'resolved_alerts': 0,
-        'high_risk_alerts': 0,
-        'avg_response_time': 0,
-        'response_rate': 0
-    }
+def create_response_time_summary_chart(analytics):
+    if not analytics:
+        return None
     
-    if not alerts:
-        return metrics
+    summary = analytics.response_summary_by_risk()
     
-    for alert in alerts:
-        status = alert.get('status', 'pending')
-        risk_level = alert.get('risk_level', 'low').lower()
-        
-        if status == 'pending':
-            metrics['pending_alerts'] += 1
-        elif status == 'processing':
-            metrics['processing_alerts'] += 1
-        elif status == 'resolved':
-            metrics['resolved_alerts'] += 1
-        
-        if risk_level == 'high':
-            metrics['high_risk_alerts'] += 1
+    risk_labels = {'low': '低风险', 'medium': '中风险', 'high': '高风险'}
+    risk_colors = {'low': '#66BB6A', 'medium': '#FFA726', 'high': '#EF5350'}
     
-    if alerts and response_logs:
-        alert_response_times = {}
-        
-        for log in response_logs:
-            alert_id = log.get('alert_id')
-            action_time_str = log.get('action_time')
-            
-            if alert_id and action_time_str:
-                try:
-                    action_time = datetime.strptime(action_time_str, "%Y-%m-%d %H:%M:%S")
-                    
-                    if alert_id not in alert_response_times:
-                        alert_response_times[alert_id] = []
-                    
-                    alert_response_times[alert_id].append(action_time)
-                except:
-                    continue
-        
-        response_times = []
-        
-        for alert in alerts:
-            alert_id = alert.get('id')
-            alert_time_str = alert.get('alert_time')
-            
-            if alert_id in alert_response_times and alert_time_str:
-                try:
-                    alert_time = datetime.strptime(alert_time_str, "%Y-%m-%d %H:%M:%S")
-                    first_response_time = min(alert_response_times[alert_id])
-                    response_minutes = (first_response_time - alert_time).total_seconds() / 60
-                    response_times.append(response_minutes)
-                except:
-                    continue
-        
-        if response_times:
-            metrics['avg_response_time'] = round(sum(response_times) / len(response_times), 2)
-        
-        metrics['response_rate'] = round(len(alert_response_times) / len(alerts) * 100, 1)
+    fig = go.Figure()
+    
+    for risk_level, item in summary.items():
+        if item['count']:
+            fig.add_trace(go.Bar(
+                x=[risk_labels[risk_level]],
+                y=[item['mean']],
+                name=risk_labels[risk_level],
+                marker_color=risk_colors[risk_level],
+                error_y=dict(
+                    type='data',
+                    symmetric=False,
+                    array=[item['max'] - item['mean']],
+                    arrayminus=[item['mean'] - item['min']]
+                )
+            ))
+    
+    if fig.data:
+        fig.update_layout(
+            title='响应时间（分钟，平均值及最小/最大范围）',
+            yaxis_title='响应时间（分钟）',
+            template='plotly_white',
+            height=400,
+            margin=dict(l=50, r=50, t=50, b=50),
+            showlegend=True
+        )
+        return fig
     
-    return metrics
+    return None
+
+def calculate_metrics(alerts, response_logs=None, first_responses=None):
+    return AlertAnalytics.from_data(alerts, response_logs, first_responses).metrics()
 
 def export_to_csv(data, filename):
-    df = pd.DataFrame(data)
-    csv = df.to_csv(index=False, encoding='utf-8-sig')
-    st.download_button(
-        label="📥 导出CSV",
-        data=csv,
-        file_name=filename,
-        mime="text/csv"
-    )
+    if 'dashboard_exports' not in st.session_state:
+        st.session_state.dashboard_exports = {}
+    
+    exports = st.session_state.dashboard_exports
+    remove_export_file(exports.pop(filename, None))
+    
+    path = write_export(frame_chunks(pd.DataFrame(data)), 'csv', prefix='dashboard')
+    if path is None:
+        return
+    exports[filename] = path
+    
+    with open(path, 'rb') as export_file:
+        st.download_button(
+            label="📥 导出CSV",
+            data=export_file,
+            file_name=filename,
+            mime="text/csv"
+        )
 
-def show_dashboard_analytics(alerts, response_logs):
+def show_dashboard_analytics(alerts=None, response_logs=None, first_responses=None):
     st.subheader("📈 应急响应数据看板")
     
     col1, col2, col3 = st.columns(3)
@@ -286,9 +457,14 @@ def show_dashboard_analytics(alerts, response_logs):
         st.session_state.rerun = True
         rerun()
     
-    filtered_alerts = get_time_range_data(alerts, time_range)
+    if alerts is not None:
+        summary = AlertAnalytics(alerts, response_logs, first_responses).filter_time_range(time_range)
+    else:
+        summary = RollupAnalytics.load(time_range)
+        if summary is None:
+            summary = AlertAnalytics.load(time_range)
     
-    metrics = calculate_metrics(filtered_alerts, response_logs)
+    metrics = summary.metrics()
     
     st.markdown("---")
     
@@ -336,20 +512,21 @@ def show_dashboard_analytics(alerts, response_logs):
     with tab1:
         st.markdown("### 24小时内警报数量时间分布")
         
-        time_chart = create_alert_time_distribution_chart(filtered_alerts)
+        time_chart = create_alert_time_distribution_chart(summary)
         
         if time_chart:
             st.plotly_chart(time_chart, use_container_width=True)
             
-            if show_export and filtered_alerts:
-                export_to_csv(filtered_alerts, f"alert_time_distribution_{time_range}.csv")
+            if show_export:
+                hourly_counts = pd.DataFrame({'hour': range(24), 'alert_count': summary.hourly_counts()})
+                export_to_csv(hourly_counts, f"alert_time_distribution_{time_range}.csv")
         else:
             st.info("暂无数据")
     
     with tab2:
         st.markdown("### 风险等级分布")
         
-        risk_chart = create_risk_level_pie_chart(filtered_alerts)
+        risk_chart = create_risk_level_pie_chart(summary)
         
         if risk_chart:
             col1, col2 = st.columns([3, 1])
@@ -360,43 +537,45 @@ def show_dashboard_analytics(alerts, response_logs):
             with col2:
                 st.markdown("#### 统计摘要")
                 
-                risk_counts = {'low': 0, 'medium': 0, 'high': 0}
-                
-                for alert in filtered_alerts:
-                    risk_level = alert.get('risk_level', 'low').lower()
-                    if risk_level in risk_counts:
-                        risk_counts[risk_level] += 1
+                risk_counts = summary.risk_counts()
                 
                 st.metric("低风险", risk_counts['low'])
                 st.metric("中风险", risk_counts['medium'])
                 st.metric("高风险", risk_counts['high'])
             
-            if show_export and filtered_alerts:
-                export_to_csv(filtered_alerts, f"risk_level_distribution_{time_range}.csv")
+            if show_export:
+                risk_level_counts = pd.DataFrame(list(risk_counts.items()), columns=['risk_level', 'alert_count'])
+                export_to_csv(risk_level_counts, f"risk_level_distribution_{time_range}.csv")
         else:
             st.info("暂无数据")
     
     with tab3:
         st.markdown("### 响应时间分布")
         
-        response_chart = create_response_time_boxplot(filtered_alerts, response_logs)
+        if isinstance(summary, RollupAnalytics):
+            response_chart = create_response_time_summary_chart(summary)
+        else:
+            response_chart = create_response_time_boxplot(summary)
         
         if response_chart:
             st.plotly_chart(response_chart, use_container_width=True)
             
-            if show_export and filtered_alerts:
-                export_to_csv(filtered_alerts, f"response_time_{time_range}.csv")
+            if show_export:
+                response_summary = pd.DataFrame.from_dict(summary.response_summary_by_risk(), orient='index')
+                export_to_csv(response_summary.rename_axis('risk_level').reset_index(), f"response_time_{time_range}.csv")
         else:
             st.info("暂无数据")
     
     st.markdown("---")
     
     with st.expander("📋 详细数据"):
-        if filtered_alerts:
-            df = pd.DataFrame(filtered_alerts)
+        if summary:
+            df = summary.detail_frame()
+            if len(df) < len(summary):
+                st.caption(f"显示最近 {len(df)} 条，共 {len(summary)} 条；完整数据请使用系统设置中的数据导出")
             st.dataframe(df, use_container_width=True)
             
             if show_export:
-                export_to_csv(filtered_alerts, f"alerts_detail_{time_range}.csv")
+                export_to_csv(df, f"alerts_detail_{time_range}.csv")
         else:
             st.info("暂无数据")
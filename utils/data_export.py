@@ -0,0 +1,290 @@
+import csv
+import gzip
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import count_export_rows, iter_export_chunks, get_export_column_types, EXPORT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), 'emergency_response_exports')
+EXPORT_FILE_TTL = 3600
+
+PARQUET_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+EXPORT_FORMATS = {
+    'csv.gz': {
+        'label': 'CSV (gzip)',
+        'extension': 'csv.gz',
+        'mime': 'application/gzip'
+    },
+    'csv': {
+        'label': 'CSV',
+        'extension': 'csv',
+        'mime': 'text/csv'
+    },
+    'ndjson': {
+        'label': 'NDJSON',
+        'extension': 'ndjson',
+        'mime': 'application/x-ndjson'
+    },
+    'parquet': {
+        'label': 'Parquet',
+        'extension': 'parquet',
+        'mime': 'application/vnd.apache.parquet'
+    }
+}
+
+if not PARQUET_AVAILABLE:
+    del EXPORT_FORMATS['parquet']
+
+class CSVWriter:
+    def __init__(self, path: str, column_types: Dict[str, str]):
+        self.file = self._open(path)
+        self.writer = csv.writer(self.file)
+        self.header_written = False
+    
+    def _open(self, path: str):
+        return open(path, 'w', encoding='utf-8-sig', newline='')
+    
+    def write_chunk(self, columns: List[str], rows: List[tuple]):
+        if not self.header_written:
+            self.writer.writerow(columns)
+            self.header_written = True
+        self.writer.writerows(rows)
+    
+    def close(self):
+        self.file.close()
+
+class CSVGzipWriter(CSVWriter):
+    def _open(self, path: str):
+        return gzip.open(path, 'wt', encoding='utf-8-sig', newline='')
+
+class NDJSONWriter:
+    def __init__(self, path: str, column_types: Dict[str, str]):
+        self.file = open(path, 'w', encoding='utf-8')
+    
+    def write_chunk(self, columns: List[str], rows: List[tuple]):
+        self.file.writelines(
+            json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str) + '\n'
+            for row in rows
+        )
+    
+    def close(self):
+        self.file.close()
+
+class ParquetWriter:
+    def __init__(self, path: str, column_types: Dict[str, str]):
+        import pyarrow
+        import pyarrow.parquet
+        
+        self.pyarrow = pyarrow
+        self.path = path
+        self.column_types = column_types
+        self.writer = None
+        self.schema = None
+        self.parquet = pyarrow.parquet
+    
+    def _arrow_type(self, declared_type: str):
+        if 'INT' in declared_type:
+            return self.pyarrow.int64()
+        if 'REAL' in declared_type or 'FLOA' in declared_type or 'DOUB' in declared_type:
+            return self.pyarrow.float64()
+        return self.pyarrow.string()
+    
+    def _open(self, columns: List[str]):
+        self.schema = self.pyarrow.schema([
+            (column, self._arrow_type(self.column_types.get(column, ''))) for column in columns
+        ])
+        self.writer = self.parquet.ParquetWriter(self.path, self.schema, compression='snappy')
+    
+    def write_chunk(self, columns: List[str], rows: List[tuple]):
+        if self.writer is None:
+            self._open(columns)
+        
+        arrays = []
+        for index, field in enumerate(self.schema):
+            values = [row[index] for row in rows]
+            if self.pyarrow.types.is_string(field.type):
+                values = [None if value is None else str(value) for value in values]
+            arrays.append(self.pyarrow.array(values, type=field.type))
+        
+        self.writer.write_table(self.pyarrow.Table.from_arrays(arrays, schema=self.schema))
+    
+    def close(self):
+        if self.writer is None:
+            self._open(list(self.column_types))
+        self.writer.close()
+
+FORMAT_WRITERS = {
+    'csv.gz': CSVGzipWriter,
+    'csv': CSVWriter,
+    'ndjson': NDJSONWriter,
+    'parquet': ParquetWriter
+}
+
+if not PARQUET_AVAILABLE:
+    del FORMAT_WRITERS['parquet']
+
+def remove_export_file(path: Optional[str]):
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def sweep_exports(max_age: float = EXPORT_FILE_TTL) -> int:
+    if not os.path.isdir(EXPORT_DIR):
+        return 0
+    
+    cutoff = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+def frame_chunks(frame, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterable[Tuple[List[str], List[tuple]]]:
+    columns = [str(column) for column in frame.columns]
+    for start in range(0, len(frame), chunk_size):
+        yield columns, list(frame.iloc[start:start + chunk_size].itertuples(index=False, name=None))
+
+def write_export(chunks: Iterable[Tuple[List[str], List[tuple]]], export_format: str, column_types: Dict[str, str] = None,
+                 path: str = None, prefix: str = 'export', total_rows: int = 0,
+                 progress_callback: Optional[Callable[[int, int], None]] = None) -> Optional[str]:
+    if export_format not in FORMAT_WRITERS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    
+    created = path is None
+    if created:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        sweep_exports()
+        fd, path = tempfile.mkstemp(prefix=f'{prefix}_', suffix=f".{EXPORT_FORMATS[export_format]['extension']}", dir=EXPORT_DIR)
+        os.close(fd)
+    
+    rows_written = 0
+    
+    try:
+        writer = FORMAT_WRITERS[export_format](path, column_types or {})
+        try:
+            for columns, rows in chunks:
+                writer.write_chunk(columns, rows)
+                rows_written += len(rows)
+                
+                if progress_callback:
+                    progress_callback(rows_written, max(total_rows, rows_written))
+        finally:
+            writer.close()
+    except BaseException:
+        if created and os.path.exists(path):
+            os.remove(path)
+        raise
+    
+    if created and rows_written == 0:
+        os.remove(path)
+        path = None
+    
+    if progress_callback:
+        progress_callback(rows_written, rows_written)
+    
+    return path
+
+def stream_export(source: str, export_format: str, path: str = None, chunk_size: int = EXPORT_CHUNK_SIZE,
+                  progress_callback: Optional[Callable[[int, int], None]] = None) -> Optional[str]:
+    return write_export(
+        iter_export_chunks(source, chunk_size), export_format, get_export_column_types(source),
+        path=path, prefix=source, total_rows=count_export_rows(source), progress_callback=progress_callback
+    )
+
+class ExportJob:
+    def __init__(self, source: str, export_format: str, chunk_size: int = EXPORT_CHUNK_SIZE):
+        self.source = source
+        self.export_format = export_format
+        self.chunk_size = chunk_size
+        self.path = None
+        self.rows_written = 0
+        self.total_rows = 0
+        self.status = "pending"
+        self.error_message = None
+        self.started_at = None
+        self.finished_at = None
+        self.worker_thread = None
+        self.finalizer = None
+    
+    @property
+    def is_running(self) -> bool:
+        return self.status in ("pending", "running")
+    
+    @property
+    def progress(self) -> float:
+        if self.status == "completed":
+            return 1.0
+        if not self.total_rows:
+            return 0.0
+        return min(self.rows_written / self.total_rows, 1.0)
+    
+    @property
+    def file_name(self) -> str:
+        timestamp = (self.started_at or datetime.now()).strftime("%Y%m%d_%H%M%S")
+        return f"{self.source}_export_{timestamp}.{EXPORT_FORMATS[self.export_format]['extension']}"
+    
+    @property
+    def mime(self) -> str:
+        return EXPORT_FORMATS[self.export_format]['mime']
+    
+    def _update_progress(self, rows_written: int, total_rows: int):
+        self.rows_written = rows_written
+        self.total_rows = total_rows
+    
+    def _run(self):
+        self.status = "running"
+        start = time.monotonic()
+        
+        try:
+            self.path = stream_export(self.source, self.export_format, chunk_size=self.chunk_size,
+                                      progress_callback=self._update_progress)
+            self.finalizer = weakref.finalize(self, remove_export_file, self.path)
+            self.status = "completed"
+            logger.info(f"Export completed: source={self.source}, format={self.export_format}, "
+                        f"rows={self.rows_written}, seconds={time.monotonic() - start:.2f}")
+        except Exception as e:
+            self.status = "failed"
+            self.error_message = str(e)
+            logger.error(f"Export failed: source={self.source}, format={self.export_format}, error={e}")
+        finally:
+            self.finished_at = datetime.now()
+    
+    def start(self):
+        if self.worker_thread is not None:
+            return self
+        
+        self.started_at = datetime.now()
+        self.worker_thread = threading.Thread(target=self._run, daemon=True)
+        self.worker_thread.start()
+        return self
+    
+    def wait(self, timeout: float = None) -> bool:
+        if self.worker_thread is not None:
+            self.worker_thread.join(timeout)
+        return not self.is_running
+    
+    def cleanup(self):
+        if self.finalizer is not None:
+            self.finalizer()
+        remove_export_file(self.path)
+        self.path = None
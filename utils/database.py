@@ -1,123 +1,1413 @@
 import sqlite3
 import os
+import re
+import sys
+import json
+import base64
+import threading
+import time
 import streamlit as st
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Iterator, Iterable, Sequence, Callable, Set
+from itertools import islice
 
 DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'emergency_response.db')
 
-def init_database():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            phone TEXT NOT NULL,
-            address TEXT,
-            emergency_contact TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+POOL_MAX_SIZE = 8
+POOL_TIMEOUT = 10.0
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256
+
+CONNECTION_PRAGMAS = [
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -16000),
+    ('mmap_size', 268435456),
+    ('busy_timeout', BUSY_TIMEOUT_MS),
+    ('temp_store', 'MEMORY'),
+]
+
+SCHEMA_MIGRATIONS = [
+    (1, [
+        'CREATE INDEX IF NOT EXISTS idx_alerts_alert_time ON alerts (alert_time)',
+        'CREATE INDEX IF NOT EXISTS idx_alerts_status_time ON alerts (status, alert_time)',
+        'CREATE INDEX IF NOT EXISTS idx_alerts_risk_level ON alerts (risk_level)',
+        'CREATE INDEX IF NOT EXISTS idx_response_logs_alert_time ON response_logs (alert_id, action_time)',
+        'CREATE INDEX IF NOT EXISTS idx_users_created_at ON users (created_at)',
+    ]),
+    (2, [
+        'CREATE INDEX IF NOT EXISTS idx_alerts_status_risk_level ON alerts (status, risk_level)',
+    ]),
+    (3, [
+        'CREATE INDEX IF NOT EXISTS idx_alerts_user_time ON alerts (user_id, alert_time)',
+    ]),
+    (4, [
+        'CREATE INDEX IF NOT EXISTS idx_outbox_claim ON notification_outbox (state, channel, priority, next_attempt_at)',
+    ]),
+    (5, [
+        'CREATE INDEX IF NOT EXISTS idx_outbox_recipient ON notification_outbox (state, channel, recipient, next_attempt_at)',
+    ]),
+    (6, [
+        'ALTER TABLE notification_outbox ADD COLUMN claimed_by TEXT',
+    ]),
+]
+
+OUTBOX_LEASE_SECONDS = 30
+OUTBOX_LEASE_RENEW_INTERVAL = 10
+OUTBOX_RETENTION_DAYS = 7
+
+ALERT_COUNTERS_ENABLED = True
+
+ALERT_COUNTER_TRIGGERS = {
+    'trg_alert_counters_users_insert': '''
+        CREATE TRIGGER IF NOT EXISTS trg_alert_counters_users_insert AFTER INSERT ON users
+        BEGIN
+            INSERT INTO alert_counters (name, value) VALUES ('total_users', 1)
+            ON CONFLICT (name) DO UPDATE SET value = value + excluded.value;
+        END
+    ''',
+    'trg_alert_counters_users_delete': '''
+        CREATE TRIGGER IF NOT EXISTS trg_alert_counters_users_delete AFTER DELETE ON users
+        BEGIN
+            INSERT INTO alert_counters (name, value) VALUES ('total_users', -1)
+            ON CONFLICT (name) DO UPDATE SET value = value + excluded.value;
+        END
+    ''',
+    'trg_alert_counters_alerts_insert': '''
+        CREATE TRIGGER IF NOT EXISTS trg_alert_counters_alerts_insert AFTER INSERT ON alerts
+        BEGIN
+            INSERT INTO alert_counters (name, value) VALUES
+                ('total_alerts', 1),
+                ('status:' || COALESCE(NEW.status, ''), 1),
+                ('risk_level:' || COALESCE(NEW.risk_level, ''), 1)
+            ON CONFLICT (name) DO UPDATE SET value = value + excluded.value;
+        END
+    ''',
+    'trg_alert_counters_alerts_update': '''
+        CREATE TRIGGER IF NOT EXISTS trg_alert_counters_alerts_update AFTER UPDATE OF status, risk_level ON alerts
+        WHEN OLD.status IS NOT NEW.status OR OLD.risk_level IS NOT NEW.risk_level
+        BEGIN
+            INSERT INTO alert_counters (name, value) VALUES
+                ('status:' || COALESCE(OLD.status, ''), -1),
+                ('status:' || COALESCE(NEW.status, ''), 1),
+                ('risk_level:' || COALESCE(OLD.risk_level, ''), -1),
+                ('risk_level:' || COALESCE(NEW.risk_level, ''), 1)
+            ON CONFLICT (name) DO UPDATE SET value = value + excluded.value;
+        END
+    ''',
+    'trg_alert_counters_alerts_delete': '''
+        CREATE TRIGGER IF NOT EXISTS trg_alert_counters_alerts_delete AFTER DELETE ON alerts
+        BEGIN
+            INSERT INTO alert_counters (name, value) VALUES
+                ('total_alerts', -1),
+                ('status:' || COALESCE(OLD.status, ''), -1),
+                ('risk_level:' || COALESCE(OLD.risk_level, ''), -1)
+            ON CONFLICT (name) DO UPDATE SET value = value + excluded.value;
+        END
+    ''',
+}
+
+ROLLUPS_ENABLED = True
+
+ROLLUP_GRANULARITIES = {
+    'hour': "COALESCE(strftime('%Y-%m-%d %H:00:00', {time}), '')",
+    'day': "COALESCE(strftime('%Y-%m-%d', {time}), '')",
+}
+
+ROLLUP_BUCKET_ENDS = {
+    'hour': "datetime({bucket}, '+1 hour')",
+    'day': "date({bucket}, '+1 day')",
+}
+
+ROLLUP_TABLES = {
+    'alert_rollups': '''
+        CREATE TABLE IF NOT EXISTS alert_rollups (
+            granularity TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            risk_level TEXT NOT NULL,
+            status TEXT NOT NULL,
+            alert_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (granularity, bucket, risk_level, status)
+        ) WITHOUT ROWID
+    ''',
+    'response_rollups': '''
+        CREATE TABLE IF NOT EXISTS response_rollups (
+            granularity TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            risk_level TEXT NOT NULL,
+            responded_count INTEGER NOT NULL DEFAULT 0,
+            latency_count INTEGER NOT NULL DEFAULT 0,
+            latency_sum REAL NOT NULL DEFAULT 0,
+            latency_min REAL,
+            latency_max REAL,
+            PRIMARY KEY (granularity, bucket, risk_level)
+        ) WITHOUT ROWID
+    ''',
+}
+
+def _rollup_bucket(granularity: str, time_expr: str) -> str:
+    return ROLLUP_GRANULARITIES[granularity].format(time=time_expr)
+
+def _alert_rollup_upsert(alias: str, delta: int) -> str:
+    values = ',\n'.join(
+        f"('{granularity}', {_rollup_bucket(granularity, f'{alias}.alert_time')}, "
+        f"COALESCE({alias}.risk_level, ''), COALESCE({alias}.status, ''), {delta})"
+        for granularity in ROLLUP_GRANULARITIES
+    )
+    return f'''
+            INSERT INTO alert_rollups (granularity, bucket, risk_level, status, alert_count) VALUES
+            {values}
+            ON CONFLICT (granularity, bucket, risk_level, status) DO UPDATE SET alert_count = alert_count + excluded.alert_count;
+    '''
+
+def _response_rollup_upsert(granularity: str) -> str:
+    return f'''
+            INSERT INTO response_rollups (granularity, bucket, risk_level, responded_count, latency_count, latency_sum, latency_min, latency_max)
+            SELECT '{granularity}', {_rollup_bucket(granularity, 'alert_time')}, COALESCE(risk_level, ''),
+                   1, latency IS NOT NULL, COALESCE(latency, 0), latency, latency
+            FROM (
+                SELECT alert_time, risk_level, (julianday(NEW.action_time) - julianday(alert_time)) * 1440 AS latency
+                FROM alerts WHERE id = NEW.alert_id
+            ) WHERE 1
+            ON CONFLICT (granularity, bucket, risk_level) DO UPDATE SET
+                responded_count = responded_count + excluded.responded_count,
+                latency_count = latency_count + excluded.latency_count,
+                latency_sum = latency_sum + excluded.latency_sum,
+                latency_min = COALESCE(MIN(latency_min, excluded.latency_min), latency_min, excluded.latency_min),
+                latency_max = COALESCE(MAX(latency_max, excluded.latency_max), latency_max, excluded.latency_max);
+    '''
+
+def _response_rollup_refresh(granularity: str, time_expr: str, risk_expr: str) -> List[str]:
+    bucket = _rollup_bucket(granularity, time_expr)
+    bucket_end = ROLLUP_BUCKET_ENDS[granularity].format(bucket=bucket)
+    risk_level = f"COALESCE({risk_expr}, '')"
+    window = {
+        'ranged': f"{bucket} <> '' AND a.alert_time >= {bucket} AND a.alert_time < {bucket_end}",
+        'unparsed': f"{bucket} = '' AND {_rollup_bucket(granularity, 'a.alert_time')} = ''",
+    }
+    return [
+        f'''
+            DELETE FROM response_rollups
+            WHERE granularity = '{granularity}' AND bucket = {bucket} AND risk_level = {risk_level}
+        '''
+    ] + [
+        f'''
+            INSERT INTO response_rollups (granularity, bucket, risk_level, responded_count, latency_count, latency_sum, latency_min, latency_max)
+            SELECT '{granularity}', bucket, risk_level, COUNT(*), COUNT(latency), COALESCE(SUM(latency), 0), MIN(latency), MAX(latency)
+            FROM (
+                SELECT {_rollup_bucket(granularity, 'a.alert_time')} AS bucket, COALESCE(a.risk_level, '') AS risk_level,
+                       (julianday((SELECT MIN(l.action_time) FROM response_logs l WHERE l.alert_id = a.id)) - julianday(a.alert_time)) * 1440 AS latency
+                FROM alerts a
+                WHERE {condition}
+                  AND EXISTS (SELECT 1 FROM response_logs l WHERE l.alert_id = a.id)
+            )
+            WHERE bucket = {bucket} AND risk_level = {risk_level}
+            GROUP BY bucket, risk_level
+        '''
+        for condition in window.values()
+    ]
+
+def _response_rollup_refresh_trigger(time_expr: str, risk_expr: str) -> str:
+    return ''.join(
+        f'{statement.rstrip()};\n'
+        for granularity in ROLLUP_GRANULARITIES
+        for statement in _response_rollup_refresh(granularity, time_expr, risk_expr)
+    )
+
+def _alert_column(column: str, alert_id_expr: str) -> str:
+    return f'(SELECT {column} FROM alerts WHERE id = {alert_id_expr})'
+
+ROLLUP_TRIGGERS = {
+    'trg_rollups_alerts_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollups_alerts_insert AFTER INSERT ON alerts
+        BEGIN
+            {_alert_rollup_upsert('NEW', 1)}
+        END
+    ''',
+    'trg_rollups_alerts_update': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollups_alerts_update AFTER UPDATE OF alert_time, status, risk_level ON alerts
+        WHEN OLD.alert_time IS NOT NEW.alert_time OR OLD.status IS NOT NEW.status OR OLD.risk_level IS NOT NEW.risk_level
+        BEGIN
+            {_alert_rollup_upsert('OLD', -1)}
+            {_alert_rollup_upsert('NEW', 1)}
+        END
+    ''',
+    'trg_rollups_alerts_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollups_alerts_delete AFTER DELETE ON alerts
+        BEGIN
+            {_alert_rollup_upsert('OLD', -1)}
+        END
+    ''',
+    'trg_rollups_alerts_response_update': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollups_alerts_response_update AFTER UPDATE OF alert_time, risk_level ON alerts
+        WHEN (OLD.alert_time IS NOT NEW.alert_time OR OLD.risk_level IS NOT NEW.risk_level)
+             AND EXISTS (SELECT 1 FROM response_logs WHERE alert_id = NEW.id)
+        BEGIN
+            {_response_rollup_refresh_trigger('OLD.alert_time', 'OLD.risk_level')}
+            {_response_rollup_refresh_trigger('NEW.alert_time', 'NEW.risk_level')}
+        END
+    ''',
+    'trg_rollups_alerts_response_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollups_alerts_response_delete AFTER DELETE ON alerts
+        WHEN EXISTS (
+            SELECT 1 FROM response_rollups
+            WHERE granularity = 'hour' AND bucket = {_rollup_bucket('hour', 'OLD.alert_time')} AND risk_level = COALESCE(OLD.risk_level, '')
         )
-    ''')
+        BEGIN
+            {_response_rollup_refresh_trigger('OLD.alert_time', 'OLD.risk_level')}
+        END
+    ''',
+    'trg_rollups_response_logs_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollups_response_logs_insert AFTER INSERT ON response_logs
+        WHEN NOT EXISTS (SELECT 1 FROM response_logs WHERE alert_id = NEW.alert_id AND id <> NEW.id)
+        BEGIN
+            {''.join(_response_rollup_upsert(granularity) for granularity in ROLLUP_GRANULARITIES)}
+        END
+    ''',
+    'trg_rollups_response_logs_insert_earlier': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollups_response_logs_insert_earlier AFTER INSERT ON response_logs
+        WHEN EXISTS (SELECT 1 FROM response_logs WHERE alert_id = NEW.alert_id AND id <> NEW.id)
+             AND NOT EXISTS (SELECT 1 FROM response_logs WHERE alert_id = NEW.alert_id AND id <> NEW.id AND action_time <= NEW.action_time)
+             AND EXISTS (SELECT 1 FROM alerts WHERE id = NEW.alert_id)
+        BEGIN
+            {_response_rollup_refresh_trigger(_alert_column('alert_time', 'NEW.alert_id'), _alert_column('risk_level', 'NEW.alert_id'))}
+        END
+    ''',
+    'trg_rollups_response_logs_update': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollups_response_logs_update AFTER UPDATE OF alert_id, action_time ON response_logs
+        WHEN OLD.alert_id IS NOT NEW.alert_id OR OLD.action_time IS NOT NEW.action_time
+        BEGIN
+            {_response_rollup_refresh_trigger(_alert_column('alert_time', 'OLD.alert_id'), _alert_column('risk_level', 'OLD.alert_id'))}
+            {_response_rollup_refresh_trigger(_alert_column('alert_time', 'NEW.alert_id'), _alert_column('risk_level', 'NEW.alert_id'))}
+        END
+    ''',
+    'trg_rollups_response_logs_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_rollups_response_logs_delete AFTER DELETE ON response_logs
+        WHEN EXISTS (SELECT 1 FROM alerts WHERE id = OLD.alert_id)
+             AND NOT EXISTS (SELECT 1 FROM response_logs WHERE alert_id = OLD.alert_id AND action_time < OLD.action_time)
+        BEGIN
+            {_response_rollup_refresh_trigger(_alert_column('alert_time', 'OLD.alert_id'), _alert_column('risk_level', 'OLD.alert_id'))}
+        END
+    ''',
+}
+
+ROLLUP_REBUILD_QUERIES = {
+    'alert_rollups': '''
+        INSERT INTO alert_rollups (granularity, bucket, risk_level, status, alert_count)
+        SELECT ?, {bucket}, COALESCE(risk_level, ''), COALESCE(status, ''), COUNT(*)
+        FROM alerts
+        GROUP BY 2, 3, 4
+    ''',
+    'response_rollups': '''
+        INSERT INTO response_rollups (granularity, bucket, risk_level, responded_count, latency_count, latency_sum, latency_min, latency_max)
+        SELECT ?, {bucket}, COALESCE(risk_level, ''), COUNT(*), COUNT(latency), COALESCE(SUM(latency), 0), MIN(latency), MAX(latency)
+        FROM (
+            SELECT a.alert_time, a.risk_level, (julianday(MIN(l.action_time)) - julianday(a.alert_time)) * 1440 AS latency
+            FROM alerts a
+            JOIN response_logs l ON l.alert_id = a.id
+            GROUP BY a.id
+        )
+        GROUP BY 2, 3
+    ''',
+}
+
+DENSITY_ENABLED = True
+
+DENSITY_CELL_DEGREES = 0.005
+
+def _density_key(alias: str) -> str:
+    return (
+        f"COALESCE(strftime('%Y-%m-%d', {alias}alert_time), ''), "
+        f"CAST(({alias}location_lat + 90) / {DENSITY_CELL_DEGREES} AS INTEGER), "
+        f"CAST(({alias}location_lng + 180) / {DENSITY_CELL_DEGREES} AS INTEGER)"
+    )
+
+def _density_upsert(alias: str, delta: int) -> str:
+    return f'''
+            INSERT INTO alert_density (day, cell_row, cell_col, alert_count)
+            SELECT {_density_key(f'{alias}.')}, {delta}
+            WHERE {alias}.location_lat IS NOT NULL AND {alias}.location_lng IS NOT NULL
+            ON CONFLICT (day, cell_row, cell_col) DO UPDATE SET alert_count = alert_count + excluded.alert_count;
+    '''
+
+DENSITY_TABLE = '''
+    CREATE TABLE IF NOT EXISTS alert_density (
+        day TEXT NOT NULL,
+        cell_row INTEGER NOT NULL,
+        cell_col INTEGER NOT NULL,
+        alert_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, cell_row, cell_col)
+    ) WITHOUT ROWID
+'''
+
+DENSITY_TRIGGERS = {
+    'trg_density_alerts_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_density_alerts_insert AFTER INSERT ON alerts
+        BEGIN
+            {_density_upsert('NEW', 1)}
+        END
+    ''',
+    'trg_density_alerts_update': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_density_alerts_update AFTER UPDATE OF alert_time, location_lat, location_lng ON alerts
+        WHEN OLD.alert_time IS NOT NEW.alert_time OR OLD.location_lat IS NOT NEW.location_lat OR OLD.location_lng IS NOT NEW.location_lng
+        BEGIN
+            {_density_upsert('OLD', -1)}
+            {_density_upsert('NEW', 1)}
+        END
+    ''',
+    'trg_density_alerts_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS trg_density_alerts_delete AFTER DELETE ON alerts
+        BEGIN
+            {_density_upsert('OLD', -1)}
+        END
+    ''',
+}
+
+DENSITY_REBUILD_QUERY = f'''
+    INSERT INTO alert_density (day, cell_row, cell_col, alert_count)
+    SELECT {_density_key('')}, COUNT(*)
+    FROM alerts
+    WHERE location_lat IS NOT NULL AND location_lng IS NOT NULL
+    GROUP BY 1, 2, 3
+'''
+
+SPATIAL_INDEX_ENABLED = True
+
+SPATIAL_INDEX_MAX_SPAN = 0.05
+
+SPATIAL_INDEX_TABLE = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS alert_geo_index USING rtree (
+        id,
+        min_lat, max_lat,
+        min_lng, max_lng
+    )
+'''
+
+SPATIAL_INDEX_TRIGGERS = {
+    'trg_geo_alerts_insert': '''
+        CREATE TRIGGER IF NOT EXISTS trg_geo_alerts_insert AFTER INSERT ON alerts
+        WHEN NEW.location_lat IS NOT NULL AND NEW.location_lng IS NOT NULL
+        BEGIN
+            INSERT INTO alert_geo_index (id, min_lat, max_lat, min_lng, max_lng)
+            VALUES (NEW.id, NEW.location_lat, NEW.location_lat, NEW.location_lng, NEW.location_lng);
+        END
+    ''',
+    'trg_geo_alerts_update': '''
+        CREATE TRIGGER IF NOT EXISTS trg_geo_alerts_update AFTER UPDATE OF location_lat, location_lng ON alerts
+        WHEN OLD.location_lat IS NOT NEW.location_lat OR OLD.location_lng IS NOT NEW.location_lng
+        BEGIN
+            DELETE FROM alert_geo_index WHERE id = OLD.id;
+            INSERT INTO alert_geo_index (id, min_lat, max_lat, min_lng, max_lng)
+            SELECT NEW.id, NEW.location_lat, NEW.location_lat, NEW.location_lng, NEW.location_lng
+            WHERE NEW.location_lat IS NOT NULL AND NEW.location_lng IS NOT NULL;
+        END
+    ''',
+    'trg_geo_alerts_delete': '''
+        CREATE TRIGGER IF NOT EXISTS trg_geo_alerts_delete AFTER DELETE ON alerts
+        BEGIN
+            DELETE FROM alert_geo_index WHERE id = OLD.id;
+        END
+    ''',
+}
+
+SPATIAL_INDEX_FILL_QUERY = '''
+    INSERT INTO alert_geo_index (id, min_lat, max_lat, min_lng, max_lng)
+    SELECT id, location_lat, location_lat, location_lng, location_lng
+    FROM alerts
+    WHERE id BETWEEN ? AND ? AND location_lat IS NOT NULL AND location_lng IS NOT NULL
+'''
+
+BULK_COUNTER_QUERIES = {
+    'users': "SELECT 'users', NULL, NULL, COUNT(*) FROM users WHERE id BETWEEN ? AND ?",
+    'alerts': '''
+        SELECT 'alerts', status, risk_level, COUNT(*) FROM alerts
+        WHERE id BETWEEN ? AND ?
+        GROUP BY status, risk_level
+    ''',
+}
+
+BULK_ROLLUP_QUERIES = {
+    'alerts': {
+        'stage': '''
+            CREATE TEMP TABLE bulk_alert_buckets AS
+            SELECT {bucket} AS bucket, COALESCE(risk_level, '') AS risk_level, COALESCE(status, '') AS status, COUNT(*) AS alert_count
+            FROM alerts
+            WHERE id BETWEEN ?1 AND ?2
+            GROUP BY 1, 2, 3
+        ''',
+        'apply': '''
+            INSERT INTO alert_rollups (granularity, bucket, risk_level, status, alert_count)
+            SELECT ?, {bucket}, risk_level, status, SUM(alert_count)
+            FROM temp.bulk_alert_buckets
+            WHERE 1
+            GROUP BY 2, 3, 4
+            ON CONFLICT (granularity, bucket, risk_level, status) DO UPDATE SET alert_count = alert_count + excluded.alert_count
+        ''',
+        'counters': "SELECT 'alerts', status, risk_level, SUM(alert_count) FROM temp.bulk_alert_buckets GROUP BY status, risk_level",
+        'cleanup': 'DROP TABLE temp.bulk_alert_buckets',
+    },
+    'response_logs': {
+        'stage': '''
+            CREATE TEMP TABLE bulk_response_buckets AS
+            SELECT {bucket} AS bucket, COALESCE(risk_level, '') AS risk_level, COUNT(*) AS responded_count,
+                   COUNT(latency) AS latency_count, COALESCE(SUM(latency), 0) AS latency_sum,
+                   MIN(latency) AS latency_min, MAX(latency) AS latency_max
+            FROM (
+                SELECT a.alert_time, a.risk_level, (julianday(MIN(l.action_time)) - julianday(a.alert_time)) * 1440 AS latency
+                FROM response_logs l
+                JOIN alerts a ON a.id = l.alert_id
+                WHERE l.id BETWEEN ?1 AND ?2
+                  AND NOT EXISTS (SELECT 1 FROM response_logs p WHERE p.alert_id = l.alert_id AND p.id < ?1)
+                GROUP BY a.id
+            )
+            GROUP BY 1, 2
+        ''',
+        'apply': '''
+            INSERT INTO response_rollups (granularity, bucket, risk_level, responded_count, latency_count, latency_sum, latency_min, latency_max)
+            SELECT ?, {bucket}, risk_level, SUM(responded_count), SUM(latency_count), SUM(latency_sum), MIN(latency_min), MAX(latency_max)
+            FROM temp.bulk_response_buckets
+            WHERE 1
+            GROUP BY 2, 3
+            ON CONFLICT (granularity, bucket, risk_level) DO UPDATE SET
+                responded_count = responded_count + excluded.responded_count,
+                latency_count = latency_count + excluded.latency_count,
+                latency_sum = latency_sum + excluded.latency_sum,
+                latency_min = COALESCE(MIN(latency_min, excluded.latency_min), latency_min, excluded.latency_min),
+                latency_max = COALESCE(MAX(latency_max, excluded.latency_max), latency_max, excluded.latency_max)
+        ''',
+        'cleanup': 'DROP TABLE temp.bulk_response_buckets',
+        'refresh': '''
+            SELECT DISTINCT a.alert_time, a.risk_level
+            FROM response_logs l
+            JOIN alerts a ON a.id = l.alert_id
+            WHERE l.id BETWEEN ?1 AND ?2
+              AND EXISTS (SELECT 1 FROM response_logs p WHERE p.alert_id = l.alert_id AND p.id < ?1)
+              AND NOT EXISTS (SELECT 1 FROM response_logs p WHERE p.alert_id = l.alert_id AND p.id < ?1 AND p.action_time <= l.action_time)
+        ''',
+    },
+}
+
+EXPORT_CHUNK_SIZE = 5000
+
+EXPORT_SOURCES = {
+    'users': {
+        'rows': 'SELECT * FROM users ORDER BY id',
+        'count': 'SELECT COUNT(*) FROM users'
+    },
+    'alerts': {
+        'rows': 'SELECT * FROM alerts ORDER BY id',
+        'count': 'SELECT COUNT(*) FROM alerts'
+    },
+}
+
+BULK_DENSITY_QUERY = f'''
+    INSERT INTO alert_density (day, cell_row, cell_col, alert_count)
+    SELECT {_density_key('')}, COUNT(*)
+    FROM alerts
+    WHERE id BETWEEN ? AND ? AND location_lat IS NOT NULL AND location_lng IS NOT NULL
+    GROUP BY 1, 2, 3
+    ON CONFLICT (day, cell_row, cell_col) DO UPDATE SET alert_count = alert_count + excluded.alert_count
+'''
+
+FULL_SCAN_ALLOWED_QUERIES = {
+    'users', 'alerts_page', 'alerts_count', 'statistics', 'alert_counters', 'alerts_with_details_page',
+    'alerts_keyset_first', 'alerts_with_details_keyset_first',
+} | {f'export_{source}{suffix}' for source in EXPORT_SOURCES for suffix in ('', '_count')}
+TEMP_SORT_ALLOWED_QUERIES = {'alerts_in_bbox'}
+
+BULK_INSERT_BATCH_SIZE = 10000
+
+BULK_INSERT_COLUMNS = {
+    'users': ('name', 'phone', 'address', 'emergency_contact', 'created_at'),
+    'alerts': ('user_id', 'alert_time', 'location_lat', 'location_lng', 'status', 'risk_level', 'description'),
+    'response_logs': ('alert_id', 'responder', 'action_time', 'action_type', 'notes')
+}
+
+QUERIES = {
+    'users': 'SELECT * FROM users ORDER BY created_at DESC',
+    'user_by_id': 'SELECT * FROM users WHERE id = ?',
+    'last_alert_time_by_user': 'SELECT alert_time FROM alerts WHERE user_id = ? AND id IS NOT ? ORDER BY alert_time DESC LIMIT 1',
+    'alerts_page': 'SELECT * FROM alerts ORDER BY alert_time DESC LIMIT ? OFFSET ?',
+    'alerts_page_by_status': 'SELECT * FROM alerts WHERE status = ? ORDER BY alert_time DESC LIMIT ? OFFSET ?',
+    'alerts_count': 'SELECT COUNT(*) FROM alerts',
+    'alerts_count_by_status': 'SELECT COUNT(*) FROM alerts WHERE status = ?',
+    'statistics': '''
+        SELECT 'users' AS source, NULL AS status, NULL AS risk_level, COUNT(*) AS count FROM users
+        UNION ALL
+        SELECT 'alerts', status, risk_level, COUNT(*) FROM alerts GROUP BY status, risk_level
+    ''',
+    'alert_counters': 'SELECT name, value FROM alert_counters',
+    'alert_rollups_range': '''
+        SELECT bucket, risk_level, status, alert_count
+        FROM alert_rollups
+        WHERE granularity = ? AND bucket >= ? AND bucket < ?
+    ''',
+    'response_rollups_range': '''
+        SELECT bucket, risk_level, responded_count, latency_count, latency_sum, latency_min, latency_max
+        FROM response_rollups
+        WHERE granularity = ? AND bucket >= ? AND bucket < ?
+    ''',
+    'alerts_in_window': 'SELECT * FROM alerts WHERE alert_time >= ? AND alert_time < ? ORDER BY alert_time',
+    'recent_alerts_in_window': 'SELECT * FROM alerts WHERE alert_time >= ? AND alert_time < ? ORDER BY alert_time DESC LIMIT ?',
+    'alerts_in_bbox': '''
+        SELECT a.*, u.name as user_name, u.phone as user_phone, u.address as user_address
+        FROM alert_geo_index g
+        CROSS JOIN alerts a ON a.id = g.id
+        JOIN users u ON a.user_id = u.id
+        WHERE g.max_lat >= ? AND g.min_lat <= ? AND g.max_lng >= ? AND g.min_lng <= ?
+        AND a.location_lat BETWEEN ? AND ? AND a.location_lng BETWEEN ? AND ?
+        AND +a.alert_time >= ? AND +a.alert_time < ?
+        ORDER BY a.alert_time DESC
+        LIMIT ?
+    ''',
+    'alerts_in_bbox_by_time': '''
+        SELECT a.*, u.name as user_name, u.phone as user_phone, u.address as user_address
+        FROM alerts a
+        JOIN users u ON a.user_id = u.id
+        WHERE a.location_lat BETWEEN ? AND ? AND a.location_lng BETWEEN ? AND ?
+        AND a.alert_time >= ? AND a.alert_time < ?
+        ORDER BY a.alert_time DESC
+        LIMIT ?
+    ''',
+    'outbox_claim': '''
+        SELECT * FROM notification_outbox
+        WHERE state = 'pending' AND channel = ? AND priority <= ? AND next_attempt_at <= ?
+        ORDER BY priority, next_attempt_at
+        LIMIT ?
+    ''',
+    'outbox_mark_claimed': "UPDATE notification_outbox SET state = 'claimed', claimed_at = ?, claimed_by = ? WHERE id = ?",
+    'outbox_ack': 'UPDATE notification_outbox SET state = ?, retry_count = ?, next_attempt_at = ?, last_error = ?, claimed_at = NULL, claimed_by = NULL WHERE id = ?',
+    'outbox_scheduled': "SELECT id, next_attempt_at FROM notification_outbox WHERE state = 'pending' AND channel = ? AND next_attempt_at > ?",
+    'outbox_dead_count': "SELECT channel, COUNT(*) AS dead FROM notification_outbox WHERE state = 'dead' GROUP BY channel",
+    'outbox_release_stale': "UPDATE notification_outbox SET state = 'pending', claimed_at = NULL, claimed_by = NULL WHERE state = 'claimed' AND claimed_at < ?",
+    'outbox_release_stale_channel': '''
+        UPDATE notification_outbox SET state = 'pending', claimed_at = NULL, claimed_by = NULL
+        WHERE state = 'claimed' AND channel = ? AND claimed_at < ?
+    ''',
+    'outbox_renew_leases': "UPDATE notification_outbox SET claimed_at = ? WHERE state = 'claimed' AND channel = ? AND claimed_by = ?",
+    'outbox_purge_sent': "DELETE FROM notification_outbox WHERE state = 'sent' AND channel = ? AND priority = ? AND next_attempt_at < ?",
+    'outbox_summary': '''
+        SELECT channel, priority, COUNT(*) AS queued, SUM(retry_count > 0) AS retrying
+        FROM notification_outbox
+        WHERE state = 'pending'
+        GROUP BY channel, priority
+    ''',
+    'alert_density_range': '''
+        SELECT cell_row, cell_col, alert_count
+        FROM alert_density
+        WHERE day >= ? AND day <= ? AND alert_count > 0
+    ''',
+    'alert_by_id': 'SELECT * FROM alerts WHERE id = ?',
+    'update_alert_status': 'UPDATE alerts SET status = ? WHERE id = ?',
+    'response_logs': 'SELECT * FROM response_logs WHERE alert_id = ? ORDER BY action_time ASC',
+    'alerts_with_details_page': '''
+        SELECT a.*, u.name as user_name, u.phone as user_phone, u.address as user_address
+        FROM alerts a
+        JOIN users u ON a.user_id = u.id
+        ORDER BY a.alert_time DESC
+        LIMIT ? OFFSET ?
+    ''',
+}
+
+BULK_CHUNK_SIZE = 500
+
+BULK_QUERIES = {
+    'response_logs_for_alerts': 'SELECT * FROM response_logs WHERE alert_id IN ({placeholders}) ORDER BY alert_id, action_time',
+    'first_responses_for_alerts': '''
+        SELECT l.alert_id, MIN(l.action_time) AS first_action_time,
+               (julianday(MIN(l.action_time)) - julianday(a.alert_time)) * 1440 AS response_minutes
+        FROM response_logs l
+        JOIN alerts a ON a.id = l.alert_id
+        WHERE l.alert_id IN ({placeholders})
+        GROUP BY l.alert_id
+    ''',
+    'outbox_claim_recipients': '''
+        SELECT * FROM notification_outbox
+        WHERE state = 'pending' AND channel = ? AND recipient IN ({placeholders}) AND next_attempt_at <= ? AND priority > 0
+        LIMIT ?
+    ''',
+}
+
+QUERIES.update({name: sql.format(placeholders='?') for name, sql in BULK_QUERIES.items()})
+
+QUERIES.update({
+    'response_logs_in_window': '''
+        SELECT l.*
+        FROM alerts a
+        JOIN response_logs l ON l.alert_id = a.id
+        WHERE a.alert_time >= ? AND a.alert_time < ?
+    ''',
+    'first_responses_in_window': '''
+        SELECT alert_id, first_action_time,
+               (julianday(first_action_time) - julianday(alert_time)) * 1440 AS response_minutes
+        FROM (
+            SELECT a.id AS alert_id, a.alert_time,
+                   (SELECT MIN(l.action_time) FROM response_logs l WHERE l.alert_id = a.id) AS first_action_time
+            FROM alerts a
+            WHERE a.alert_time >= ? AND a.alert_time < ?
+        )
+        WHERE first_action_time IS NOT NULL
+    ''',
+})
+
+for _source, _queries in EXPORT_SOURCES.items():
+    QUERIES[f'export_{_source}'] = _queries['rows']
+    QUERIES[f'export_{_source}_count'] = _queries['count']
+
+KEYSET_SOURCES = {
+    'alerts': 'SELECT a.* FROM alerts a',
+    'alerts_with_details': '''
+        SELECT a.*, u.name as user_name, u.phone as user_phone, u.address as user_address
+        FROM alerts a
+        JOIN users u ON a.user_id = u.id
+    ''',
+}
+
+def build_keyset_query(source: str, by_status: bool = False, direction: str = 'next', has_cursor: bool = False) -> str:
+    conditions = []
     
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS alerts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            alert_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            location_lat REAL,
-            location_lng REAL,
-            status TEXT DEFAULT 'pending',
-            risk_level TEXT DEFAULT 'medium',
-            description TEXT,
-            FOREIGN KEY (user_id) REFERENCES users (id)
+    if by_status:
+        conditions.append('a.status = ?')
+    
+    if has_cursor:
+        operator = '<' if direction == 'next' else '>'
+        conditions.append(f'(a.alert_time, a.id) {operator} (?, ?)')
+    
+    order = 'DESC' if direction == 'next' else 'ASC'
+    where_clause = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    
+    return f'{KEYSET_SOURCES[source].rstrip()}{where_clause} ORDER BY a.alert_time {order}, a.id {order} LIMIT ?'
+
+for _source in KEYSET_SOURCES:
+    for _by_status in (False, True):
+        _suffix = '_by_status' if _by_status else ''
+        QUERIES[f'{_source}_keyset_first{_suffix}'] = build_keyset_query(_source, _by_status)
+        QUERIES[f'{_source}_keyset_next{_suffix}'] = build_keyset_query(_source, _by_status, 'next', True)
+        QUERIES[f'{_source}_keyset_prev{_suffix}'] = build_keyset_query(_source, _by_status, 'prev', True)
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    pass
+
+class PooledConnection:
+    def __init__(self, pool: 'ConnectionPool', conn: sqlite3.Connection):
+        self._pool = pool
+        self._conn = conn
+    
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise sqlite3.ProgrammingError("Cannot operate on a connection returned to the pool.")
+        return getattr(self._conn, name)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._conn is None:
+            return False
+        
+        try:
+            if exc_type is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        finally:
+            if exc_type is not None and issubclass(exc_type, sqlite3.OperationalError) and 'locked' in str(exc_value):
+                self._pool.record_lock_timeout()
+            self.close()
+        
+        return False
+    
+    def close(self):
+        if self._conn is not None:
+            conn = self._conn
+            self._conn = None
+            self._pool.release(conn)
+
+class ConnectionPool:
+    def __init__(self, db_path: str, max_size: int = POOL_MAX_SIZE, timeout: float = POOL_TIMEOUT):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition(threading.Lock())
+        self._metrics = {
+            'connections_created': 0,
+            'checkouts': 0,
+            'releases': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'pool_timeouts': 0,
+            'lock_timeouts': 0,
+            'discarded': 0
+        }
+    
+    def _create_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
         )
-    ''')
+        conn.row_factory = sqlite3.Row
+        
+        for pragma, value in CONNECTION_PRAGMAS:
+            conn.execute(f'PRAGMA {pragma} = {value}')
+        
+        return conn
+    
+    def acquire(self) -> PooledConnection:
+        start = time.monotonic()
+        waited = False
+        
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Connection pool is closed.")
+                
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn = None
+                    break
+                
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self._metrics['pool_timeouts'] += 1
+                    raise PoolTimeoutError(f"Timed out after {self.timeout}s waiting for a database connection")
+                
+                if not waited:
+                    waited = True
+                    self._metrics['waits'] += 1
+                self._condition.wait(remaining)
+            
+            self._metrics['checkouts'] += 1
+            if waited:
+                self._metrics['wait_time_total'] += time.monotonic() - start
+        
+        if conn is None:
+            try:
+                conn = self._create_connection()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                raise
+            
+            with self._condition:
+                self._metrics['connections_created'] += 1
+        
+        return PooledConnection(self, conn)
+    
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+        
+        with self._condition:
+            self._metrics['releases'] += 1
+            
+            if self._closed:
+                self._size -= 1
+                conn.close()
+            else:
+                self._idle.append(conn)
+            
+            self._condition.notify()
+    
+    def record_lock_timeout(self):
+        with self._condition:
+            self._metrics['lock_timeouts'] += 1
+    
+    def close(self):
+        with self._condition:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+            self._size -= len(idle)
+            self._metrics['discarded'] += len(idle)
+            self._condition.notify_all()
+        
+        for conn in idle:
+            conn.close()
+    
+    def get_metrics(self) -> Dict:
+        with self._condition:
+            metrics = dict(self._metrics)
+            metrics['size'] = self._size
+            metrics['idle'] = len(self._idle)
+            metrics['in_use'] = self._size - len(self._idle)
+            metrics['max_size'] = self.max_size
+        
+        metrics['avg_wait_ms'] = round(metrics['wait_time_total'] / metrics['waits'] * 1000, 2) if metrics['waits'] else 0
+        return metrics
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.db_path != DB_PATH:
+            if _pool is not None:
+                _pool.close()
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def get_pool_metrics() -> Dict:
+    return get_pool().get_metrics()
+
+def init_database():
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                phone TEXT NOT NULL,
+                address TEXT,
+                emergency_contact TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS alerts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                alert_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                location_lat REAL,
+                location_lng REAL,
+                status TEXT DEFAULT 'pending',
+                risk_level TEXT DEFAULT 'medium',
+                description TEXT,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS response_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                alert_id INTEGER NOT NULL,
+                responder TEXT NOT NULL,
+                action_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                action_type TEXT NOT NULL,
+                notes TEXT,
+                FOREIGN KEY (alert_id) REFERENCES alerts (id)
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                recipient TEXT NOT NULL,
+                message TEXT NOT NULL,
+                channel TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 2,
+                state TEXT NOT NULL DEFAULT 'pending',
+                retry_count INTEGER NOT NULL DEFAULT 0,
+                max_retries INTEGER NOT NULL DEFAULT 3,
+                next_attempt_at REAL NOT NULL,
+                claimed_at REAL,
+                last_error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        apply_migrations(cursor)
+        
+        if ALERT_COUNTERS_ENABLED:
+            if not has_alert_counters(cursor):
+                enable_alert_counters(cursor)
+            else:
+                _replace_triggers(cursor, ALERT_COUNTER_TRIGGERS)
+        else:
+            disable_alert_counters(cursor)
+        
+        if ROLLUPS_ENABLED:
+            if not has_rollups(cursor):
+                enable_rollups(cursor)
+            else:
+                _replace_triggers(cursor, ROLLUP_TRIGGERS)
+        else:
+            disable_rollups(cursor)
+        
+        if DENSITY_ENABLED:
+            if not has_density(cursor):
+                enable_density(cursor)
+        else:
+            disable_density(cursor)
+        
+        if SPATIAL_INDEX_ENABLED:
+            if not has_spatial_index(cursor):
+                enable_spatial_index(cursor)
+        else:
+            disable_spatial_index(cursor)
+
+def get_connection() -> PooledConnection:
+    return get_pool().acquire()
+
+def get_schema_version(cursor) -> int:
+    cursor.execute('PRAGMA user_version')
+    return cursor.fetchone()[0]
+
+def apply_migrations(cursor) -> int:
+    version = get_schema_version(cursor)
+    
+    for target_version, statements in SCHEMA_MIGRATIONS:
+        if target_version <= version:
+            continue
+        
+        for statement in statements:
+            cursor.execute(statement)
+        
+        cursor.execute(f'PRAGMA user_version = {int(target_version)}')
+        version = target_version
+    
+    return version
+
+def explain_query_plan(sql: str, params: tuple = None) -> List[str]:
+    if params is None:
+        params = (None,) * sql.count('?')
     
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        plan = [row['detail'] for row in cursor.fetchall()]
+    
+    return plan
+
+def is_plan_regression(detail: str, materialized: Set[str] = frozenset()) -> bool:
+    match = re.match(r'^SCAN( TABLE)? (\S+)', detail)
+    if match:
+        if detail == 'SCAN CONSTANT ROW' or match.group(2).startswith('(') or match.group(2) in materialized:
+            return False
+        virtual_index = re.search(r' VIRTUAL TABLE INDEX (\d+):', detail)
+        return virtual_index is None or virtual_index.group(1) == '0'
+    return 'USE TEMP B-TREE' in detail
+
+def _table_exists(cursor, table_name: str) -> bool:
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,))
+    return cursor.fetchone() is not None
+
+def _replace_triggers(cursor, triggers: Dict[str, str]):
+    for trigger_name, trigger_sql in triggers.items():
+        cursor.execute(f'DROP TRIGGER IF EXISTS {trigger_name}')
+        cursor.execute(trigger_sql)
+
+def has_alert_counters(cursor) -> bool:
+    return _table_exists(cursor, 'alert_counters')
+
+def enable_alert_counters(cursor):
     cursor.execute('''
-        CREATE TABLE IF NOT EXISTS response_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            alert_id INTEGER NOT NULL,
-            responder TEXT NOT NULL,
-            action_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            action_type TEXT NOT NULL,
-            notes TEXT,
-            FOREIGN KEY (alert_id) REFERENCES alerts (id)
-        )
+        CREATE TABLE IF NOT EXISTS alert_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
     ''')
     
-    conn.commit()
-    conn.close()
+    for trigger_sql in ALERT_COUNTER_TRIGGERS.values():
+        cursor.execute(trigger_sql)
+    
+    rebuild_alert_counters(cursor)
 
-def get_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+def disable_alert_counters(cursor):
+    for trigger_name in ALERT_COUNTER_TRIGGERS:
+        cursor.execute(f'DROP TRIGGER IF EXISTS {trigger_name}')
+    cursor.execute('DROP TABLE IF EXISTS alert_counters')
 
-def add_user(name: str, phone: str, address: str = None, emergency_contact: str = None) -> int:
-    conn = get_connection()
-    cursor = conn.cursor()
+def rebuild_alert_counters(cursor):
+    cursor.execute(QUERIES['statistics'])
+    counters = _rows_to_counters(cursor.fetchall())
+    
+    cursor.execute('DELETE FROM alert_counters')
+    cursor.executemany(
+        'INSERT INTO alert_counters (name, value) VALUES (?, ?)',
+        list(counters.items())
+    )
+
+def has_rollups(cursor) -> bool:
+    return all(_table_exists(cursor, table_name) for table_name in ROLLUP_TABLES)
+
+def enable_rollups(cursor):
+    for table_sql in ROLLUP_TABLES.values():
+        cursor.execute(table_sql)
+    
+    for trigger_sql in ROLLUP_TRIGGERS.values():
+        cursor.execute(trigger_sql)
+    
+    rebuild_rollups(cursor)
+
+def disable_rollups(cursor):
+    for trigger_name in ROLLUP_TRIGGERS:
+        cursor.execute(f'DROP TRIGGER IF EXISTS {trigger_name}')
+    for table_name in ROLLUP_TABLES:
+        cursor.execute(f'DROP TABLE IF EXISTS {table_name}')
+
+def rebuild_rollups(cursor):
+    for table_name, rebuild_sql in ROLLUP_REBUILD_QUERIES.items():
+        cursor.execute(f'DELETE FROM {table_name}')
+        
+        for granularity in ROLLUP_GRANULARITIES:
+            cursor.execute(rebuild_sql.format(bucket=_rollup_bucket(granularity, 'alert_time')), (granularity,))
+
+def refresh_response_rollups(cursor, alert_time: str, risk_level: str):
+    for granularity in ROLLUP_GRANULARITIES:
+        for statement in _response_rollup_refresh(granularity, '?1', '?2'):
+            cursor.execute(statement, (alert_time, risk_level))
+
+def has_density(cursor) -> bool:
+    return _table_exists(cursor, 'alert_density')
+
+def enable_density(cursor):
+    cursor.execute(DENSITY_TABLE)
+    
+    for trigger_sql in DENSITY_TRIGGERS.values():
+        cursor.execute(trigger_sql)
+    
+    rebuild_density(cursor)
+
+def disable_density(cursor):
+    for trigger_name in DENSITY_TRIGGERS:
+        cursor.execute(f'DROP TRIGGER IF EXISTS {trigger_name}')
+    cursor.execute('DROP TABLE IF EXISTS alert_density')
+
+def rebuild_density(cursor):
+    cursor.execute('DELETE FROM alert_density')
+    cursor.execute(DENSITY_REBUILD_QUERY)
+
+def has_spatial_index(cursor) -> bool:
+    return _table_exists(cursor, 'alert_geo_index')
+
+def enable_spatial_index(cursor):
+    try:
+        cursor.execute(SPATIAL_INDEX_TABLE)
+    except sqlite3.OperationalError:
+        return
+    
+    for trigger_sql in SPATIAL_INDEX_TRIGGERS.values():
+        cursor.execute(trigger_sql)
+    
+    rebuild_spatial_index(cursor)
+
+def disable_spatial_index(cursor):
+    for trigger_name in SPATIAL_INDEX_TRIGGERS:
+        cursor.execute(f'DROP TRIGGER IF EXISTS {trigger_name}')
+    cursor.execute('DROP TABLE IF EXISTS alert_geo_index')
+
+def rebuild_spatial_index(cursor):
+    cursor.execute('DELETE FROM alert_geo_index')
+    cursor.execute(SPATIAL_INDEX_FILL_QUERY, (0, sys.maxsize))
+
+def _suspend_aggregate_triggers(cursor) -> List[str]:
+    suspended = []
+    
+    if has_alert_counters(cursor):
+        for trigger_name in ALERT_COUNTER_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger_name}')
+        suspended.append('alert_counters')
+    
+    if has_rollups(cursor):
+        for trigger_name in ROLLUP_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger_name}')
+        suspended.append('rollups')
+    
+    if has_density(cursor):
+        for trigger_name in DENSITY_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger_name}')
+        suspended.append('density')
+    
+    if has_spatial_index(cursor):
+        for trigger_name in SPATIAL_INDEX_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger_name}')
+        suspended.append('spatial_index')
+    
+    return suspended
+
+def _resume_aggregate_triggers(cursor, suspended: List[str]):
+    if 'alert_counters' in suspended:
+        for trigger_sql in ALERT_COUNTER_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+    
+    if 'rollups' in suspended:
+        for trigger_sql in ROLLUP_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+    
+    if 'density' in suspended:
+        for trigger_sql in DENSITY_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+    
+    if 'spatial_index' in suspended:
+        for trigger_sql in SPATIAL_INDEX_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+
+def _apply_bulk_aggregates(cursor, table: str, first_id: int, last_id: int, suspended: List[str]):
+    queries = BULK_ROLLUP_QUERIES.get(table, {}) if 'rollups' in suspended else {}
+    
+    if queries:
+        finest_granularity = next(iter(ROLLUP_GRANULARITIES))
+        
+        cursor.execute(queries['stage'].format(bucket=_rollup_bucket(finest_granularity, 'alert_time')), (first_id, last_id))
+        for granularity in ROLLUP_GRANULARITIES:
+            cursor.execute(queries['apply'].format(bucket=_rollup_bucket(granularity, 'bucket')), (granularity,))
+    
+    if 'alert_counters' in suspended and table in BULK_COUNTER_QUERIES:
+        if 'counters' in queries:
+            cursor.execute(queries['counters'])
+        else:
+            cursor.execute(BULK_COUNTER_QUERIES[table], (first_id, last_id))
+        counters = _rows_to_counters(cursor.fetchall())
+        cursor.executemany(
+            'INSERT INTO alert_counters (name, value) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = value + excluded.value',
+            [(name, value) for name, value in counters.items() if value]
+        )
+    
+    if queries:
+        cursor.execute(queries['cleanup'])
+        
+        if 'refresh' in queries:
+            cursor.execute(queries['refresh'], (first_id, last_id))
+            for alert_time, risk_level in cursor.fetchall():
+                refresh_response_rollups(cursor, alert_time, risk_level)
+    
+    if 'density' in suspended and table == 'alerts':
+        cursor.execute(BULK_DENSITY_QUERY, (first_id, last_id))
+    
+    if 'spatial_index' in suspended and table == 'alerts':
+        cursor.execute(SPATIAL_INDEX_FILL_QUERY, (first_id, last_id))
+
+def _suspend_indexes(cursor, table: str) -> List[str]:
     cursor.execute(
-        'INSERT INTO users (name, phone, address, emergency_contact) VALUES (?, ?, ?, ?)',
-        (name, phone, address, emergency_contact)
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
     )
-    conn.commit()
-    user_id = cursor.lastrowid
-    conn.close()
+    indexes = cursor.fetchall()
+    
+    for index in indexes:
+        cursor.execute(f'DROP INDEX {index["name"]}')
+    
+    return [index['sql'] for index in indexes]
+
+def _rows_to_counters(rows) -> Dict[str, int]:
+    counters = {'total_users': 0, 'total_alerts': 0}
+    
+    for row in rows:
+        source, status, risk_level, count = row
+        if source == 'users':
+            counters['total_users'] += count
+            continue
+        
+        counters['total_alerts'] += count
+        status_key = f"status:{'' if status is None else status}"
+        risk_level_key = f"risk_level:{'' if risk_level is None else risk_level}"
+        counters[status_key] = counters.get(status_key, 0) + count
+        counters[risk_level_key] = counters.get(risk_level_key, 0) + count
+    
+    return counters
+
+def find_query_plan_regressions(queries: Dict[str, str] = None) -> Dict[str, List[str]]:
+    if queries is None:
+        queries = QUERIES
+    
+    regressions = {}
+    for name, sql in queries.items():
+        plan = explain_query_plan(sql)
+        materialized = {detail.split()[1] for detail in plan if detail.startswith(('MATERIALIZE ', 'CO-ROUTINE '))}
+        if name in FULL_SCAN_ALLOWED_QUERIES:
+            plan_regressions = ['USE TEMP B-TREE' in detail for detail in plan]
+        elif name in TEMP_SORT_ALLOWED_QUERIES:
+            plan_regressions = [is_plan_regression(detail, materialized) and 'USE TEMP B-TREE' not in detail for detail in plan]
+        else:
+            plan_regressions = [is_plan_regression(detail, materialized) for detail in plan]
+        
+        if any(plan_regressions):
+            regressions[name] = plan
+    
+    return regressions
+
+def add_user(name: str, phone: str, address: str = None, emergency_contact: str = None) -> int:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT INTO users (name, phone, address, emergency_contact) VALUES (?, ?, ?, ?)',
+            (name, phone, address, emergency_contact)
+        )
+        user_id = cursor.lastrowid
     return user_id
 
 @st.cache_data(ttl=300)
 def get_users() -> List[Dict]:
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users ORDER BY created_at DESC')
-    users = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(QUERIES['users'])
+        users = [dict(row) for row in cursor.fetchall()]
     return users
 
 @st.cache_data(ttl=300)
 def get_user_by_id(user_id: int) -> Optional[Dict]:
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-    user = cursor.fetchone()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(QUERIES['user_by_id'], (user_id,))
+        user = cursor.fetchone()
     return dict(user) if user else None
 
+def get_last_alert_time(user_id: int, exclude_alert_id: int = None) -> Optional[str]:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(QUERIES['last_alert_time_by_user'], (user_id, exclude_alert_id))
+        row = cursor.fetchone()
+    return row[0] if row else None
+
 def create_alert(user_id: int, location_lat: float = None, location_lng: float = None, 
                  risk_level: str = 'medium', description: str = None) -> int:
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        'INSERT INTO alerts (user_id, location_lat, location_lng, risk_level, description) VALUES (?, ?, ?, ?, ?)',
-        (user_id, location_lat, location_lng, risk_level, description)
-    )
-    conn.commit()
-    alert_id = cursor.lastrowid
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT INTO alerts (user_id, location_lat, location_lng, risk_level, description) VALUES (?, ?, ?, ?, ?)',
+            (user_id, location_lat, location_lng, risk_level, description)
+        )
+        alert_id = cursor.lastrowid
     return alert_id
 
-@st.cache_data(ttl=60)
-def get_alerts(status: str = None, page: int = 1, page_size: int = 50) -> Dict:
-    conn = get_connection()
-    cursor = conn.cursor()
+def enqueue_notification(recipient: str, message: str, channel: str, priority: int = 2,
+                         max_retries: int = 3, next_attempt_at: float = None) -> int:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT INTO notification_outbox (recipient, message, channel, priority, max_retries, next_attempt_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (recipient, message, channel, priority, max_retries, time.time() if next_attempt_at is None else next_attempt_at)
+        )
+        notification_id = cursor.lastrowid
+    return notification_id
+
+def claim_notifications(channel: str, limit: int, max_priority: int = 2, now: float = None,
+                        coalesce_limit: int = 0, owner: str = None) -> List[Dict]:
+    now = time.time() if now is None else now
+    
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(QUERIES['outbox_claim'], (channel, max_priority, now, limit))
+        rows = [dict(row) for row in cursor.fetchall()]
+        
+        recipients = sorted({row['recipient'] for row in rows if row['priority'] > 0})
+        if coalesce_limit and recipients:
+            claimed_ids = {row['id'] for row in rows}
+            placeholders = ', '.join('?' * len(recipients))
+            cursor.execute(
+                BULK_QUERIES['outbox_claim_recipients'].format(placeholders=placeholders),
+                (channel, *recipients, now, (coalesce_limit + 1) * len(recipients) + limit)
+            )
+            
+            extra_counts = {}
+            for row in cursor.fetchall():
+                if row['id'] in claimed_ids or extra_counts.get(row['recipient'], 0) >= coalesce_limit:
+                    continue
+                extra_counts[row['recipient']] = extra_counts.get(row['recipient'], 0) + 1
+                claimed_ids.add(row['id'])
+                rows.append(dict(row))
+        
+        cursor.executemany(QUERIES['outbox_mark_claimed'], [(now, owner, row['id']) for row in rows])
     
-    offset = (page - 1) * page_size
+    return rows
+
+def ack_notifications(results: Sequence[Tuple]):
+    if not results:
+        return
     
-    if status:
-        cursor.execute('SELECT * FROM alerts WHERE status = ? ORDER BY alert_time DESC LIMIT ? OFFSET ?', (status, page_size, offset))
-    else:
-        cursor.execute('SELECT * FROM alerts ORDER BY alert_time DESC LIMIT ? OFFSET ?', (page_size, offset))
-    alerts = [dict(row) for row in cursor.fetchall()]
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.executemany(QUERIES['outbox_ack'], results)
+
+def get_scheduled_notifications(channel: str, after: float = None) -> List[Tuple[int, float]]:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(QUERIES['outbox_scheduled'], (channel, time.time() if after is None else after))
+        rows = [(row['id'], row['next_attempt_at']) for row in cursor.fetchall()]
+    return rows
+
+def renew_notification_leases(channel: str, owner: str, now: float = None) -> int:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(QUERIES['outbox_renew_leases'], (time.time() if now is None else now, channel, owner))
+        renewed = cursor.rowcount
+    return renewed
+
+def release_stale_notifications(timeout: float = OUTBOX_LEASE_SECONDS, channel: str = None) -> int:
+    cutoff = time.time() - timeout
     
-    if status:
-        cursor.execute('SELECT COUNT(*) FROM alerts WHERE status = ?', (status,))
-    else:
-        cursor.execute('SELECT COUNT(*) FROM alerts')
-    total_count = cursor.fetchone()[0]
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        if channel is None:
+            cursor.execute(QUERIES['outbox_release_stale'], (cutoff,))
+        else:
+            cursor.execute(QUERIES['outbox_release_stale_channel'], (channel, cutoff))
+        released = cursor.rowcount
+    return released
+
+def purge_sent_notifications(channels: Iterable[str], retention_days: int = OUTBOX_RETENTION_DAYS) -> int:
+    cutoff = time.time() - retention_days * 86400
+    purged = 0
     
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        for channel in channels:
+            for priority in range(3):
+                cursor.execute(QUERIES['outbox_purge_sent'], (channel, priority, cutoff))
+                purged += cursor.rowcount
+    return purged
+
+def get_outbox_summary() -> Dict:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(QUERIES['outbox_summary'])
+        rows = cursor.fetchall()
+        cursor.execute(QUERIES['outbox_dead_count'])
+        dead_rows = cursor.fetchall()
+    
+    summary = {'pending': {}, 'dead': {row['channel']: row['dead'] for row in dead_rows}}
+    for row in rows:
+        summary['pending'].setdefault(row['channel'], {})[row['priority']] = {
+            'queued': row['queued'],
+            'retrying': row['retrying'] or 0
+        }
+    return summary
+
+@st.cache_data(ttl=60)
+def get_alerts(status: str = None, page: int = 1, page_size: int = 50) -> Dict:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        
+        offset = (page - 1) * page_size
+        
+        if status:
+            cursor.execute(QUERIES['alerts_page_by_status'], (status, page_size, offset))
+        else:
+            cursor.execute(QUERIES['alerts_page'], (page_size, offset))
+        alerts = [dict(row) for row in cursor.fetchall()]
+        
+        if status:
+            cursor.execute(QUERIES['alerts_count_by_status'], (status,))
+        else:
+            cursor.execute(QUERIES['alerts_count'])
+        total_count = cursor.fetchone()[0]
     
     return {
         'data': alerts,
@@ -127,61 +1417,240 @@ def get_alerts(status: str = None, page: int = 1, page_size: int = 50) -> Dict:
         'total_pages': (total_count + page_size - 1) // page_size
     }
 
+def encode_cursor(alert_time, alert_id: int) -> str:
+    payload = json.dumps([str(alert_time), alert_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        alert_time, alert_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        return alert_time, int(alert_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid pagination cursor: {cursor!r}") from e
+
+def _fetch_keyset_page(source: str, status: str = None, cursor: str = None, direction: str = 'next',
+                       page_size: int = 50, include_total: bool = False) -> Dict:
+    if direction not in ('next', 'prev'):
+        raise ValueError(f"Invalid pagination direction: {direction!r}")
+    
+    if cursor is None:
+        direction = 'next'
+    
+    params = []
+    if status:
+        params.append(status)
+    if cursor is not None:
+        params.extend(decode_cursor(cursor))
+    params.append(page_size + 1)
+    
+    sql = build_keyset_query(source, bool(status), direction, cursor is not None)
+    
+    with get_connection() as conn:
+        db_cursor = conn.cursor()
+        db_cursor.execute(sql, params)
+        rows = [dict(row) for row in db_cursor.fetchall()]
+        
+        total_count = None
+        if include_total:
+            if status:
+                db_cursor.execute(QUERIES['alerts_count_by_status'], (status,))
+            else:
+                db_cursor.execute(QUERIES['alerts_count'])
+            total_count = db_cursor.fetchone()[0]
+    
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    
+    if direction == 'prev':
+        rows.reverse()
+        has_prev = has_more
+        has_next = True
+    else:
+        has_prev = cursor is not None
+        has_next = has_more
+    
+    return {
+        'data': rows,
+        'page_size': page_size,
+        'next_cursor': encode_cursor(rows[-1]['alert_time'], rows[-1]['id']) if rows and has_next else None,
+        'prev_cursor': encode_cursor(rows[0]['alert_time'], rows[0]['id']) if rows and has_prev else None,
+        'has_next': has_next and bool(rows),
+        'has_prev': has_prev and bool(rows),
+        'total': total_count
+    }
+
+@st.cache_data(ttl=60)
+def get_alerts_page(status: str = None, cursor: str = None, direction: str = 'next',
+                    page_size: int = 50, include_total: bool = False) -> Dict:
+    return _fetch_keyset_page('alerts', status, cursor, direction, page_size, include_total)
+
 @st.cache_data(ttl=60)
 def get_alert_by_id(alert_id: int) -> Optional[Dict]:
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM alerts WHERE id = ?', (alert_id,))
-    alert = cursor.fetchone()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(QUERIES['alert_by_id'], (alert_id,))
+        alert = cursor.fetchone()
     return dict(alert) if alert else None
 
 def update_alert_status(alert_id: int, status: str):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('UPDATE alerts SET status = ? WHERE id = ?', (status, alert_id))
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(QUERIES['update_alert_status'], (status, alert_id))
 
 def add_response_log(alert_id: int, responder: str, action_type: str, notes: str = None):
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        'INSERT INTO response_logs (alert_id, responder, action_type, notes) VALUES (?, ?, ?, ?)',
-        (alert_id, responder, action_type, notes)
-    )
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            'INSERT INTO response_logs (alert_id, responder, action_type, notes) VALUES (?, ?, ?, ?)',
+            (alert_id, responder, action_type, notes)
+        )
 
 @st.cache_data(ttl=120)
 def get_response_logs(alert_id: int) -> List[Dict]:
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM response_logs WHERE alert_id = ? ORDER BY action_time ASC', (alert_id,))
-    logs = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(QUERIES['response_logs'], (alert_id,))
+        logs = [dict(row) for row in cursor.fetchall()]
     return logs
 
+def _first_response_rows_to_dict(rows) -> Dict[int, Dict]:
+    return {
+        row['alert_id']: {
+            'first_action_time': row['first_action_time'],
+            'response_minutes': row['response_minutes']
+        }
+        for row in rows
+    }
+
+@st.cache_data(ttl=120)
+def get_response_logs_bulk(alert_ids: List[int] = None, start_time: str = None, end_time: str = None) -> Dict:
+    logs = []
+    first_responses = {}
+    
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        
+        if alert_ids is not None:
+            unique_ids = sorted(set(alert_ids))
+            
+            for i in range(0, len(unique_ids), BULK_CHUNK_SIZE):
+                chunk = unique_ids[i:i + BULK_CHUNK_SIZE]
+                placeholders = ', '.join('?' * len(chunk))
+                
+                cursor.execute(BULK_QUERIES['response_logs_for_alerts'].format(placeholders=placeholders), chunk)
+                logs.extend(dict(row) for row in cursor.fetchall())
+                
+                cursor.execute(BULK_QUERIES['first_responses_for_alerts'].format(placeholders=placeholders), chunk)
+                first_responses.update(_first_response_rows_to_dict(cursor.fetchall()))
+        else:
+            window = (start_time or '0000-01-01 00:00:00', end_time or '9999-12-31 23:59:59')
+            
+            cursor.execute(QUERIES['response_logs_in_window'], window)
+            logs = [dict(row) for row in cursor.fetchall()]
+            
+            cursor.execute(QUERIES['first_responses_in_window'], window)
+            first_responses = _first_response_rows_to_dict(cursor.fetchall())
+    
+    return {
+        'logs': logs,
+        'first_responses': first_responses
+    }
+
 @st.cache_data(ttl=60)
-def get_alerts_with_details(page: int = 1, page_size: int = 50) -> Dict:
-    conn = get_connection()
-    cursor = conn.cursor()
+def get_alerts_in_window(start_time: str, end_time: str = None, limit: int = None) -> List[Dict]:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        if limit is None:
+            cursor.execute(QUERIES['alerts_in_window'], (start_time, end_time or '9999-12-31 23:59:59'))
+        else:
+            cursor.execute(QUERIES['recent_alerts_in_window'], (start_time, end_time or '9999-12-31 23:59:59', limit))
+        alerts = [dict(row) for row in cursor.fetchall()]
+    return alerts
+
+@st.cache_data(ttl=60)
+def get_alert_rollups(start_bucket: str, end_bucket: str, granularity: str = 'hour') -> Optional[Dict]:
+    if granularity not in ROLLUP_GRANULARITIES:
+        raise ValueError(f"Unknown rollup granularity: {granularity!r}")
     
-    offset = (page - 1) * page_size
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        
+        if not has_rollups(cursor):
+            return None
+        
+        cursor.execute(QUERIES['alert_rollups_range'], (granularity, start_bucket, end_bucket))
+        alert_rollups = [dict(row) for row in cursor.fetchall()]
+        
+        cursor.execute(QUERIES['response_rollups_range'], (granularity, start_bucket, end_bucket))
+        response_rollups = [dict(row) for row in cursor.fetchall()]
     
-    cursor.execute('''
-        SELECT a.*, u.name as user_name, u.phone as user_phone, u.address as user_address
-        FROM alerts a
-        JOIN users u ON a.user_id = u.id
-        ORDER BY a.alert_time DESC
-        LIMIT ? OFFSET ?
-    ''', (page_size, offset))
-    alerts = [dict(row) for row in cursor.fetchall()]
+    return {
+        'alerts': alert_rollups,
+        'responses': response_rollups
+    }
+
+@st.cache_data(ttl=60)
+def get_alerts_in_bbox(south: float, west: float, north: float, east: float,
+                       start_time: str = '', end_time: str = '9999-12-31', limit: int = 5000) -> Dict:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        
+        indexed = has_spatial_index(cursor) and max(north - south, east - west) <= SPATIAL_INDEX_MAX_SPAN
+        
+        if indexed:
+            cursor.execute(
+                QUERIES['alerts_in_bbox'],
+                (south, north, west, east, south, north, west, east, start_time, end_time, limit)
+            )
+        else:
+            cursor.execute(QUERIES['alerts_in_bbox_by_time'], (south, north, west, east, start_time, end_time, limit))
+        alerts = [dict(row) for row in cursor.fetchall()]
+    
+    return {
+        'data': alerts,
+        'limit': limit,
+        'truncated': len(alerts) >= limit,
+        'indexed': indexed
+    }
+
+@st.cache_data(ttl=60)
+def get_alert_density(start_day: str, end_day: str) -> Optional[Dict]:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        
+        if not has_density(cursor):
+            return None
+        
+        cursor.execute(QUERIES['alert_density_range'], (start_day, end_day))
+        rows = cursor.fetchall()
     
-    cursor.execute('SELECT COUNT(*) FROM alerts')
-    total_count = cursor.fetchone()[0]
+    cells = {}
+    for cell_row, cell_col, alert_count in rows:
+        cells[(cell_row, cell_col)] = cells.get((cell_row, cell_col), 0) + alert_count
     
-    conn.close()
+    return {
+        'cell_degrees': DENSITY_CELL_DEGREES,
+        'start_day': start_day,
+        'end_day': end_day,
+        'total': sum(cells.values()),
+        'cells': [
+            ((cell_row + 0.5) * DENSITY_CELL_DEGREES - 90, (cell_col + 0.5) * DENSITY_CELL_DEGREES - 180, alert_count)
+            for (cell_row, cell_col), alert_count in sorted(cells.items())
+        ]
+    }
+
+@st.cache_data(ttl=60)
+def get_alerts_with_details(page: int = 1, page_size: int = 50) -> Dict:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        
+        offset = (page - 1) * page_size
+        
+        cursor.execute(QUERIES['alerts_with_details_page'], (page_size, offset))
+        alerts = [dict(row) for row in cursor.fetchall()]
+        
+        cursor.execute(QUERIES['alerts_count'])
+        total_count = cursor.fetchone()[0]
     
     return {
         'data': alerts,
@@ -191,40 +1660,117 @@ def get_alerts_with_details(page: int = 1, page_size: int = 50) -> Dict:
         'total_pages': (total_count + page_size - 1) // page_size
     }
 
+@st.cache_data(ttl=60)
+def get_alerts_with_details_page(status: str = None, cursor: str = None, direction: str = 'next',
+                                 page_size: int = 50, include_total: bool = False) -> Dict:
+    return _fetch_keyset_page('alerts_with_details', status, cursor, direction, page_size, include_total)
+
 @st.cache_data(ttl=30)
 def get_statistics():
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT COUNT(*) FROM users')
-    total_users = cursor.fetchone()[0]
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        
+        if has_alert_counters(cursor):
+            cursor.execute(QUERIES['alert_counters'])
+            counters = {row['name']: row['value'] for row in cursor.fetchall()}
+        else:
+            cursor.execute(QUERIES['statistics'])
+            counters = _rows_to_counters(cursor.fetchall())
     
-    cursor.execute('SELECT COUNT(*) FROM alerts')
-    total_alerts = cursor.fetchone()[0]
+    return {
+        'total_users': counters.get('total_users', 0),
+        'total_alerts': counters.get('total_alerts', 0),
+        'pending_alerts': counters.get('status:pending', 0),
+        'processing_alerts': counters.get('status:processing', 0),
+        'resolved_alerts': counters.get('status:resolved', 0),
+        'high_risk_alerts': counters.get('risk_level:high', 0)
+    }
+
+def count_export_rows(source: str) -> int:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(EXPORT_SOURCES[source]['count'])
+        total_count = cursor.fetchone()[0]
+    return total_count
+
+def get_export_column_types(source: str) -> Dict[str, str]:
+    if source not in EXPORT_SOURCES:
+        raise ValueError(f"Unknown export source: {source!r}")
     
-    cursor.execute('SELECT COUNT(*) FROM alerts WHERE status = "pending"')
-    pending_alerts = cursor.fetchone()[0]
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'PRAGMA table_info({source})')
+        column_types = {row['name']: (row['type'] or '').upper() for row in cursor.fetchall()}
+    return column_types
+
+def iter_export_chunks(source: str, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Tuple[List[str], List[tuple]]]:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(EXPORT_SOURCES[source]['rows'])
+        columns = [description[0] for description in cursor.description]
+        
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield columns, [tuple(row) for row in rows]
+
+def bulk_insert(table: str, columns: Sequence[str], rows: Iterable[Sequence], batch_size: int = BULK_INSERT_BATCH_SIZE,
+                defer_aggregates: bool = False, defer_indexes: bool = False,
+                progress_callback: Optional[Callable[[int], None]] = None) -> range:
+    if table not in BULK_INSERT_COLUMNS:
+        raise ValueError(f"Unknown bulk insert table: {table!r}")
     
-    cursor.execute('SELECT COUNT(*) FROM alerts WHERE status = "resolved"')
-    resolved_alerts = cursor.fetchone()[0]
+    unknown_columns = [column for column in columns if column not in BULK_INSERT_COLUMNS[table]]
+    if unknown_columns:
+        raise ValueError(f"Unknown columns for {table}: {', '.join(unknown_columns)}")
     
-    cursor.execute('SELECT COUNT(*) FROM alerts WHERE risk_level = "high"')
-    high_risk_alerts = cursor.fetchone()[0]
+    sql = f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})'
+    rows = iter(rows)
+    inserted = 0
     
-    conn.close()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        
+        suspended = _suspend_aggregate_triggers(cursor) if defer_aggregates else []
+        index_sqls = _suspend_indexes(cursor, table) if defer_indexes else []
+        
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            
+            cursor.executemany(sql, batch)
+            inserted += len(batch)
+            
+            if progress_callback:
+                progress_callback(inserted)
+        
+        for index_sql in index_sqls:
+            cursor.execute(index_sql)
+        
+        cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,))
+        row = cursor.fetchone()
+        last_id = row['seq'] if row else 0
+        
+        if suspended:
+            if inserted:
+                _apply_bulk_aggregates(cursor, table, last_id - inserted + 1, last_id, suspended)
+            _resume_aggregate_triggers(cursor, suspended)
     
-    return {
-        'total_users': total_users,
-        'total_alerts': total_alerts,
-        'pending_alerts': pending_alerts,
-        'resolved_alerts': resolved_alerts,
-        'high_risk_alerts': high_risk_alerts
-    }
+    return range(last_id - inserted + 1, last_id + 1)
+
+def bulk_insert_users(rows: Iterable[Sequence], columns: Sequence[str] = BULK_INSERT_COLUMNS['users'][:4], **kwargs) -> range:
+    return bulk_insert('users', columns, rows, **kwargs)
+
+def bulk_insert_alerts(rows: Iterable[Sequence], columns: Sequence[str] = BULK_INSERT_COLUMNS['alerts'], **kwargs) -> range:
+    return bulk_insert('alerts', columns, rows, **kwargs)
+
+def bulk_insert_response_logs(rows: Iterable[Sequence], columns: Sequence[str] = BULK_INSERT_COLUMNS['response_logs'], **kwargs) -> range:
+    return bulk_insert('response_logs', columns, rows, **kwargs)
 
 def generate_mock_users(count: int = 5):
-    conn = get_connection()
-    cursor = conn.cursor()
-    
     mock_users = [
         ("张三", "13812345678", "北京市朝阳区建国路88号", "13912345678"),
         ("李四", "13812345679", "北京市海淀区中关村大街1号", "13912345679"),
@@ -233,30 +1779,12 @@ def generate_mock_users(count: int = 5):
         ("孙七", "13812345682", "北京市丰台区南三环西路3号", "13912345682"),
     ]
     
-    user_ids = []
-    for i in range(min(count, len(mock_users))):
-        name, phone, address, emergency_contact = mock_users[i]
-        
-        cursor.execute('''
-            INSERT INTO users (name, phone, address, emergency_contact)
-            VALUES (?, ?, ?, ?)
-        ''', (name, phone, address, emergency_contact))
-        
-        user_id = cursor.lastrowid
-        user_ids.append(user_id)
-    
-    conn.commit()
-    conn.close()
-    
-    return user_ids
+    return list(bulk_insert_users(mock_users[:count]))
 
 def generate_mock_alerts(user_ids: List[int], count: int = 10):
     if not user_ids:
         return []
     
-    conn = get_connection()
-    cursor = conn.cursor()
-    
     import random
     from datetime import timedelta
     
@@ -275,40 +1803,29 @@ def generate_mock_alerts(user_ids: List[int], count: int = 10):
         "家中水管破裂，请求维修"
     ]
     
-    alert_ids = []
+    base_lat = 39.9042
+    base_lng = 116.4074
+    
+    rows = []
     for i in range(count):
         user_id = random.choice(user_ids)
         status = random.choice(statuses)
         risk_level = random.choice(risk_levels)
         description = random.choice(descriptions)
         
-        base_lat = 39.9042
-        base_lng = 116.4074
         location_lat = base_lat + random.uniform(-0.1, 0.1)
         location_lng = base_lng + random.uniform(-0.1, 0.1)
         
         alert_time = datetime.now() - timedelta(days=random.randint(1, 30))
         
-        cursor.execute('''
-            INSERT INTO alerts (user_id, alert_time, location_lat, location_lng, status, risk_level, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (user_id, alert_time, location_lat, location_lng, status, risk_level, description))
-        
-        alert_id = cursor.lastrowid
-        alert_ids.append(alert_id)
+        rows.append((user_id, str(alert_time), location_lat, location_lng, status, risk_level, description))
     
-    conn.commit()
-    conn.close()
-    
-    return alert_ids
+    return list(bulk_insert_alerts(rows))
 
 def generate_mock_today_alerts(user_ids: List[int], count: int = 3):
     if not user_ids:
         return []
     
-    conn = get_connection()
-    cursor = conn.cursor()
-    
     import random
     from datetime import timedelta
     
@@ -320,32 +1837,24 @@ def generate_mock_today_alerts(user_ids: List[int], count: int = 3):
         "家中发生火灾，请求消防支援"
     ]
     
-    alert_ids = []
+    base_lat = 39.9042
+    base_lng = 116.4074
+    
+    rows = []
     for i in range(count):
         user_id = random.choice(user_ids)
         status = random.choice(statuses)
         risk_level = random.choice(risk_levels)
         description = random.choice(descriptions)
         
-        base_lat = 39.9042
-        base_lng = 116.4074
         location_lat = base_lat + random.uniform(-0.05, 0.05)
         location_lng = base_lng + random.uniform(-0.05, 0.05)
         
         alert_time = datetime.now() - timedelta(hours=random.randint(0, 23))
         
-        cursor.execute('''
-            INSERT INTO alerts (user_id, alert_time, location_lat, location_lng, status, risk_level, description)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (user_id, alert_time, location_lat, location_lng, status, risk_level, description))
-        
-        alert_id = cursor.lastrowid
-        alert_ids.append(alert_id)
-    
-    conn.commit()
-    conn.close()
+        rows.append((user_id, str(alert_time), location_lat, location_lng, status, risk_level, description))
     
-    return alert_ids
+    return list(bulk_insert_alerts(rows))
 
 def generate_mock_data():
     user_count = 5
@@ -0,0 +1,327 @@
+import os
+import json
+import math
+import hashlib
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+EARTH_RADIUS = 6371000
+SEGMENT_CELL_METERS = 250.0
+MAX_QUERY_CELLS = 64
+PAIR_CHUNK_SIZE = 2000000
+
+HAZARD_LAYER_DIR_KEY = 'HAZARD_LAYER_DIR'
+
+GEOMETRY_KINDS = {
+    'LineString': 'line',
+    'MultiLineString': 'line',
+    'Polygon': 'polygon',
+    'MultiPolygon': 'polygon'
+}
+
+def point_segment_distances(px, py, ax, ay, bx, by):
+    dx = bx - ax
+    dy = by - ay
+    length_sq = dx * dx + dy * dy
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(length_sq > 0, ((px - ax) * dx + (py - ay) * dy) / length_sq, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+class SegmentSet:
+    def __init__(self, segments: List[Tuple[float, float, float, float, int]], rings: Dict[int, List[np.ndarray]] = None,
+                 cell_size: float = SEGMENT_CELL_METERS):
+        self.cell_size = cell_size
+        self.rings = rings or {}
+        
+        data = np.array(segments, dtype=float).reshape(-1, 5)
+        self.ax, self.ay, self.bx, self.by = data[:, 0], data[:, 1], data[:, 2], data[:, 3]
+        self.feature = data[:, 4].astype(np.int64)
+        
+        keys = []
+        segment_ids = []
+        for segment_id in range(len(data)):
+            col_min, col_max = self._cells(min(self.ax[segment_id], self.bx[segment_id]), max(self.ax[segment_id], self.bx[segment_id]))
+            row_min, row_max = self._cells(min(self.ay[segment_id], self.by[segment_id]), max(self.ay[segment_id], self.by[segment_id]))
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    keys.append(self._key(row, col))
+                    segment_ids.append(segment_id)
+        
+        order = np.argsort(np.array(keys, dtype=np.int64), kind='stable')
+        self.cell_keys = np.array(keys, dtype=np.int64)[order]
+        self.cell_segments = np.array(segment_ids, dtype=np.int64)[order]
+        
+        self.ring_bounds = {
+            feature_index: (
+                min(ring[:, 0].min() for ring in feature_rings), min(ring[:, 1].min() for ring in feature_rings),
+                max(ring[:, 0].max() for ring in feature_rings), max(ring[:, 1].max() for ring in feature_rings)
+            )
+            for feature_index, feature_rings in self.rings.items()
+        }
+    
+    def __len__(self) -> int:
+        return len(self.feature)
+    
+    def _cells(self, low, high) -> Tuple[int, int]:
+        return math.floor(low / self.cell_size), math.floor(high / self.cell_size)
+    
+    @staticmethod
+    def _key(row, col):
+        return row * (2 ** 32) + col
+    
+    def _candidate_pairs(self, px: np.ndarray, py: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        col_min = np.floor((px - threshold) / self.cell_size).astype(np.int64)
+        col_max = np.floor((px + threshold) / self.cell_size).astype(np.int64)
+        row_min = np.floor((py - threshold) / self.cell_size).astype(np.int64)
+        row_max = np.floor((py + threshold) / self.cell_size).astype(np.int64)
+        
+        row_span = int((row_max - row_min).max()) + 1
+        col_span = int((col_max - col_min).max()) + 1
+        
+        if row_span * col_span > MAX_QUERY_CELLS:
+            points = np.repeat(np.arange(len(px)), len(self))
+            segments = np.tile(np.arange(len(self)), len(px))
+            return points, segments
+        
+        pair_points = []
+        pair_segments = []
+        for row_offset in range(row_span):
+            for col_offset in range(col_span):
+                rows = row_min + row_offset
+                cols = col_min + col_offset
+                points = np.flatnonzero((rows <= row_max) & (cols <= col_max))
+                
+                keys = self._key(rows[points], cols[points])
+                low = np.searchsorted(self.cell_keys, keys, side='left')
+                counts = np.searchsorted(self.cell_keys, keys, side='right') - low
+                
+                hit = counts > 0
+                if not hit.any():
+                    continue
+                points, low, counts = points[hit], low[hit], counts[hit]
+                
+                offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                pair_points.append(np.repeat(points, counts))
+                pair_segments.append(self.cell_segments[np.repeat(low, counts) + offsets])
+        
+        if not pair_points:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        
+        return np.concatenate(pair_points), np.concatenate(pair_segments)
+    
+    def _contains(self, px: np.ndarray, py: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        inside_points = []
+        inside_features = []
+        
+        for feature_index, feature_rings in self.rings.items():
+            min_x, min_y, max_x, max_y = self.ring_bounds[feature_index]
+            points = np.flatnonzero((px >= min_x) & (px <= max_x) & (py >= min_y) & (py <= max_y))
+            if not len(points):
+                continue
+            
+            crossings = np.zeros(len(points), dtype=bool)
+            for ring in feature_rings:
+                x1, y1 = ring[:-1, 0], ring[:-1, 1]
+                x2, y2 = ring[1:, 0], ring[1:, 1]
+                chunk_size = max(1, PAIR_CHUNK_SIZE // max(len(x1), 1))
+                
+                for start in range(0, len(points), chunk_size):
+                    chunk = points[start:start + chunk_size]
+                    qx = px[chunk, None]
+                    qy = py[chunk, None]
+                    straddles = (y1 > qy) != (y2 > qy)
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        intersect_x = (x2 - x1) * (qy - y1) / (y2 - y1) + x1
+                    crossings[start:start + chunk_size] ^= (np.count_nonzero(straddles & (qx < intersect_x), axis=1) % 2).astype(bool)
+            
+            inside_points.append(points[crossings])
+            inside_features.append(np.full(int(crossings.sum()), feature_index, dtype=np.int64))
+        
+        if not inside_points:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        
+        return np.concatenate(inside_points), np.concatenate(inside_features)
+    
+    def query(self, px: np.ndarray, py: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        nearest_feature = np.full(len(px), -1, dtype=np.int64)
+        nearest_distance = np.full(len(px), np.inf)
+        
+        valid = np.flatnonzero(np.isfinite(px) & np.isfinite(py))
+        if not len(self) or not len(valid) or threshold < 0:
+            return nearest_feature, nearest_distance
+        
+        if len(valid) < len(px):
+            valid_feature, valid_distance = self.query(px[valid], py[valid], threshold)
+            nearest_feature[valid] = valid_feature
+            nearest_distance[valid] = valid_distance
+            return nearest_feature, nearest_distance
+        
+        pair_points, pair_segments = self._candidate_pairs(px, py, threshold)
+        pair_features = self.feature[pair_segments]
+        distances = point_segment_distances(
+            px[pair_points], py[pair_points],
+            self.ax[pair_segments], self.ay[pair_segments], self.bx[pair_segments], self.by[pair_segments]
+        )
+        
+        if self.rings:
+            inside_points, inside_features = self._contains(px, py)
+            pair_points = np.concatenate([pair_points, inside_points])
+            pair_features = np.concatenate([pair_features, inside_features])
+            distances = np.concatenate([distances, np.zeros(len(inside_points))])
+        
+        within = distances <= threshold
+        pair_points, pair_features, distances = pair_points[within], pair_features[within], distances[within]
+        
+        if len(pair_points):
+            order = np.lexsort((pair_features, distances, pair_points))
+            points_sorted = pair_points[order]
+            first = np.flatnonzero(np.r_[True, points_sorted[1:] != points_sorted[:-1]])
+            nearest_feature[points_sorted[first]] = pair_features[order][first]
+            nearest_distance[points_sorted[first]] = distances[order][first]
+        
+        return nearest_feature, nearest_distance
+
+class HazardLayer:
+    def __init__(self, features: List[Dict], name: str = "", version: str = ""):
+        self.name = name
+        self.features = []
+        self.version = version
+        
+        coordinates = [point for feature in features for point in self._iter_points(feature["geometry"])]
+        if coordinates:
+            self.origin_lat = float(np.mean([point[1] for point in coordinates]))
+            self.origin_lng = float(np.mean([point[0] for point in coordinates]))
+        else:
+            self.origin_lat = 0.0
+            self.origin_lng = 0.0
+        self.x_scale = EARTH_RADIUS * math.radians(1) * math.cos(math.radians(self.origin_lat))
+        self.y_scale = EARTH_RADIUS * math.radians(1)
+        
+        segments = {'line': [], 'polygon': []}
+        rings = {}
+        
+        for feature in features:
+            geometry = feature.get("geometry") or {}
+            kind = GEOMETRY_KINDS.get(geometry.get("type"))
+            if kind is None:
+                continue
+            
+            properties = feature.get("properties") or {}
+            feature_index = len(self.features)
+            self.features.append({
+                "name": properties.get("name") or f"{name}#{feature_index + 1}",
+                "kind": kind,
+                "risk_increase": int(properties.get("risk_increase", 2)),
+                "properties": properties
+            })
+            
+            for line in self._iter_lines(geometry):
+                projected = self.project(line[:, 1], line[:, 0])
+                for (ax, ay), (bx, by) in zip(projected[:-1], projected[1:]):
+                    segments[kind].append((ax, ay, bx, by, feature_index))
+                
+                if kind == 'polygon':
+                    rings.setdefault(feature_index, []).append(projected)
+        
+        self.lines = SegmentSet(segments['line'])
+        self.polygons = SegmentSet(segments['polygon'], rings)
+    
+    @classmethod
+    def from_geojson(cls, data: Dict, name: str = "", version: str = "") -> 'HazardLayer':
+        if data.get("type") == "FeatureCollection":
+            features = data.get("features", [])
+        elif data.get("type") == "Feature":
+            features = [data]
+        else:
+            features = [{"type": "Feature", "geometry": data, "properties": {}}]
+        
+        return cls(features, name or data.get("name", ""), version)
+    
+    @staticmethod
+    def _iter_lines(geometry: Dict):
+        geometry_type = geometry.get("type")
+        coordinates = geometry.get("coordinates", [])
+        
+        if geometry_type == 'LineString':
+            parts = [coordinates]
+        elif geometry_type in ('MultiLineString', 'Polygon'):
+            parts = coordinates
+        elif geometry_type == 'MultiPolygon':
+            parts = [ring for polygon in coordinates for ring in polygon]
+        else:
+            parts = []
+        
+        for part in parts:
+            line = np.array(part, dtype=float).reshape(-1, len(part[0]) if part else 2)[:, :2]
+            if len(line) < 2:
+                continue
+            if geometry_type in ('Polygon', 'MultiPolygon') and not np.array_equal(line[0], line[-1]):
+                line = np.vstack([line, line[:1]])
+            yield line
+    
+    @classmethod
+    def _iter_points(cls, geometry: Dict):
+        for line in cls._iter_lines(geometry or {}):
+            yield from line.tolist()
+    
+    def project(self, lats, lngs) -> np.ndarray:
+        x = (np.asarray(lngs, dtype=float) - self.origin_lng) * self.x_scale
+        y = (np.asarray(lats, dtype=float) - self.origin_lat) * self.y_scale
+        return np.column_stack([x, y])
+    
+    def query(self, lats, lngs, threshold: float, kind: str = 'line') -> Tuple[np.ndarray, np.ndarray]:
+        projected = self.project(lats, lngs)
+        segments = self.lines if kind == 'line' else self.polygons
+        return segments.query(projected[:, 0], projected[:, 1], threshold)
+    
+    def nearest(self, lat: float, lng: float, threshold: float, kind: str = 'line') -> Optional[Tuple[Dict, float]]:
+        feature_index, distance = self.query([lat], [lng], threshold, kind)
+        if feature_index[0] < 0:
+            return None
+        return self.features[feature_index[0]], float(distance[0])
+
+_layer_cache = {}
+_layer_cache_lock = threading.Lock()
+
+def load_hazard_layer(path: str) -> HazardLayer:
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    
+    with _layer_cache_lock:
+        cached = _layer_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    
+    with open(path, 'rb') as f:
+        content = f.read()
+    
+    layer = HazardLayer.from_geojson(
+        json.loads(content.decode('utf-8')),
+        name=os.path.splitext(os.path.basename(path))[0],
+        version=hashlib.md5(content).hexdigest()[:12]
+    )
+    
+    with _layer_cache_lock:
+        _layer_cache[path] = (mtime, layer)
+    
+    return layer
+
+def hazard_layer_dir() -> Optional[str]:
+    from utils.config_manager import ConfigManager
+    
+    return ConfigManager().get(HAZARD_LAYER_DIR_KEY) or os.getenv(HAZARD_LAYER_DIR_KEY) or None
+
+def load_default_hazard_layers() -> List[HazardLayer]:
+    layer_dir = hazard_layer_dir()
+    if not layer_dir or not os.path.isdir(layer_dir):
+        return []
+    
+    return [
+        load_hazard_layer(os.path.join(layer_dir, file_name))
+        for file_name in sorted(os.listdir(layer_dir))
+        if file_name.endswith(('.geojson', '.json'))
+    ]
@@ -1,8 +1,18 @@
 import streamlit as st
 import folium
+from folium.plugins import FastMarkerCluster, HeatMap
+from branca.element import MacroElement
+from jinja2 import Template
 from streamlit_folium import st_folium
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict
+from datetime import datetime, timedelta
 import hashlib
+import inspect
+import json
+import math
+import numpy as np
+from utils.database import get_alert_density, get_alerts_in_bbox
 
 RISK_LEVEL_COLORS = {
     'low': 'green',
@@ -16,6 +26,224 @@ RISK_LEVEL_ICONS = {
     'high': 'fire'
 }
 
+RISK_LEVEL_ORDER = ['low', 'medium', 'high']
+
+MAP_RENDER_MODES = {
+    'auto': '自动',
+    'markers': '逐个标记',
+    'cluster': '标记聚合',
+    'grid': '网格汇总'
+}
+
+MARKER_MODE_LIMIT = 200
+CLUSTER_MODE_LIMIT = 20000
+GRID_CELLS_PER_TILE = 4
+GRID_MAX_CELLS = 500
+
+MAP_RENDER_CACHE_SIZE = 8
+MARKER_GROUP_CACHE_SIZE = 24
+ST_FOLIUM_PARAMETERS = inspect.signature(st_folium).parameters
+SUPPORTS_FEATURE_GROUP_UPDATE = 'feature_group_to_add' in ST_FOLIUM_PARAMETERS
+
+HEATMAP_DAYS = 30
+HEATMAP_RADIUS = 18
+HEATMAP_CACHE_SIZE = 4
+
+MAP_VIEWPORT_LIMIT = 5000
+MAP_VIEWPORT_MARGIN = 0.1
+MAP_VIEWPORT_STATE_KEY = 'map_viewport'
+MAP_MOUNT_STATE_KEY = 'map_mount'
+MAP_TIME_WINDOWS = {
+    1: '近24小时',
+    7: '近7天',
+    30: '近30天',
+    0: '全部'
+}
+
+DEFAULT_LOCATION = (39.9042, 116.4074)
+STATIC_MAP_ZOOM = 16
+STATIC_MAP_MAX_WIDTH = 768
+STATIC_MAP_TILE_URL = "https://tile.openstreetmap.org/{z}/{x}/{y}.png"
+
+CLUSTER_MARKER_CALLBACK = """
+function (row) {
+    var colors = %s;
+    var icons = %s;
+    var escape = function (value) {
+        return String(value === null || value === undefined || value === '' ? 'N/A' : value)
+            .replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+    };
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.setIcon(L.AwesomeMarkers.icon({
+        icon: icons[row[3]] || 'info-sign',
+        markerColor: colors[row[3]] || 'blue',
+        prefix: 'glyphicon'
+    }));
+    marker.bindPopup(function () {
+        return '<div style="min-width: 200px;">'
+            + '<h4>求助 #' + escape(row[2]) + '</h4>'
+            + '<p><b>用户:</b> ' + escape(row[6]) + '</p>'
+            + '<p><b>电话:</b> ' + escape(row[7]) + '</p>'
+            + '<p><b>时间:</b> ' + escape(row[5]) + '</p>'
+            + '<p><b>地址:</b> ' + escape(row[8]) + '</p>'
+            + '<p><b>风险等级:</b> ' + escape(String(row[3]).toUpperCase()) + '</p>'
+            + '<p><b>描述:</b> ' + escape(row[9] || '无') + '</p>'
+            + '<p><b>状态:</b> ' + escape(row[4]) + '</p>'
+            + '</div>';
+    }, {maxWidth: 300});
+    return marker;
+}
+"""
+
+class GridAggregateLayer(MacroElement):
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.geoJson({{ this.data|tojson }}, {
+                pointToLayer: function (feature, latlng) {
+                    var p = feature.properties;
+                    return L.circleMarker(latlng, {
+                        radius: Math.min(8 + 4 * Math.log2(p.count), 32),
+                        color: {{ this.colors|tojson }}[p.risk_level] || 'blue',
+                        fillOpacity: 0.55,
+                        weight: 1
+                    }).bindTooltip(
+                        p.count + ' 条求助（高 ' + p.high + ' / 中 ' + p.medium + ' / 低 ' + p.low + '）'
+                    );
+                }
+            }).addTo({{ this._parent.get_name() }});
+        {% endmacro %}
+    """)
+    
+    def __init__(self, data: Dict):
+        super().__init__()
+        self._name = 'GridAggregateLayer'
+        self.data = data
+        self.colors = RISK_LEVEL_COLORS
+
+def _valid_alert_points(alerts: List[Dict]) -> List[Dict]:
+    points = []
+    for alert in alerts:
+        lat = alert.get('location_lat')
+        lng = alert.get('location_lng')
+        
+        if lat and lng and isinstance(lat, (int, float)) and isinstance(lng, (int, float)):
+            if math.isnan(lat) or math.isnan(lng):
+                continue
+            points.append(alert)
+    return points
+
+def resolve_render_mode(mode: str, point_count: int) -> str:
+    if mode != 'auto':
+        return mode
+    if point_count <= MARKER_MODE_LIMIT:
+        return 'markers'
+    if point_count <= CLUSTER_MODE_LIMIT:
+        return 'cluster'
+    return 'grid'
+
+def grid_cell_degrees(zoom: int) -> float:
+    return 360.0 / (2 ** zoom) / GRID_CELLS_PER_TILE
+
+def aggregate_alerts_grid(alerts: List[Dict], zoom: int, max_cells: int = GRID_MAX_CELLS) -> Dict:
+    points = _valid_alert_points(alerts)
+    features = []
+    
+    if points:
+        lats = np.array([alert['location_lat'] for alert in points], dtype=float)
+        lngs = np.array([alert['location_lng'] for alert in points], dtype=float)
+        levels = np.array([
+            RISK_LEVEL_ORDER.index(level) if level in RISK_LEVEL_ORDER else 1
+            for level in ((alert.get('risk_level') or 'medium').lower() for alert in points)
+        ], dtype=np.int64)
+        
+        cell_degrees = grid_cell_degrees(zoom)
+        while True:
+            rows = np.floor(lats / cell_degrees).astype(np.int64)
+            cols = np.floor(lngs / cell_degrees).astype(np.int64)
+            cells, inverse = np.unique(rows * (2 ** 32) + cols, return_inverse=True)
+            if len(cells) <= max_cells:
+                break
+            cell_degrees *= 2
+        
+        counts = np.bincount(inverse, minlength=len(cells))
+        lat_means = np.bincount(inverse, weights=lats, minlength=len(cells)) / counts
+        lng_means = np.bincount(inverse, weights=lngs, minlength=len(cells)) / counts
+        level_counts = np.zeros((len(RISK_LEVEL_ORDER), len(cells)), dtype=np.int64)
+        np.add.at(level_counts, (levels, inverse), 1)
+        
+        for cell in range(len(cells)):
+            present = np.flatnonzero(level_counts[:, cell])
+            features.append({
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [round(float(lng_means[cell]), 6), round(float(lat_means[cell]), 6)]},
+                'properties': {
+                    'count': int(counts[cell]),
+                    'risk_level': RISK_LEVEL_ORDER[present[-1]],
+                    **{level: int(level_counts[index, cell]) for index, level in enumerate(RISK_LEVEL_ORDER)}
+                }
+            })
+    
+    return {'type': 'FeatureCollection', 'features': features}
+
+def _add_alert_markers(target, alerts: List[Dict]):
+    for alert in _valid_alert_points(alerts):
+        lat = alert['location_lat']
+        lng = alert['location_lng']
+        risk_level = alert.get('risk_level', 'medium').lower()
+        
+        color = RISK_LEVEL_COLORS.get(risk_level, 'blue')
+        
+        popup_content = f"""
+        <div style="min-width: 200px;">
+            <h4>求助 #{alert.get('id', 'N/A')}</h4>
+            <p><b>用户:</b> {alert.get('user_name', 'N/A')}</p>
+            <p><b>电话:</b> {alert.get('user_phone', 'N/A')}</p>
+            <p><b>时间:</b> {alert.get('alert_time', 'N/A')}</p>
+            <p><b>地址:</b> {alert.get('user_address', 'N/A')}</p>
+            <p><b>风险等级:</b> {risk_level.upper()}</p>
+            <p><b>描述:</b> {alert.get('description', '无') or '无'}</p>
+            <p><b>状态:</b> {alert.get('status', 'N/A')}</p>
+        </div>
+        """
+        
+        folium.Marker(
+            location=[lat, lng],
+            popup=folium.Popup(popup_content, max_width=300),
+            icon=folium.Icon(color=color, icon=RISK_LEVEL_ICONS.get(risk_level, 'info-sign'))
+        ).add_to(target)
+
+def get_recent_density(days: int = HEATMAP_DAYS) -> Optional[Dict]:
+    today = datetime.now().date()
+    return get_alert_density((today - timedelta(days=days - 1)).isoformat(), today.isoformat())
+
+def _density_version(density: Optional[Dict]) -> Optional[str]:
+    if not density:
+        return None
+    return hashlib.md5(str((density['start_day'], density['end_day'], density['cells'])).encode()).hexdigest()
+
+def create_density_layer(density: Dict) -> folium.FeatureGroup:
+    group = folium.FeatureGroup(name='求助热力图')
+    
+    cells = density.get('cells') or []
+    if cells:
+        peak = max(count for _, _, count in cells)
+        HeatMap(
+            data=[[lat, lng, count / peak] for lat, lng, count in cells],
+            radius=HEATMAP_RADIUS,
+            blur=HEATMAP_RADIUS,
+            min_opacity=0.3,
+            max_zoom=15
+        ).add_to(group)
+    
+    return group
+
+def get_density_layer(density: Dict) -> folium.FeatureGroup:
+    layer, _ = _cache_lookup(
+        _session_cache('map_density_layer_cache'), _density_version(density), HEATMAP_CACHE_SIZE,
+        lambda: create_density_layer(density)
+    )
+    return layer
+
 def _get_alerts_hash(alerts: List[Dict]) -> str:
     alert_str = str(sorted([(a.get('id', 0), a.get('status', ''), a.get('risk_level', '')) for a in alerts]))
     return hashlib.md5(alert_str.encode()).hexdigest()
@@ -26,7 +254,9 @@ def create_alert_map(
     center_lng: float = 116.4074,
     zoom: int = 10,
     height: int = 500,
-    show_layer_control: bool = True
+    show_layer_control: bool = True,
+    mode: str = 'markers',
+    density: Optional[Dict] = None
 ) -> folium.Map:
     m = folium.Map(
         location=[center_lat, center_lng],
@@ -39,42 +269,144 @@ def create_alert_map(
     if show_layer_control:
         folium.LayerControl().add_to(m)
     
-    if alerts:
-        import math
-        for alert in alerts:
-            lat = alert.get('location_lat')
-            lng = alert.get('location_lng')
-            
-            if lat and lng and isinstance(lat, (int, float)) and isinstance(lng, (int, float)):
-                if math.isnan(lat) or math.isnan(lng):
-                    continue
-                risk_level = alert.get('risk_level', 'medium').lower()
-                
-                color = RISK_LEVEL_COLORS.get(risk_level, 'blue')
-                
-                popup_content = f"""
-                <div style="min-width: 200px;">
-                    <h4>求助 #{alert.get('id', 'N/A')}</h4>
-                    <p><b>用户:</b> {alert.get('user_name', 'N/A')}</p>
-                    <p><b>电话:</b> {alert.get('user_phone', 'N/A')}</p>
-                    <p><b>时间:</b> {alert.get('alert_time', 'N/A')}</p>
-                    <p><b>地址:</b> {alert.get('user_address', 'N/A')}</p>
-                    <p><b>风险等级:</b> {risk_level.upper()}</p>
-                    <p><b>描述:</b> {alert.get('description', '无') or '无'}</p>
-                    <p><b>状态:</b> {alert.get('status', 'N/A')}</p>
-                </div>
-                """
-                
-                folium.Marker(
-                    location=[lat, lng],
-                    popup=folium.Popup(popup_content, max_width=300),
-                    icon=folium.Icon(color=color, icon=RISK_LEVEL_ICONS.get(risk_level, 'info-sign'))
-                ).add_to(m)
+    mode = resolve_render_mode(mode, len(alerts))
+    
+    if alerts and mode == 'grid':
+        GridAggregateLayer(aggregate_alerts_grid(alerts, zoom)).add_to(m)
+    elif alerts and mode == 'cluster':
+        FastMarkerCluster(
+            data=[
+                [
+                    alert['location_lat'], alert['location_lng'], alert.get('id', 'N/A'),
+                    (alert.get('risk_level') or 'medium').lower(), alert.get('status'), alert.get('alert_time'),
+                    alert.get('user_name'), alert.get('user_phone'), alert.get('user_address'), alert.get('description')
+                ]
+                for alert in _valid_alert_points(alerts)
+            ],
+            callback=CLUSTER_MARKER_CALLBACK % (json.dumps(RISK_LEVEL_COLORS), json.dumps(RISK_LEVEL_ICONS)),
+            name='求助标记'
+        ).add_to(m)
+    elif alerts:
+        _add_alert_markers(m, alerts)
+    
+    if density:
+        create_density_layer(density).add_to(m)
     
     return m
 
+def _session_cache(name: str) -> OrderedDict:
+    if name not in st.session_state:
+        st.session_state[name] = OrderedDict()
+    return st.session_state[name]
+
+def _cache_lookup(cache: OrderedDict, key, max_size: int, build):
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key], True
+    
+    value = build()
+    cache[key] = value
+    while len(cache) > max_size:
+        cache.popitem(last=False)
+    return value, False
+
+def get_cached_alert_map(alerts: List[Dict], density: Optional[Dict] = None, **options) -> Tuple[folium.Map, bool]:
+    key = (_get_alerts_hash(alerts), _density_version(density), tuple(sorted(options.items())))
+    return _cache_lookup(
+        _session_cache('map_render_cache'), key, MAP_RENDER_CACHE_SIZE,
+        lambda: create_alert_map(alerts, density=density, **options)
+    )
+
+def get_marker_groups(alerts: List[Dict]) -> List[folium.FeatureGroup]:
+    alerts_by_level = {}
+    for alert in _valid_alert_points(alerts):
+        alerts_by_level.setdefault((alert.get('risk_level') or 'medium').lower(), []).append(alert)
+    
+    cache = _session_cache('map_marker_group_cache')
+    groups = []
+    for level, level_alerts in alerts_by_level.items():
+        def build(level=level, level_alerts=level_alerts):
+            group = folium.FeatureGroup(name=f"{level.upper()} 风险")
+            _add_alert_markers(group, level_alerts)
+            return group
+        
+        group, _ = _cache_lookup(cache, (level, _get_alerts_hash(level_alerts)), MARKER_GROUP_CACHE_SIZE, build)
+        groups.append(group)
+    
+    return groups
+
+def viewport_query_bounds(south: float, west: float, north: float, east: float) -> Tuple[float, float, float, float]:
+    span = max(north - south, east - west, 1e-4)
+    step = 2.0 ** math.ceil(math.log2(span / 8))
+    margin = span * MAP_VIEWPORT_MARGIN
+    
+    return (
+        math.floor((south - margin) / step) * step,
+        math.floor((west - margin) / step) * step,
+        math.ceil((north + margin) / step) * step,
+        math.ceil((east + margin) / step) * step
+    )
+
+def initial_viewport(center_lat: float, center_lng: float, zoom: int) -> Dict:
+    half_lng = 360 / 2 ** zoom * 1.5
+    half_lat = half_lng * math.cos(math.radians(center_lat)) * 0.6
+    
+    return {
+        'center': (center_lat, center_lng),
+        'zoom': zoom,
+        'query_bounds': viewport_query_bounds(center_lat - half_lat, center_lng - half_lng, center_lat + half_lat, center_lng + half_lng)
+    }
+
+def _viewport_from_map_state(map_state: Optional[Dict], zoom: int) -> Optional[Dict]:
+    bounds = (map_state or {}).get('bounds') or {}
+    south_west = bounds.get('_southWest') or {}
+    north_east = bounds.get('_northEast') or {}
+    
+    south, west = south_west.get('lat'), south_west.get('lng')
+    north, east = north_east.get('lat'), north_east.get('lng')
+    if None in (south, west, north, east):
+        return None
+    
+    center = map_state.get('center') or {}
+    return {
+        'center': (center.get('lat', (south + north) / 2), center.get('lng', (west + east) / 2)),
+        'zoom': map_state.get('zoom') or zoom,
+        'query_bounds': viewport_query_bounds(south, west, north, east)
+    }
+
+def _map_mount(map_key: str) -> Dict:
+    mount = st.session_state.get(MAP_MOUNT_STATE_KEY)
+    if mount is None or mount['key'] != map_key:
+        mount = {'key': map_key, 'bounds': None}
+        st.session_state[MAP_MOUNT_STATE_KEY] = mount
+    return mount
+
+def _interaction_viewport(map_state: Optional[Dict], mount: Dict, zoom: int) -> Optional[Dict]:
+    viewport = _viewport_from_map_state(map_state, zoom)
+    if viewport is None:
+        return None
+    
+    initial_report = mount['bounds'] is None
+    bounds = map_state['bounds']
+    if initial_report or bounds == mount['bounds']:
+        mount['bounds'] = bounds
+        return None
+    
+    mount['bounds'] = bounds
+    return viewport
+
+def load_viewport_alerts(viewport: Dict, days: int) -> Dict:
+    start_time = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S') if days else ''
+    return get_alerts_in_bbox(*viewport['query_bounds'], start_time=start_time, limit=MAP_VIEWPORT_LIMIT)
+
+def _rerun():
+    if hasattr(st, 'rerun'):
+        st.rerun()
+    else:
+        st.experimental_rerun()
+
 def display_alert_map(
-    alerts: List[Dict],
+    alerts: Optional[List[Dict]] = None,
     center_lat: float = 39.9042,
     center_lng: float = 116.4074,
     zoom: int = 10,
@@ -83,6 +415,23 @@ def display_alert_map(
     show_pending_only: bool = False,
     show_risk_filter: bool = True
 ):
+    viewport_mode = alerts is None
+    
+    if viewport_mode:
+        viewport = st.session_state.get(MAP_VIEWPORT_STATE_KEY) or initial_viewport(center_lat, center_lng, zoom)
+        center_lat, center_lng = viewport['center']
+        zoom = viewport['zoom']
+        
+        time_window = st.selectbox(
+            "时间范围",
+            options=list(MAP_TIME_WINDOWS.keys()),
+            index=2,
+            format_func=lambda key: MAP_TIME_WINDOWS[key],
+            key="map_time_window"
+        )
+        viewport_result = load_viewport_alerts(viewport, time_window)
+        alerts = viewport_result['data']
+    
     filtered_alerts = alerts
     
     if show_pending_only:
@@ -103,7 +452,7 @@ def display_alert_map(
     
     st.subheader("🗺️ 求助地图")
     
-    if filtered_alerts:
+    if filtered_alerts or viewport_mode:
         col1, col2 = st.columns([3, 1])
         
         with col2:
@@ -114,42 +463,133 @@ def display_alert_map(
             
             st.markdown("---")
             st.markdown(f"**显示点数**: {len(filtered_alerts)}")
+            if viewport_mode:
+                st.caption("拖动或缩放地图后自动加载可视范围内的求助")
+                if viewport_result['truncated']:
+                    st.caption(f"可视范围内求助较多，仅显示最新 {viewport_result['limit']} 条，放大地图可查看更多")
+            
+            render_mode = st.selectbox(
+                "显示模式",
+                options=list(MAP_RENDER_MODES.keys()),
+                format_func=lambda key: MAP_RENDER_MODES[key],
+                key="map_render_mode"
+            )
+            render_mode = resolve_render_mode(render_mode, len(filtered_alerts))
+            st.caption(f"当前模式: {MAP_RENDER_MODES[render_mode]}")
+            if render_mode == 'grid':
+                st.caption("圆圈大小表示该网格内的求助数量，颜色为其中最高的风险等级")
+            
+            density = None
+            if st.checkbox(f"🔥 近{HEATMAP_DAYS}天热力图", value=False, key="map_heatmap"):
+                density = get_recent_density()
+                if density is None:
+                    st.caption("热力图统计未启用")
+                else:
+                    st.caption(f"近{HEATMAP_DAYS}天共 {density['total']} 条求助（不受筛选影响）")
         
         with col1:
-            if filtered_alerts:
+            if filtered_alerts and not viewport_mode:
                 center_lat = filtered_alerts[0].get('location_lat', center_lat)
                 center_lng = filtered_alerts[0].get('location_lng', center_lng)
             
+            view_options = {}
+            if viewport_mode and 'returned_objects' in ST_FOLIUM_PARAMETERS:
+                view_options['returned_objects'] = ['bounds', 'center', 'zoom']
+            
             with st.spinner("正在加载地图..."):
-                m = create_alert_map(
-                    alerts=filtered_alerts,
-                    center_lat=center_lat,
-                    center_lng=center_lng,
-                    zoom=zoom,
-                    height=height,
-                    show_layer_control=show_layer_control
-                )
-                
-                st_folium(m, width='100%', height=height, key=f"map_{_get_alerts_hash(filtered_alerts)}")
+                if render_mode == 'markers' and SUPPORTS_FEATURE_GROUP_UPDATE:
+                    if viewport_mode and 'zoom' in ST_FOLIUM_PARAMETERS:
+                        view_options['zoom'] = zoom
+                    
+                    base_map = create_alert_map(
+                        alerts=[],
+                        zoom=zoom,
+                        height=height,
+                        show_layer_control=show_layer_control
+                    )
+                    map_key = "map_incremental"
+                    map_state = st_folium(
+                        base_map,
+                        width='100%',
+                        height=height,
+                        center=(center_lat, center_lng),
+                        feature_group_to_add=get_marker_groups(filtered_alerts) + ([get_density_layer(density)] if density else []),
+                        key=map_key,
+                        **view_options
+                    )
+                else:
+                    m, cached = get_cached_alert_map(
+                        filtered_alerts,
+                        center_lat=center_lat,
+                        center_lng=center_lng,
+                        zoom=zoom,
+                        height=height,
+                        show_layer_control=show_layer_control,
+                        mode=render_mode,
+                        density=density
+                    )
+                    
+                    if cached and 'render' in ST_FOLIUM_PARAMETERS:
+                        view_options['render'] = False
+                    map_key = f"map_{render_mode}_{_get_alerts_hash(filtered_alerts)}_{_density_version(density)}"
+                    map_state = st_folium(m, width='100%', height=height, key=map_key, **view_options)
+        
+        if viewport_mode:
+            new_viewport = _interaction_viewport(map_state, _map_mount(map_key), zoom)
+            if new_viewport and new_viewport['query_bounds'] != viewport['query_bounds']:
+                st.session_state[MAP_VIEWPORT_STATE_KEY] = new_viewport
+                _rerun()
     else:
         st.info("没有符合条件的求助记录可显示")
 
-def create_single_alert_map(
-    alert: Dict,
-    height: int = 400
-) -> folium.Map:
-    import math
-    
+def _alert_location(alert: Dict) -> Tuple[float, float]:
     lat = alert.get('location_lat')
     lng = alert.get('location_lng')
     
     if lat and lng and isinstance(lat, (int, float)) and isinstance(lng, (int, float)):
-        if math.isnan(lat) or math.isnan(lng):
-            lat = 39.9042
-            lng = 116.4074
-    else:
-        lat = 39.9042
-        lng = 116.4074
+        if not (math.isnan(lat) or math.isnan(lng)):
+            return lat, lng
+    return DEFAULT_LOCATION
+
+def static_map_html(lat: float, lng: float, height: int = 300, zoom: int = STATIC_MAP_ZOOM, color: str = 'red') -> str:
+    tile_count = 2 ** zoom
+    pixel_x = (lng + 180) / 360 * tile_count * 256
+    pixel_y = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * tile_count * 256
+    
+    tiles = []
+    for tile_x in range(math.floor((pixel_x - STATIC_MAP_MAX_WIDTH / 2) / 256), math.floor((pixel_x + STATIC_MAP_MAX_WIDTH / 2) / 256) + 1):
+        for tile_y in range(math.floor((pixel_y - height / 2) / 256), math.floor((pixel_y + height / 2) / 256) + 1):
+            if not 0 <= tile_y < tile_count:
+                continue
+            url = STATIC_MAP_TILE_URL.format(z=zoom, x=tile_x % tile_count, y=tile_y)
+            tiles.append(
+                f'<img src="{url}" loading="lazy" alt="" '
+                f'style="position:absolute;left:{tile_x * 256 - pixel_x:.0f}px;top:{tile_y * 256 - pixel_y:.0f}px;width:256px;height:256px;">'
+            )
+    
+    return (
+        f'<div style="position:relative;width:100%;height:{height}px;overflow:hidden;background:#e5e3df;border-radius:4px;">'
+        f'<div style="position:absolute;left:50%;top:50%;">{"".join(tiles)}'
+        f'<div style="position:absolute;left:-8px;top:-8px;width:16px;height:16px;border-radius:50%;'
+        f'background:{color};border:3px solid white;box-shadow:0 0 4px rgba(0,0,0,0.5);"></div></div>'
+        f'<div style="position:absolute;right:4px;bottom:2px;font-size:10px;background:rgba(255,255,255,0.7);padding:0 3px;">© OpenStreetMap</div>'
+        f'</div>'
+    )
+
+def show_alert_location(alert: Dict, height: int = 300):
+    lat, lng = _alert_location(alert)
+    risk_level = (alert.get('risk_level') or 'medium').lower()
+    
+    st.markdown(static_map_html(lat, lng, height, color=RISK_LEVEL_COLORS.get(risk_level, 'blue')), unsafe_allow_html=True)
+    
+    if st.checkbox("🗺️ 交互地图", key=f"alert_map_open_{alert.get('id')}"):
+        st_folium(create_single_alert_map(alert, height=height), width='100%', height=height, key=f"alert_map_{alert.get('id')}")
+
+def create_single_alert_map(
+    alert: Dict,
+    height: int = 400
+) -> folium.Map:
+    lat, lng = _alert_location(alert)
     
     m = folium.Map(
         location=[lat, lng],
@@ -1,15 +1,80 @@
 import streamlit as st
+import atexit
 import threading
-import queue
 import time
 import logging
+import itertools
+import random
+from collections import OrderedDict, deque
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import heapq
+import uuid
+from utils.database import (
+    enqueue_notification, claim_notifications, ack_notifications, get_scheduled_notifications,
+    release_stale_notifications, renew_notification_leases, purge_sent_notifications, get_outbox_summary,
+    OUTBOX_LEASE_SECONDS, OUTBOX_LEASE_RENEW_INTERVAL
+)
+from utils.notification_transport import ProviderTransport
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+PRIORITY_NAMES = {rank: name for name, rank in PRIORITY_RANK.items()}
+
+CHANNEL_CONCURRENCY = {
+    "sms": 8,
+    "voice": 4,
+    "app": 16
+}
+HIGH_PRIORITY_RESERVED_WORKERS = 1
+PREFETCH_PER_WORKER = 2
+OUTBOX_IDLE_WAIT = 30
+
+CHANNEL_RATE_LIMITS = {
+    "sms": {"rate": 20, "burst": 40},
+    "voice": {"rate": 5, "burst": 10},
+    "app": {"rate": 100, "burst": 200}
+}
+RECIPIENT_RATE_LIMITS = {
+    "sms": {"rate": 0.2, "burst": 3},
+    "voice": {"rate": 1 / 60, "burst": 2},
+    "app": {"rate": 1, "burst": 5}
+}
+RECIPIENT_BUCKET_LIMIT = 10000
+COALESCE_LIMIT = 20
+
+RETRY_POLICIES = {
+    "sms": {"max_retries": 3, "base_delay": 30, "max_delay": 600},
+    "voice": {"max_retries": 3, "base_delay": 60, "max_delay": 900},
+    "app": {"max_retries": 5, "base_delay": 10, "max_delay": 300}
+}
+
+BREAKER_WINDOW = 50
+BREAKER_MIN_SAMPLES = 20
+BREAKER_MIN_SUCCESS_RATE = 0.5
+BREAKER_LATENCY_LIMITS = {
+    "sms": 5.0,
+    "voice": 10.0,
+    "app": 3.0
+}
+BREAKER_OPEN_SECONDS = 30
+BREAKER_HALF_OPEN_PROBES = 3
+BREAKER_DEFER_SECONDS = 1
+LATENCY_EWMA_ALPHA = 0.2
+
+FAILOVER_ROUTES = {
+    "high": {"sms": ["voice", "app"], "voice": ["sms", "app"], "app": ["sms"]},
+    "medium": {"sms": ["app"], "voice": ["app"]}
+}
+
+THROUGHPUT_WINDOW = 60
+LATENCY_SAMPLE_SIZE = 1000
+NOTIFICATION_LOG_SIZE = 100
+PUSH_LOG_SIZE = 20
+
 def rerun():
     if 'rerun' not in st.session_state:
         st.session_state.rerun = False
@@ -32,10 +97,40 @@ class Notification:
         self.last_retry_at = None
         self.status = "pending"
         self.error_message = None
+        self.next_attempt_at = None
+        self.merged_ids = [id]
+        self.merged_messages = [message]
         
+    @classmethod
+    def from_outbox(cls, row: Dict) -> 'Notification':
+        notification = cls(
+            id=row['id'],
+            recipient=row['recipient'],
+            message=row['message'],
+            priority=PRIORITY_NAMES.get(row['priority'], "low"),
+            notification_type=row['channel'],
+            retry_count=row['retry_count'],
+            max_retries=row['max_retries']
+        )
+        notification.next_attempt_at = row['next_attempt_at']
+        notification.error_message = row['last_error']
+        return notification
+    
+    def merge(self, other: 'Notification'):
+        self.merged_ids.extend(other.merged_ids)
+        self.retry_count = max(self.retry_count, other.retry_count)
+        for message in other.merged_messages:
+            if message not in self.merged_messages:
+                self.merged_messages.append(message)
+        
+        if len(self.merged_messages) > 1:
+            self.message = f"（合并{len(self.merged_ids)}条通知）\n" + "\n".join(self.merged_messages)
+    
+    def acks(self, state: str, next_attempt_at: float, error_message: str = None) -> List[Tuple]:
+        return [(state, self.retry_count, next_attempt_at, error_message, notification_id) for notification_id in self.merged_ids]
+    
     def __lt__(self, other):
-        priority_order = {"high": 0, "medium": 1, "low": 2}
-        return priority_order.get(self.priority, 2) < priority_order.get(other.priority, 2)
+        return PRIORITY_RANK.get(self.priority, 2) < PRIORITY_RANK.get(other.priority, 2)
 
 class NotificationChannel:
     def __init__(self, name: str):
@@ -43,10 +138,16 @@ class NotificationChannel:
         self.sent_count = 0
         self.failed_count = 0
         self.logs = []
+        self.lock = threading.Lock()
     
     def send(self, notification: Notification) -> bool:
         raise NotImplementedError("Subclasses must implement send method")
     
+    def submit(self, notification: Notification) -> Future:
+        result = Future()
+        result.set_result(self.send(notification))
+        return result
+    
     def log(self, notification: Notification, success: bool, error_message: str = None):
         log_entry = {
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -58,13 +159,17 @@ class NotificationChannel:
             "success": success,
             "error": error_message
         }
-        self.logs.append(log_entry)
+        with self.lock:
+            self.logs.append(log_entry)
+            
+            if success:
+                self.sent_count += 1
+            else:
+                self.failed_count += 1
         
         if success:
-            self.sent_count += 1
             logger.info(f"[{self.name}] Success: ID={notification.id}, Recipient={notification.recipient}")
         else:
-            self.failed_count += 1
             logger.error(f"[{self.name}] Failed: ID={notification.id}, Error={error_message}")
 
 class SMSChannel(NotificationChannel):
@@ -146,199 +251,760 @@ class AppPushChannel(NotificationChannel):
             self.log(notification, False, str(e))
             return False
 
-class NotificationSystem:
+class ProviderChannel(NotificationChannel):
+    def __init__(self, name: str, channel_type: str, transport: ProviderTransport):
+        super().__init__(name)
+        self.channel_type = channel_type
+        self.transport = transport
+    
+    def submit(self, notification: Notification) -> Future:
+        result = Future()
+        
+        def done(sent: Future):
+            try:
+                success, error_message = sent.result()
+            except Exception as e:
+                success, error_message = False, str(e)
+            self.log(notification, success, error_message)
+            result.set_result(success)
+        
+        self.transport.submit(self.channel_type, notification).add_done_callback(done)
+        return result
+    
+    def send(self, notification: Notification) -> bool:
+        return self.submit(notification).result()
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+    
+    def try_acquire(self) -> float:
+        with self.lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+    
+    def acquire(self) -> float:
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens -= 1
+            wait = max(0.0, -self.tokens / self.rate)
+        
+        if wait:
+            time.sleep(wait)
+        return wait
+
+class RecipientRateLimiter:
+    def __init__(self, rate: float, burst: float, max_recipients: int = RECIPIENT_BUCKET_LIMIT):
+        self.rate = rate
+        self.burst = burst
+        self.max_recipients = max_recipients
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def try_acquire(self, recipient: str) -> float:
+        with self.lock:
+            bucket = self.buckets.get(recipient)
+            if bucket is None:
+                bucket = self.buckets[recipient] = TokenBucket(self.rate, self.burst)
+                while len(self.buckets) > self.max_recipients:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(recipient)
+        
+        return bucket.try_acquire()
+
+class CircuitBreaker:
+    def __init__(self, latency_limit: float, window: int = BREAKER_WINDOW, min_samples: int = BREAKER_MIN_SAMPLES,
+                 min_success_rate: float = BREAKER_MIN_SUCCESS_RATE, open_seconds: float = BREAKER_OPEN_SECONDS,
+                 half_open_probes: int = BREAKER_HALF_OPEN_PROBES):
+        self.latency_limit = latency_limit
+        self.min_samples = min_samples
+        self.min_success_rate = min_success_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.outcomes = deque(maxlen=window)
+        self.latency_ewma = None
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.probes = 0
+        self.probe_successes = 0
+        self.opened_count = 0
+        self.lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    return False
+                self.state = "half_open"
+                self.probes = 0
+                self.probe_successes = 0
+            
+            if self.state == "half_open":
+                if self.probes >= self.half_open_probes:
+                    return False
+                self.probes += 1
+            return True
+    
+    def release(self):
+        with self.lock:
+            if self.state == "half_open" and self.probes:
+                self.probes -= 1
+    
+    def record(self, success: bool, latency: float) -> Optional[str]:
+        with self.lock:
+            previous = self.state
+            self.outcomes.append(success)
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma += LATENCY_EWMA_ALPHA * (latency - self.latency_ewma)
+            
+            if self.state == "half_open":
+                if not success:
+                    self._open()
+                else:
+                    self.probe_successes += 1
+                    if self.probe_successes >= self.half_open_probes:
+                        self.state = "closed"
+                        self.outcomes.clear()
+                        self.latency_ewma = latency
+            elif self.state == "closed" and len(self.outcomes) >= self.min_samples:
+                if self._success_rate() < self.min_success_rate or self.latency_ewma > self.latency_limit:
+                    self._open()
+            
+            return self.state if self.state != previous else None
+    
+    def _open(self):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.opened_count += 1
+    
+    def _success_rate(self) -> float:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 1.0
+    
+    def retry_in(self) -> float:
+        with self.lock:
+            if self.state != "open":
+                return 0.0
+            return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+    
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {
+                "breaker": self.state,
+                "success_rate": self._success_rate(),
+                "latency_ewma_ms": (self.latency_ewma or 0.0) * 1000,
+                "breaker_opened": self.opened_count
+            }
+
+def retry_delay(policy: Dict, retry_count: int) -> float:
+    delay = min(policy["max_delay"], policy["base_delay"] * 2 ** max(0, retry_count - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+class RetryScheduler:
     def __init__(self):
+        self.heap = []
+        self.lock = threading.Lock()
+        self.scheduled_count = 0
+        self.expired_count = 0
+    
+    def schedule(self, due: float, notification_id: int):
+        with self.lock:
+            heapq.heappush(self.heap, (due, notification_id))
+            self.scheduled_count += 1
+    
+    def pop_due(self, now: float = None) -> List[int]:
+        now = time.time() if now is None else now
+        due_ids = []
+        
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                due_ids.append(heapq.heappop(self.heap)[1])
+            self.expired_count += len(due_ids)
+        
+        return due_ids
+    
+    def next_due(self) -> Optional[float]:
+        with self.lock:
+            return self.heap[0][0] if self.heap else None
+    
+    def __len__(self) -> int:
+        return len(self.heap)
+
+class ChannelDispatcher:
+    def __init__(self, name: str, channel: NotificationChannel, concurrency: int, handler: Callable[[Notification], List[Tuple]],
+                 reserved_high: int = HIGH_PRIORITY_RESERVED_WORKERS, coalesce_limit: int = COALESCE_LIMIT,
+                 submit: Optional[Callable[[Notification], Future]] = None, owner: Optional[str] = None):
+        self.name = name
+        self.owner = owner or uuid.uuid4().hex
+        self.lease_checked_at = 0.0
+        self.channel = channel
+        self.concurrency = max(1, concurrency)
+        self.reserved_high = max(0, min(reserved_high, self.concurrency - 1))
+        self.prefetch = self.concurrency * PREFETCH_PER_WORKER
+        self.handler = handler
+        self.submit = submit
+        self.coalesce_limit = coalesce_limit
+        self.queue = []
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.workers = []
+        self.pump_thread = None
+        self.is_running = False
+        self.dirty = True
+        self.backlog = False
+        self.idle = False
+        self.next_wait = OUTBOX_IDLE_WAIT
+        self.acks = []
+        self.retries = RetryScheduler()
+        self.in_flight = 0
+        self.in_flight_low = 0
+        self.completed_at = deque()
+        self.queue_latencies = deque(maxlen=LATENCY_SAMPLE_SIZE)
+    
+    def notify(self):
+        with self.condition:
+            self.dirty = True
+            self.idle = False
+            self.condition.notify_all()
+    
+    def start(self):
+        with self.condition:
+            if self.is_running:
+                return
+            self.is_running = True
+            self.dirty = True
+        
+        for notification_id, due in get_scheduled_notifications(self.name):
+            self.retries.schedule(due, notification_id)
+        
+        if self.submit:
+            self.workers = [threading.Thread(target=self._submit_loop, name=f"notify-{self.name}-submit", daemon=True)]
+        else:
+            self.workers = [
+                threading.Thread(target=self._worker_loop, name=f"notify-{self.name}-{i}", daemon=True)
+                for i in range(self.concurrency)
+            ]
+        self.pump_thread = threading.Thread(target=self._pump_loop, name=f"notify-{self.name}-pump", daemon=True)
+        for thread in self.workers + [self.pump_thread]:
+            thread.start()
+    
+    def stop(self, timeout: float = 2):
+        with self.condition:
+            self.is_running = False
+            self.condition.notify_all()
+        
+        for thread in self.workers + [self.pump_thread]:
+            if thread:
+                thread.join(timeout=timeout)
+        self.workers = []
+        self.pump_thread = None
+        
+        with self.condition:
+            self.condition.wait_for(lambda: not self.in_flight, timeout)
+            acks, self.acks = self.acks, []
+            for _, _, notification in self.queue:
+                acks.extend(notification.acks("pending", notification.next_attempt_at, notification.error_message))
+            self.queue = []
+        ack_notifications(acks)
+    
+    def _claim(self) -> List[Notification]:
+        with self.condition:
+            acks, self.acks = self.acks, []
+            room = self.prefetch - len(self.queue)
+        
+        ack_notifications(acks)
+        for state, _, next_attempt_at, _, notification_id in acks:
+            if state == "pending":
+                self.retries.schedule(next_attempt_at, notification_id)
+        self.retries.pop_due()
+        self._maintain_leases()
+        
+        limit = room if room > 0 else self.concurrency
+        rows = claim_notifications(
+            self.name, limit, max_priority=2 if room > 0 else 0, coalesce_limit=self.coalesce_limit, owner=self.owner
+        )
+        self.backlog = room > 0 and len(rows) >= limit
+        
+        if self.backlog:
+            self.next_wait = OUTBOX_IDLE_WAIT
+        else:
+            next_due = self.retries.next_due()
+            self.next_wait = OUTBOX_IDLE_WAIT if next_due is None else min(OUTBOX_IDLE_WAIT, max(0.0, next_due - time.time()))
+        self.next_wait = min(self.next_wait, OUTBOX_LEASE_RENEW_INTERVAL)
+        
+        return [Notification.from_outbox(row) for row in rows]
+    
+    def _maintain_leases(self):
+        now = time.time()
+        if now - self.lease_checked_at < OUTBOX_LEASE_RENEW_INTERVAL:
+            return
+        
+        self.lease_checked_at = now
+        renew_notification_leases(self.name, self.owner, now)
+        released = release_stale_notifications(OUTBOX_LEASE_SECONDS, self.name)
+        if released:
+            logger.warning(f"[{self.channel.name}] Released {released} expired outbox leases")
+    
+    def _pump_loop(self):
+        while True:
+            with self.condition:
+                while self.is_running and not self.dirty and not self.acks:
+                    self.idle = not (self.queue or self.in_flight or self.backlog)
+                    if self.idle:
+                        self.condition.notify_all()
+                    if not self.condition.wait(timeout=self.next_wait):
+                        break
+                
+                if not self.is_running:
+                    return
+                self.dirty = False
+                self.idle = False
+            
+            try:
+                notifications = self._claim()
+            except Exception as e:
+                logger.error(f"[{self.channel.name}] Outbox error: {e}")
+                notifications = []
+                self.next_wait = 1
+            
+            if notifications:
+                with self.condition:
+                    self._enqueue(notifications)
+                    self.condition.notify_all()
+    
+    def _enqueue(self, notifications: List[Notification]):
+        mergeable = {}
+        if self.coalesce_limit:
+            for _, _, queued in self.queue:
+                if queued.priority != "high":
+                    mergeable[(queued.recipient, queued.priority)] = queued
+        
+        for notification in notifications:
+            key = (notification.recipient, notification.priority)
+            target = mergeable.get(key)
+            
+            if target is not None and len(target.merged_ids) < self.coalesce_limit:
+                target.merge(notification)
+                continue
+            
+            heapq.heappush(self.queue, (PRIORITY_RANK.get(notification.priority, 2), next(self.sequence), notification))
+            if self.coalesce_limit and notification.priority != "high":
+                mergeable[key] = notification
+    
+    def _can_take(self, rank: int) -> bool:
+        if self.in_flight >= self.concurrency:
+            return False
+        return rank == 0 or self.in_flight_low < self.concurrency - self.reserved_high
+    
+    def _take(self) -> Optional[Notification]:
+        with self.condition:
+            while self.is_running:
+                if self.queue and self._can_take(self.queue[0][0]):
+                    rank, _, notification = heapq.heappop(self.queue)
+                    self.in_flight += 1
+                    if rank:
+                        self.in_flight_low += 1
+                    self.queue_latencies.append(max(0.0, time.time() - notification.next_attempt_at))
+                    return notification
+                self.condition.wait()
+        return None
+    
+    def _worker_loop(self):
+        while True:
+            notification = self._take()
+            if notification is None:
+                return
+            
+            try:
+                acks = self.handler(notification)
+            except Exception as e:
+                acks = self._dispatch_error(notification, e)
+            self._complete(notification, acks)
+    
+    def _submit_loop(self):
+        while True:
+            notification = self._take()
+            if notification is None:
+                return
+            
+            try:
+                future = self.submit(notification)
+            except Exception as e:
+                self._complete(notification, self._dispatch_error(notification, e))
+                continue
+            future.add_done_callback(lambda done, notification=notification: self._settle(notification, done))
+    
+    def _settle(self, notification: Notification, done: Future):
+        try:
+            acks = done.result()
+        except Exception as e:
+            acks = self._dispatch_error(notification, e)
+        self._complete(notification, acks)
+    
+    def _dispatch_error(self, notification: Notification, error: Exception) -> List[Tuple]:
+        logger.error(f"[{self.channel.name}] Dispatch error: ID={notification.id}, Error={error}")
+        return notification.acks("dead", time.time(), str(error))
+    
+    def _complete(self, notification: Notification, acks: List[Tuple]):
+        now = time.monotonic()
+        with self.condition:
+            self.in_flight -= 1
+            if PRIORITY_RANK.get(notification.priority, 2):
+                self.in_flight_low -= 1
+            self.acks.extend(acks)
+            self.completed_at.append(now)
+            while self.completed_at and now - self.completed_at[0] > THROUGHPUT_WINDOW:
+                self.completed_at.popleft()
+            self.condition.notify_all()
+    
+    def wait_until_idle(self, timeout: float = None) -> bool:
+        with self.condition:
+            return self.condition.wait_for(lambda: self.idle, timeout)
+    
+    def get_metrics(self) -> Dict:
+        now = time.monotonic()
+        
+        with self.condition:
+            queued_high = sum(1 for rank, _, _ in self.queue if rank == 0)
+            recent = sum(1 for completed in self.completed_at if now - completed <= THROUGHPUT_WINDOW)
+            latencies = sorted(self.queue_latencies)
+            metrics = {
+                "queued_high": queued_high,
+                "queued_low": len(self.queue) - queued_high,
+                "in_flight": self.in_flight,
+                "concurrency": self.concurrency,
+                "throughput": recent / THROUGHPUT_WINDOW,
+                "retry_scheduled": len(self.retries)
+            }
+        
+        metrics["queue_latency_avg_ms"] = sum(latencies) / len(latencies) * 1000 if latencies else 0.0
+        metrics["queue_latency_p95_ms"] = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0
+        return metrics
+
+class NotificationSystem:
+    def __init__(self, concurrency: Optional[Dict[str, int]] = None, retry_policies: Optional[Dict[str, Dict]] = None,
+                 rate_limited: bool = True, transport: Optional[ProviderTransport] = None,
+                 failover_routes: Optional[Dict[str, Dict[str, List[str]]]] = None):
+        self.owner = uuid.uuid4().hex
         self.channels = {
             "sms": SMSChannel(),
             "voice": VoiceCallChannel(),
             "app": AppPushChannel()
         }
-        self.priority_queue = []
-        self.low_priority_queue = queue.Queue()
-        self.notification_counter = 0
+        self.transport = transport
+        provider_concurrency = {}
+        if transport:
+            for name, channel in self.channels.items():
+                if transport.has_channel(name):
+                    self.channels[name] = ProviderChannel(channel.name, name, transport)
+                    provider_concurrency[name] = transport.limits[name]["max_in_flight"]
+        
+        concurrency = {**CHANNEL_CONCURRENCY, **provider_concurrency, **(concurrency or {})}
+        self.dispatchers = {
+            name: ChannelDispatcher(
+                name, channel, concurrency.get(name, 1), self._deliver,
+                submit=self._submit if isinstance(channel, ProviderChannel) else None, owner=self.owner
+            )
+            for name, channel in self.channels.items()
+        }
+        self.retry_policies = {
+            name: {**RETRY_POLICIES.get(name, RETRY_POLICIES["sms"]), **(retry_policies or {}).get(name, {})}
+            for name in self.channels
+        }
+        self.rate_limited = rate_limited
+        self.channel_limits = {
+            name: TokenBucket(**CHANNEL_RATE_LIMITS[name]) for name in self.channels if name in CHANNEL_RATE_LIMITS
+        }
+        self.recipient_limits = {
+            name: RecipientRateLimiter(**RECIPIENT_RATE_LIMITS[name]) for name in self.channels if name in RECIPIENT_RATE_LIMITS
+        }
+        self.breakers = {
+            name: CircuitBreaker(BREAKER_LATENCY_LIMITS.get(name, BREAKER_LATENCY_LIMITS["sms"])) for name in self.channels
+        }
+        self.failover_routes = FAILOVER_ROUTES if failover_routes is None else failover_routes
+        self.throttled_counts = {name: 0 for name in self.channels}
+        self.merged_counts = {name: 0 for name in self.channels}
+        self.failover_counts = {name: 0 for name in self.channels}
         self.is_running = False
-        self.worker_thread = None
-        self.retry_queue = []
-        self.retry_interval = 300
         self.lock = threading.Lock()
-        
-        if "notification_logs" not in st.session_state:
-            st.session_state.notification_logs = []
-        
-        if "push_notifications" not in st.session_state:
-            st.session_state.push_notifications = []
+        self.notification_logs = []
+        self.push_notifications = []
     
     def add_notification(self, recipient: str, message: str, priority: str = "low", 
                       notification_type: str = "sms") -> int:
-        with self.lock:
-            self.notification_counter += 1
-            notification_id = self.notification_counter
-        
-        notification = Notification(
-            id=notification_id,
-            recipient=recipient,
-            message=message,
-            priority=priority,
-            notification_type=notification_type
-        )
+        dispatcher = self.dispatchers.get(notification_type)
+        if not dispatcher:
+            logger.error(f"Unknown channel: {notification_type}")
+            return None
         
-        if priority == "high":
-            heapq.heappush(self.priority_queue, notification)
-        else:
-            self.low_priority_queue.put(notification)
+        notification_id = enqueue_notification(
+            recipient, message, notification_type, PRIORITY_RANK.get(priority, 2),
+            max_retries=self.retry_policies[notification_type]["max_retries"]
+        )
+        dispatcher.notify()
         
         logger.info(f"Notification added: ID={notification_id}, Priority={priority}, Type={notification_type}")
         
         return notification_id
     
-    def send_notification(self, notification: Notification) -> bool:
-        channel = self.channels.get(notification.notification_type)
+    def send_notification(self, notification: Notification, route: str = None) -> bool:
+        route = route or notification.notification_type
+        channel = self.channels.get(route)
         
         if not channel:
-            logger.error(f"Unknown channel: {notification.notification_type}")
+            logger.error(f"Unknown channel: {route}")
             return False
         
+        started = time.monotonic()
         success = channel.send(notification)
+        self._record_health(route, success, time.monotonic() - started)
+        self._update_status(notification, success, route)
         
+        return success
+    
+    def _update_status(self, notification: Notification, success: bool, route: str):
         if success:
             notification.status = "sent"
-            self._update_session_state(notification, success)
         else:
             notification.status = "failed"
             notification.error_message = "Send failed"
-            self._update_session_state(notification, success)
+        self._record_result(notification, success, route)
+    
+    def _record_health(self, route: str, success: bool, latency: float):
+        breaker = self.breakers.get(route)
+        state = breaker.record(success, latency) if breaker else None
         
-        return success
+        if state == "open":
+            logger.warning(f"Circuit breaker opened for {route}, retry in {breaker.open_seconds} seconds")
+        elif state == "closed":
+            logger.info(f"Circuit breaker closed for {route}")
+    
+    def _route(self, notification: Notification) -> Tuple[Optional[str], float]:
+        primary = notification.notification_type
+        candidates = [primary] + self.failover_routes.get(notification.priority, {}).get(primary, [])
+        
+        for name in candidates:
+            breaker = self.breakers.get(name)
+            if name in self.channels and (breaker is None or breaker.allow()):
+                return name, 0.0
+        
+        breaker = self.breakers.get(primary)
+        return None, max(BREAKER_DEFER_SECONDS, breaker.retry_in() if breaker else 0.0)
+    
+    def _throttle(self, notification: Notification, channel_name: str) -> float:
+        recipient_limit = self.recipient_limits.get(channel_name)
+        channel_limit = self.channel_limits.get(channel_name)
+        
+        deferred = recipient_limit.try_acquire(notification.recipient) if recipient_limit else 0.0
+        waited = channel_limit.acquire() if channel_limit and not deferred else 0.0
+        
+        if deferred or waited:
+            with self.lock:
+                self.throttled_counts[channel_name] += 1
+        return deferred
+    
+    def _admit(self, notification: Notification) -> Tuple[Optional[str], Optional[List[Tuple]]]:
+        route, deferred = self._route(notification)
+        if route is None:
+            logger.info(f"Notification {notification.id} deferred {deferred:.1f} seconds, no healthy channel")
+            return None, notification.acks("pending", time.time() + deferred, notification.error_message)
+        
+        if self.rate_limited:
+            deferred = self._throttle(notification, route)
+            if deferred:
+                self.breakers[route].release()
+                logger.info(f"Notification {notification.id} throttled for {deferred:.1f} seconds")
+                return None, notification.acks("pending", time.time() + deferred, notification.error_message)
+        
+        with self.lock:
+            if route != notification.notification_type:
+                self.failover_counts[notification.notification_type] += len(notification.merged_ids)
+            if len(notification.merged_ids) > 1:
+                self.merged_counts[notification.notification_type] += len(notification.merged_ids) - 1
+        return route, None
+    
+    def _deliver(self, notification: Notification) -> List[Tuple]:
+        route, acks = self._admit(notification)
+        if acks is not None:
+            return acks
+        return self._outcome(notification, self.send_notification(notification, route))
+    
+    def _submit(self, notification: Notification) -> Future:
+        result = Future()
+        route, acks = self._admit(notification)
+        if acks is not None:
+            result.set_result(acks)
+            return result
+        
+        started = time.monotonic()
+        
+        def done(sent: Future):
+            try:
+                success = sent.result()
+                self._record_health(route, success, time.monotonic() - started)
+                self._update_status(notification, success, route)
+                result.set_result(self._outcome(notification, success))
+            except Exception as e:
+                result.set_exception(e)
+        
+        self.channels[route].submit(notification).add_done_callback(done)
+        return result
+    
+    def _outcome(self, notification: Notification, success: bool) -> List[Tuple]:
+        now = time.time()
+        
+        if success:
+            return notification.acks("sent", now)
+        
+        if notification.retry_count < notification.max_retries:
+            notification.retry_count += 1
+            delay = retry_delay(self.retry_policies[notification.notification_type], notification.retry_count)
+            logger.warning(f"Notification {notification.id} retry {notification.retry_count}/{notification.max_retries} in {delay:.0f} seconds")
+            return notification.acks("pending", now + delay, notification.error_message)
+        
+        logger.error(f"Notification {notification.id} moved to dead letter after {notification.retry_count} retries")
+        return notification.acks("dead", now, notification.error_message)
     
-    def _update_session_state(self, notification: Notification, success: bool):
+    def _record_result(self, notification: Notification, success: bool, route: str):
         log_entry = {
             "id": notification.id,
             "recipient": notification.recipient,
             "message": notification.message,
-            "type": notification.notification_type,
+            "type": route,
             "priority": notification.priority,
             "status": "sent" if success else "failed",
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
-        st.session_state.notification_logs.insert(0, log_entry)
-        
-        if len(st.session_state.notification_logs) > 100:
-            st.session_state.notification_logs.pop()
-        
-        if notification.notification_type == "app" and success:
-            push_entry = {
-                "title": "紧急通知",
-                "message": notification.message,
-                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "priority": notification.priority
-            }
-            st.session_state.push_notifications.insert(0, push_entry)
+        with self.lock:
+            self.notification_logs.insert(0, log_entry)
             
-            if len(st.session_state.push_notifications) > 20:
-                st.session_state.push_notifications.pop()
-    
-    def process_high_priority(self):
-        while self.priority_queue:
-            notification = heapq.heappop(self.priority_queue)
-            success = self.send_notification(notification)
+            if len(self.notification_logs) > NOTIFICATION_LOG_SIZE:
+                self.notification_logs.pop()
             
-            if not success and notification.retry_count < notification.max_retries:
-                notification.retry_count += 1
-                notification.last_retry_at = datetime.now()
-                self.retry_queue.append(notification)
-                logger.warning(f"Notification {notification.id} will retry in {self.retry_interval} seconds")
-    
-    def process_low_priority(self):
-        batch_size = 5
-        batch = []
-        
-        while len(batch) < batch_size and not self.low_priority_queue.empty():
-            try:
-                notification = self.low_priority_queue.get_nowait()
-                batch.append(notification)
-            except queue.Empty:
-                break
-        
-        for notification in batch:
-            success = self.send_notification(notification)
-            
-            if not success and notification.retry_count < notification.max_retries:
-                notification.retry_count += 1
-                notification.last_retry_at = datetime.now()
-                self.retry_queue.append(notification)
-                logger.warning(f"Notification {notification.id} will retry in {self.retry_interval} seconds")
-    
-    def process_retries(self):
-        now = datetime.now()
-        remaining_retries = []
-        
-        for notification in self.retry_queue:
-            if notification.last_retry_at:
-                time_since_retry = (now - notification.last_retry_at).total_seconds()
+            if route == "app" and success:
+                push_entry = {
+                    "title": "紧急通知",
+                    "message": notification.message,
+                    "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "priority": notification.priority
+                }
+                self.push_notifications.insert(0, push_entry)
                 
-                if time_since_retry >= self.retry_interval:
-                    success = self.send_notification(notification)
-                    
-                    if not success and notification.retry_count < notification.max_retries:
-                        notification.retry_count += 1
-                        notification.last_retry_at = datetime.now()
-                        remaining_retries.append(notification)
-                        logger.warning(f"Notification {notification.id} retry {notification.retry_count}/{notification.max_retries}")
-                else:
-                    remaining_retries.append(notification)
-        
-        self.retry_queue = remaining_retries
+                if len(self.push_notifications) > PUSH_LOG_SIZE:
+                    self.push_notifications.pop()
+    
+    def clear_logs(self):
+        with self.lock:
+            self.notification_logs = []
+            self.push_notifications = []
     
     def start(self):
         if self.is_running:
             return
         
         self.is_running = True
-        self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
-        self.worker_thread.start()
+        released = release_stale_notifications()
+        if released:
+            logger.warning(f"Released {released} stale outbox claims")
+        purge_sent_notifications(self.channels)
+        if self.transport:
+            self.transport.start()
+        
+        for dispatcher in self.dispatchers.values():
+            dispatcher.start()
         logger.info("Notification system started")
     
     def stop(self):
         self.is_running = False
-        if self.worker_thread:
-            self.worker_thread.join(timeout=2)
+        for dispatcher in self.dispatchers.values():
+            dispatcher.stop()
+        if self.transport:
+            self.transport.stop()
         logger.info("Notification system stopped")
     
-    def _worker_loop(self):
-        while self.is_running:
-            self.process_high_priority()
-            self.process_low_priority()
-            self.process_retries()
-            time.sleep(1)
+    def wait_until_idle(self, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        for dispatcher in self.dispatchers.values():
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if not dispatcher.wait_until_idle(remaining):
+                return False
+        return True
     
     def get_statistics(self) -> Dict:
         total_sent = sum(channel.sent_count for channel in self.channels.values())
         total_failed = sum(channel.failed_count for channel in self.channels.values())
+        dispatch_metrics = {name: dispatcher.get_metrics() for name, dispatcher in self.dispatchers.items()}
+        outbox = get_outbox_summary()
+        
+        def outbox_count(field: str, ranks) -> int:
+            return sum(
+                counts[field]
+                for channel_counts in outbox["pending"].values()
+                for rank, counts in channel_counts.items()
+                if rank in ranks
+            )
+        
+        retrying = outbox_count("retrying", (0, 1, 2))
+        pending_high = outbox_count("queued", (0,)) - outbox_count("retrying", (0,))
+        pending_low = outbox_count("queued", (1, 2)) - outbox_count("retrying", (1, 2))
         
         return {
             "total_sent": total_sent,
             "total_failed": total_failed,
-            "pending_high": len(self.priority_queue),
-            "pending_low": self.low_priority_queue.qsize(),
-            "retrying": len(self.retry_queue),
+            "pending_high": pending_high + sum(metrics["queued_high"] for metrics in dispatch_metrics.values()),
+            "pending_low": pending_low + sum(metrics["queued_low"] for metrics in dispatch_metrics.values()),
+            "retrying": retrying,
+            "dead": sum(outbox["dead"].values()),
+            "throttled": sum(self.throttled_counts.values()),
+            "merged": sum(self.merged_counts.values()),
+            "failover": sum(self.failover_counts.values()),
             "channels": {
                 name: {
                     "sent": channel.sent_count,
-                    "failed": channel.failed_count
+                    "failed": channel.failed_count,
+                    "dead": outbox["dead"].get(name, 0),
+                    "throttled": self.throttled_counts[name],
+                    "merged": self.merged_counts[name],
+                    "failover": self.failover_counts[name],
+                    "breaker_retry_in": self.breakers[name].retry_in(),
+                    **self.breakers[name].snapshot(),
+                    **dispatch_metrics[name]
                 }
                 for name, channel in self.channels.items()
             }
         }
 
+_notification_system = None
+_notification_system_lock = threading.Lock()
+
+def get_notification_system() -> NotificationSystem:
+    global _notification_system
+    with _notification_system_lock:
+        if _notification_system is None:
+            _notification_system = NotificationSystem(transport=ProviderTransport.from_env())
+            _notification_system.start()
+            atexit.register(_notification_system.stop)
+    return _notification_system
+
 def show_notification_system_ui():
     st.subheader("📢 多通道通知系统")
     
-    if "notification_system" not in st.session_state:
-        st.session_state.notification_system = NotificationSystem()
-        st.session_state.notification_system.start()
-    
-    notification_system = st.session_state.notification_system
+    notification_system = get_notification_system()
     
     col1, col2, col3 = st.columns(3)
     
@@ -397,8 +1063,7 @@ def show_notification_system_ui():
     
     with col3:
         if st.button("🧹 清空日志", key="clear_notify_logs"):
-            st.session_state.notification_logs = []
-            st.session_state.push_notifications = []
+            notification_system.clear_logs()
             st.session_state.rerun = True
             rerun()
     
@@ -406,7 +1071,7 @@ def show_notification_system_ui():
     
     stats = notification_system.get_statistics()
     
-    col1, col2, col3, col4, col5 = st.columns(5)
+    col1, col2, col3, col4, col5, col6 = st.columns(6)
     
     with col1:
         st.metric("已发送", stats['total_sent'])
@@ -423,6 +1088,9 @@ def show_notification_system_ui():
     with col5:
         st.metric("重试队列", stats['retrying'])
     
+    with col6:
+        st.metric("死信", stats['dead'], delta_color="inverse")
+    
     st.markdown("---")
     
     tab1, tab2, tab3 = st.tabs(["📋 通知日志", "📱 APP推送", "📊 通道统计"])
@@ -430,8 +1098,8 @@ def show_notification_system_ui():
     with tab1:
         st.subheader("通知发送日志")
         
-        if st.session_state.notification_logs:
-            for log in st.session_state.notification_logs[:20]:
+        if notification_system.notification_logs:
+            for log in notification_system.notification_logs[:20]:
                 with st.container():
                     status_emoji = {
                         "sent": "✅",
@@ -466,8 +1134,8 @@ def show_notification_system_ui():
     with tab2:
         st.subheader("APP推送通知")
         
-        if st.session_state.push_notifications:
-            for push in st.session_state.push_notifications:
+        if notification_system.push_notifications:
+            for push in notification_system.push_notifications:
                 with st.container():
                     priority_emoji = {
                         "high": "🔴",
@@ -495,7 +1163,7 @@ def show_notification_system_ui():
                 "app": "🔔 APP通道"
             }
             
-            col1, col2, col3 = st.columns(3)
+            col1, col2, col3, col4, col5 = st.columns(5)
             
             with col1:
                 st.markdown(f"### {channel_badge.get(channel_name, channel_name)}")
@@ -506,14 +1174,62 @@ def show_notification_system_ui():
             with col3:
                 st.metric("发送失败", channel_stats['failed'], delta_color="inverse")
             
+            with col4:
+                st.metric("等待重试", channel_stats['retry_scheduled'])
+            
+            with col5:
+                st.metric("死信", channel_stats['dead'], delta_color="inverse")
+            
+            col1, col2, col3, col4, col5, col6 = st.columns(6)
+            
+            with col1:
+                st.metric("并发发送", f"{channel_stats['in_flight']}/{channel_stats['concurrency']}")
+            
+            with col2:
+                st.metric("吞吐量", f"{channel_stats['throughput']:.2f} 条/秒")
+            
+            with col3:
+                st.metric("平均排队", f"{channel_stats['queue_latency_avg_ms']:.0f} ms")
+            
+            with col4:
+                st.metric("P95 排队", f"{channel_stats['queue_latency_p95_ms']:.0f} ms")
+            
+            with col5:
+                st.metric("限流次数", channel_stats['throttled'])
+            
+            with col6:
+                st.metric("合并条数", channel_stats['merged'])
+            
+            breaker_badge = {
+                "closed": "🟢 正常",
+                "half_open": "🟡 半开试探",
+                "open": "🔴 已熔断"
+            }
+            
+            col1, col2, col3, col4, col5, col6 = st.columns(6)
+            
+            with col1:
+                st.metric("熔断状态", breaker_badge.get(channel_stats['breaker'], channel_stats['breaker']))
+            
+            with col2:
+                st.metric("成功率", f"{channel_stats['success_rate'] * 100:.1f}%")
+            
+            with col3:
+                st.metric("延迟 EWMA", f"{channel_stats['latency_ewma_ms']:.0f} ms")
+            
+            with col4:
+                st.metric("熔断次数", channel_stats['breaker_opened'])
+            
+            with col5:
+                st.metric("恢复倒计时", f"{channel_stats['breaker_retry_in']:.0f} 秒")
+            
+            with col6:
+                st.metric("转移发送", channel_stats['failover'])
+            
             st.markdown("---")
 
 def send_emergency_notification(recipient: str, message: str, notification_type: str = "sms"):
-    if "notification_system" not in st.session_state:
-        st.session_state.notification_system = NotificationSystem()
-        st.session_state.notification_system.start()
-    
-    notification_system = st.session_state.notification_system
+    notification_system = get_notification_system()
     
     notification_id = notification_system.add_notification(
         recipient=recipient,
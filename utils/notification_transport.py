@@ -0,0 +1,552 @@
+import asyncio
+import json
+import os
+import random
+import ssl
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from utils.config_manager import ConfigManager
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_URL_KEYS = {
+    "sms": "SMS_PROVIDER_URL",
+    "voice": "VOICE_PROVIDER_URL",
+    "app": "PUSH_PROVIDER_URL"
+}
+PROVIDER_API_KEYS = {
+    "sms": "SMS_API_KEY",
+    "voice": "NOTIFICATION_API_KEY",
+    "app": "NOTIFICATION_API_KEY"
+}
+PROVIDER_PATHS = {
+    "sms": "/sms/send",
+    "voice": "/voice/call",
+    "app": "/push/send"
+}
+
+PROVIDER_DEFAULT_LIMITS = {"max_in_flight": 256, "max_connections": 32, "timeout": 5.0, "connect_timeout": 2.0}
+PROVIDER_LIMITS = {
+    "sms": {"max_in_flight": 256, "max_connections": 32},
+    "voice": {"max_in_flight": 64, "max_connections": 16, "timeout": 10.0},
+    "app": {"max_in_flight": 512, "max_connections": 64}
+}
+PROVIDER_DEFAULT_PORTS = {"http": 80, "https": 443}
+PROVIDER_LATENCY_SAMPLE_SIZE = 1000
+MAX_MESSAGE_SIZE = 1 << 20
+STUB_BACKLOG = 4096
+STUB_FRAMINGS = ("content-length", "chunked", "close")
+SHUTDOWN_TIMEOUT = 5
+
+class ProviderError(Exception):
+    pass
+
+class ProviderClosedError(ConnectionResetError):
+    pass
+
+async def read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+async def read_chunked(reader: asyncio.StreamReader) -> bytes:
+    chunks = []
+    total = 0
+    while True:
+        size_line = await reader.readline()
+        if not size_line:
+            raise asyncio.IncompleteReadError(b"".join(chunks), None)
+        try:
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+        except ValueError:
+            raise ProviderError(f"Malformed chunk size: {size_line!r}")
+        if size == 0:
+            await read_headers(reader)
+            return b"".join(chunks)
+        
+        total += size
+        if total > MAX_MESSAGE_SIZE:
+            raise ProviderError(f"Message too large: more than {MAX_MESSAGE_SIZE} bytes")
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+async def read_until_eof(reader: asyncio.StreamReader) -> bytes:
+    body = await reader.read(MAX_MESSAGE_SIZE + 1)
+    while len(body) <= MAX_MESSAGE_SIZE:
+        chunk = await reader.read(MAX_MESSAGE_SIZE + 1 - len(body))
+        if not chunk:
+            return body
+        body += chunk
+    raise ProviderError(f"Message too large: more than {MAX_MESSAGE_SIZE} bytes")
+
+def has_framed_body(headers: Dict[str, str]) -> bool:
+    return "content-length" in headers or "chunked" in headers.get("transfer-encoding", "").lower()
+
+def response_has_body(status_line: str) -> bool:
+    parts = status_line.split(" ", 2)
+    return not (len(parts) > 1 and (parts[1].startswith("1") or parts[1] in ("204", "304")))
+
+async def read_message(reader: asyncio.StreamReader, response: bool = False) -> Optional[Tuple[str, Dict[str, str], bytes]]:
+    start_line = await reader.readline()
+    if not start_line:
+        return None
+    
+    start_line = start_line.decode("latin-1").strip()
+    headers = await read_headers(reader)
+    
+    if response and not response_has_body(start_line):
+        body = b""
+    elif "chunked" in headers.get("transfer-encoding", "").lower():
+        body = await read_chunked(reader)
+    elif "content-length" in headers:
+        length = int(headers["content-length"])
+        if length > MAX_MESSAGE_SIZE:
+            raise ProviderError(f"Message too large: {length} bytes")
+        body = await reader.readexactly(length) if length else b""
+    elif response:
+        body = await read_until_eof(reader)
+    else:
+        body = b""
+    return start_line, headers, body
+
+def encode_message(start_line: str, headers: Dict[str, str], body: bytes, framing: str = "content-length") -> bytes:
+    lines = [start_line]
+    if framing == "content-length":
+        lines.append(f"Content-Length: {len(body)}")
+    elif framing == "chunked":
+        lines.append("Transfer-Encoding: chunked")
+        body = (f"{len(body):x}\r\n".encode("latin-1") + body + b"\r\n" if body else b"") + b"0\r\n\r\n"
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+def _shutdown_loop(loop: asyncio.AbstractEventLoop):
+    tasks = [task for task in asyncio.all_tasks(loop) if not task.done()]
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+    loop.close()
+
+class HTTPConnectionPool:
+    def __init__(self, host: str, port: int, max_connections: int, connect_timeout: float,
+                 ssl_context: Optional[ssl.SSLContext] = None):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.ssl_context = ssl_context
+        self.max_connections = max_connections
+        self.connections = asyncio.Semaphore(max_connections)
+        self.idle = []
+        self.active = 0
+        self.max_active = 0
+        self.opened_count = 0
+        self.reused_count = 0
+    
+    async def request(self, method: str, path: str, body: bytes, headers: Dict[str, str]) -> Tuple[int, bytes]:
+        async with self.connections:
+            reader, writer, reused = await self._acquire()
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            
+            try:
+                response = await self._exchange(reader, writer, method, path, body, headers)
+            except ProviderClosedError:
+                writer.close()
+                if not reused:
+                    raise
+                reader, writer, _ = await self._connect()
+                try:
+                    response = await self._exchange(reader, writer, method, path, body, headers)
+                except BaseException:
+                    writer.close()
+                    raise
+            except BaseException:
+                writer.close()
+                raise
+            finally:
+                self.active -= 1
+            
+            status, response_headers, response_body, keep_alive = response
+            if not keep_alive:
+                writer.close()
+            else:
+                self.idle.append((reader, writer))
+            return status, response_body
+    
+    async def _acquire(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        while self.idle:
+            reader, writer = self.idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                self.reused_count += 1
+                return reader, writer, True
+            writer.close()
+        return await self._connect()
+    
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                self.host, self.port, ssl=self.ssl_context,
+                server_hostname=self.host if self.ssl_context else None
+            ),
+            self.connect_timeout
+        )
+        self.opened_count += 1
+        return reader, writer, False
+    
+    async def _exchange(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str,
+                        body: bytes, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes, bool]:
+        request_headers = {"Host": f"{self.host}:{self.port}", "Connection": "keep-alive", **headers}
+        writer.write(encode_message(f"{method} {path} HTTP/1.1", request_headers, body))
+        await writer.drain()
+        
+        response = await read_message(reader, response=True)
+        if response is None:
+            raise ProviderClosedError("Connection closed by provider")
+        
+        status_line, response_headers, response_body = response
+        parts = status_line.split(" ", 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise ProviderError(f"Malformed status line: {status_line}")
+        
+        connection = response_headers.get("connection", "").lower()
+        keep_alive = (
+            connection != "close"
+            and (parts[0] != "HTTP/1.0" or connection == "keep-alive")
+            and (has_framed_body(response_headers) or not response_has_body(status_line))
+        )
+        return int(parts[1]), response_headers, response_body, keep_alive
+    
+    async def close(self):
+        idle, self.idle = self.idle, []
+        for _, writer in idle:
+            writer.close()
+
+class AsyncProviderChannel:
+    def __init__(self, name: str, url: str, pool: HTTPConnectionPool, max_in_flight: int, timeout: float,
+                 api_key: Optional[str] = None):
+        self.name = name
+        self.url = url
+        self.path = urlsplit(url).path or "/"
+        self.pool = pool
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.api_key = api_key
+        self.slots = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.sent_count = 0
+        self.failed_count = 0
+        self.timeout_count = 0
+        self.latencies = deque(maxlen=PROVIDER_LATENCY_SAMPLE_SIZE)
+    
+    def payload(self, notification) -> Dict:
+        return {
+            "id": notification.id,
+            "to": notification.recipient,
+            "message": notification.message,
+            "priority": notification.priority
+        }
+    
+    def headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json; charset=utf-8"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+    
+    async def send(self, notification) -> Tuple[bool, Optional[str]]:
+        body = json.dumps(self.payload(notification), ensure_ascii=False).encode("utf-8")
+        
+        async with self.slots:
+            self.in_flight += 1
+            started = time.monotonic()
+            
+            try:
+                status, _ = await asyncio.wait_for(self.pool.request("POST", self.path, body, self.headers()), self.timeout)
+                error = None if 200 <= status < 300 else f"HTTP {status}"
+            except asyncio.TimeoutError:
+                self.timeout_count += 1
+                error = f"Timeout after {self.timeout:.1f}s"
+            except (OSError, ProviderError, asyncio.IncompleteReadError) as e:
+                error = str(e) or type(e).__name__
+            finally:
+                self.in_flight -= 1
+            
+            self.latencies.append(time.monotonic() - started)
+        
+        if error:
+            self.failed_count += 1
+            return False, error
+        
+        self.sent_count += 1
+        return True, None
+    
+    def get_metrics(self) -> Dict:
+        latencies = sorted(self.latencies)
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "sent": self.sent_count,
+            "failed": self.failed_count,
+            "timeouts": self.timeout_count,
+            "max_connections": self.pool.max_connections,
+            "connections_opened": self.pool.opened_count,
+            "connections_reused": self.pool.reused_count,
+            "latency_avg_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            "latency_p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0
+        }
+
+class AsyncSMSChannel(AsyncProviderChannel):
+    pass
+
+class AsyncVoiceCallChannel(AsyncProviderChannel):
+    def payload(self, notification) -> Dict:
+        return {
+            "id": notification.id,
+            "to": notification.recipient,
+            "tts": notification.message,
+            "priority": notification.priority
+        }
+
+class AsyncAppPushChannel(AsyncProviderChannel):
+    def payload(self, notification) -> Dict:
+        return {
+            "id": notification.id,
+            "user_id": notification.recipient,
+            "title": "紧急通知",
+            "body": notification.message,
+            "priority": notification.priority
+        }
+
+PROVIDER_CHANNELS = {
+    "sms": AsyncSMSChannel,
+    "voice": AsyncVoiceCallChannel,
+    "app": AsyncAppPushChannel
+}
+
+class ProviderTransport:
+    def __init__(self, endpoints: Dict[str, str], api_keys: Optional[Dict[str, str]] = None,
+                 limits: Optional[Dict[str, Dict]] = None, ssl_context: Optional[ssl.SSLContext] = None):
+        self.endpoints = dict(endpoints)
+        self.api_keys = api_keys or {}
+        self.ssl_context = ssl_context
+        self.limits = {
+            name: {**PROVIDER_DEFAULT_LIMITS, **PROVIDER_LIMITS.get(name, {}), **(limits or {}).get(name, {})}
+            for name in self.endpoints
+        }
+        self.channels = {}
+        self.pools = {}
+        self.loop = None
+        self.thread = None
+        self.lock = threading.Lock()
+    
+    @classmethod
+    def from_env(cls) -> Optional['ProviderTransport']:
+        config = ConfigManager()
+        
+        def configured(key: str) -> Optional[str]:
+            value = config.get(key) or os.getenv(key)
+            return value if value and value != f'your_{key.lower()}_here' else None
+        
+        endpoints = {name: configured(key) for name, key in PROVIDER_URL_KEYS.items()}
+        endpoints = {name: url for name, url in endpoints.items() if url}
+        if not endpoints:
+            return None
+        
+        api_keys = {name: configured(PROVIDER_API_KEYS[name]) for name in endpoints}
+        return cls(endpoints, api_keys)
+    
+    def start(self) -> 'ProviderTransport':
+        with self.lock:
+            if self.loop is not None:
+                return self
+            
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever, name="notify-transport", daemon=True)
+            self.thread.start()
+        
+        asyncio.run_coroutine_threadsafe(self._open(), self.loop).result()
+        logger.info(f"Provider transport started: {', '.join(sorted(self.endpoints))}")
+        return self
+    
+    async def _open(self):
+        for name, url in self.endpoints.items():
+            parts = urlsplit(url)
+            if parts.scheme not in PROVIDER_DEFAULT_PORTS or not parts.hostname:
+                raise ProviderError(f"Unsupported provider URL for {name}: {url}")
+            
+            limits = self.limits[name]
+            key = (name, parts.hostname, parts.port or PROVIDER_DEFAULT_PORTS[parts.scheme])
+            if key not in self.pools:
+                ssl_context = (self.ssl_context or ssl.create_default_context()) if parts.scheme == "https" else None
+                self.pools[key] = HTTPConnectionPool(
+                    key[1], key[2], limits["max_connections"], limits["connect_timeout"], ssl_context
+                )
+            
+            channel_class = PROVIDER_CHANNELS.get(name, AsyncProviderChannel)
+            self.channels[name] = channel_class(
+                name, url, self.pools[key], limits["max_in_flight"], limits["timeout"], self.api_keys.get(name)
+            )
+    
+    def stop(self):
+        with self.lock:
+            loop, thread = self.loop, self.thread
+            self.loop = None
+            self.thread = None
+        
+        if loop is None:
+            return
+        
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(), loop).result(timeout=SHUTDOWN_TIMEOUT)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=SHUTDOWN_TIMEOUT)
+            _shutdown_loop(loop)
+        logger.info("Provider transport stopped")
+    
+    async def _close(self):
+        for pool in self.pools.values():
+            await pool.close()
+        self.pools = {}
+        self.channels = {}
+    
+    def has_channel(self, name: str) -> bool:
+        return name in self.endpoints
+    
+    def submit(self, name: str, notification) -> Future:
+        if self.loop is None:
+            raise ProviderError("Provider transport is not running")
+        return asyncio.run_coroutine_threadsafe(self.channels[name].send(notification), self.loop)
+    
+    def send(self, name: str, notification) -> Tuple[bool, Optional[str]]:
+        return self.submit(name, notification).result()
+    
+    def send_batch(self, name: str, notifications: List) -> List[Tuple[bool, Optional[str]]]:
+        if self.loop is None:
+            raise ProviderError("Provider transport is not running")
+        
+        channel = self.channels[name]
+        
+        async def send_all():
+            return await asyncio.gather(*(channel.send(notification) for notification in notifications))
+        
+        return asyncio.run_coroutine_threadsafe(send_all(), self.loop).result()
+    
+    def get_metrics(self) -> Dict[str, Dict]:
+        return {name: channel.get_metrics() for name, channel in list(self.channels.items())}
+
+class StubProviderServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, failure_rate: float = 0.0,
+                 framing: str = "content-length", ssl_context: Optional[ssl.SSLContext] = None):
+        if framing not in STUB_FRAMINGS:
+            raise ValueError(f"Unsupported framing: {framing}")
+        
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.framing = framing
+        self.ssl_context = ssl_context
+        self.loop = None
+        self.thread = None
+        self.server = None
+        self.request_count = 0
+        self.failure_count = 0
+        self.connection_count = 0
+        self.active = 0
+        self.max_active = 0
+        self.path_counts = {}
+        self.path_active = {}
+        self.path_max_active = {}
+    
+    def url(self, name: str) -> str:
+        scheme = "https" if self.ssl_context else "http"
+        return f"{scheme}://{self.host}:{self.port}{PROVIDER_PATHS.get(name, '/')}"
+    
+    def endpoints(self) -> Dict[str, str]:
+        return {name: self.url(name) for name in PROVIDER_PATHS}
+    
+    def start(self) -> 'StubProviderServer':
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(ready,), name="stub-provider", daemon=True)
+        self.thread.start()
+        ready.wait()
+        return self
+    
+    def _run(self, ready: threading.Event):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self._handle, self.host, self.port, backlog=STUB_BACKLOG, ssl=self.ssl_context)
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+        ready.set()
+        
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            self.loop.run_until_complete(self.server.wait_closed())
+            _shutdown_loop(self.loop)
+    
+    def stop(self):
+        if self.loop is not None and self.thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(timeout=SHUTDOWN_TIMEOUT)
+        self.loop = None
+        self.thread = None
+    
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connection_count += 1
+        
+        try:
+            while True:
+                request = await read_message(reader)
+                if request is None:
+                    break
+                
+                request_line, headers, _ = request
+                path = request_line.split(" ")[1] if " " in request_line else "/"
+                self.request_count += 1
+                self.path_counts[path] = self.path_counts.get(path, 0) + 1
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                self.path_active[path] = self.path_active.get(path, 0) + 1
+                self.path_max_active[path] = max(self.path_max_active.get(path, 0), self.path_active[path])
+                
+                try:
+                    if self.latency:
+                        await asyncio.sleep(self.latency)
+                    failed = random.random() < self.failure_rate
+                finally:
+                    self.active -= 1
+                    self.path_active[path] -= 1
+                
+                if failed:
+                    self.failure_count += 1
+                    status, body = "503 Service Unavailable", {"status": "unavailable"}
+                else:
+                    status, body = "200 OK", {"status": "accepted", "message_id": f"STUB_{self.request_count}"}
+                
+                close = headers.get("connection", "").lower() == "close" or self.framing == "close"
+                response_headers = {"Content-Type": "application/json", "Connection": "close" if close else "keep-alive"}
+                writer.write(encode_message(
+                    f"HTTP/1.1 {status}", response_headers, json.dumps(body).encode("utf-8"),
+                    None if self.framing == "close" else self.framing
+                ))
+                await writer.drain()
+                
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ProviderError):
+            pass
+        finally:
+            writer.close()
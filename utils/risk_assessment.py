@@ -1,23 +1,881 @@
 import streamlit as st
 import math
-from datetime import datetime, time
-from typing import Dict, List, Tuple
+import threading
+import numpy as np
+from collections import OrderedDict
+from types import MappingProxyType
+from datetime import datetime, time, timedelta, timezone
+from typing import Callable, Dict, List, Mapping, Tuple, Optional, Sequence, Union
+import sys
+import os
 
-class RiskAssessment:
-    def __init__(self):
-        self.base_risk = 0
-        self.risk_factors = []
-        self.risk_level = "low"
-        self.suggestions = []
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.hazard_geometry import HazardLayer, load_hazard_layer, load_default_hazard_layers
+
+EARTH_RADIUS = 6371000
+HAZARD_GRID_CELL_DEGREES = 0.01
+RISK_LEVELS = ["low", "medium", "high"]
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+BATCH_CHUNK_SIZE = 200000
+BRUTE_FORCE_HAZARD_LIMIT = 32
+GRID_JOIN_MAX_CELLS = 64
+RISK_CACHE_SIZE = 4096
+RISK_CACHE_GEOHASH_PRECISION = 7
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+LOCATION_PREDICATES = ("near_hazard", "flood_zone")
+CONTEXT_PREDICATES = LOCATION_PREDICATES + ("night", "weather")
+
+RISK_RULES = [
+    {
+        "name": "night",
+        "predicate": "night",
+        "factor": "夜间时段",
+        "weight": 1,
+        "description": "当前时间 {time} 处于夜间时段（22:00-06:00）",
+        "suggestion": "night"
+    },
+    {
+        "name": "near_river",
+        "predicate": "near_hazard",
+        "factor": "靠近河流",
+        "weight": 2,
+        "distance": 100,
+        "description": "距离 {name} {distance}米范围内",
+        "suggestion": "near_river"
+    },
+    {
+        "name": "flood_zone",
+        "predicate": "flood_zone",
+        "factor": "洪涝风险区",
+        "distance": 100,
+        "description": "位于 {name} 范围内",
+        "nearby_description": "距离 {name} {distance:.0f}米",
+        "suggestion": "flood_zone"
+    },
+    {
+        "name": "bad_weather",
+        "predicate": "weather",
+        "factor": "恶劣天气",
+        "description": "当前天气为 {weather}",
+        "suggestion": "bad_weather"
+    },
+    {
+        "name": "elderly",
+        "predicate": "age",
+        "factor": "高龄",
+        "weight": 1,
+        "min": 80,
+        "description": "年龄 {value:.0f} 岁，属于高龄人群",
+        "suggestion": "elderly"
+    },
+    {
+        "name": "heat",
+        "predicate": "temperature",
+        "factor": "高温",
+        "weight": 1,
+        "min": 35,
+        "description": "当前气温 {value:.0f}°C",
+        "suggestion": "extreme_temperature"
+    },
+    {
+        "name": "cold",
+        "predicate": "temperature",
+        "factor": "低温",
+        "weight": 1,
+        "max": -10,
+        "description": "当前气温 {value:.0f}°C",
+        "suggestion": "extreme_temperature"
+    },
+    {
+        "name": "repeat_alert",
+        "predicate": "since_last_alert",
+        "factor": "短时间内再次求助",
+        "weight": 1,
+        "min": 0,
+        "max": 30,
+        "description": "距上次求助仅 {value:.0f} 分钟",
+        "suggestion": "repeat_alert"
+    }
+]
+
+def haversine_distances(lat1, lng1, lat2, lng2):
+    lat1_rad = np.radians(lat1)
+    lat2_rad = np.radians(lat2)
+    delta_lat = np.radians(lat2 - lat1)
+    delta_lng = np.radians(lng2 - lng1)
+    
+    a = np.sin(delta_lat / 2) ** 2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lng / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    
+    return EARTH_RADIUS * c
+
+def parse_times(times: Sequence, now: datetime = None) -> np.ndarray:
+    now = np.datetime64(now or datetime.now(), 'us')
+    
+    if isinstance(times, np.ndarray) and np.issubdtype(times.dtype, np.datetime64):
+        return np.where(np.isnat(times), now, times.astype('datetime64[us]'))
+    
+    values = np.array([
+        value if isinstance(value, str) else value.strftime(TIME_FORMAT) if isinstance(value, datetime) else ''
+        for value in times
+    ], dtype=str)
+    parsed = np.full(len(values), now, dtype='datetime64[us]')
+    if not len(values):
+        return parsed
+    
+    chars = values.astype('U19').view('U1').reshape(len(values), 19)
+    canonical = (
+        (np.char.str_len(values) == 19)
+        & (chars[:, 4] == '-') & (chars[:, 7] == '-') & (chars[:, 10] == ' ')
+        & (chars[:, 13] == ':') & (chars[:, 16] == ':')
+    )
+    
+    try:
+        parsed[canonical] = values[canonical].astype('datetime64[us]')
+    except ValueError:
+        canonical[:] = False
+    
+    for index in np.flatnonzero(~canonical & (values != '')):
+        value = parse_timestamp(values[index])
+        if value is not None:
+            if value.tzinfo is not None:
+                value = value.astimezone(timezone.utc).replace(tzinfo=None)
+            parsed[index] = np.datetime64(value, 'us')
+    
+    return parsed
+
+def geohash_encode(lat: float, lng: float, precision: int = RISK_CACHE_GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    
+    while len(chars) < precision:
+        if even:
+            interval, coordinate = lng_range, lng
+        else:
+            interval, coordinate = lat_range, lat
+        
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_BASE32[value])
+            bits = 0
+            value = 0
+    
+    return "".join(chars)
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+    
+    for char in geohash:
+        value = GEOHASH_BASE32.index(char)
+        for shift in range(4, -1, -1):
+            interval = lng_range if even else lat_range
+            middle = (interval[0] + interval[1]) / 2
+            if (value >> shift) & 1:
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            even = not even
+    
+    return lat_range[0], lat_range[1], lng_range[0], lng_range[1]
+
+def night_flags(times: np.ndarray) -> np.ndarray:
+    time_of_day = (times - times.astype('datetime64[D]')).astype('timedelta64[us]').astype(np.int64)
+    return (time_of_day >= 22 * 3600 * 10 ** 6) | (time_of_day <= 6 * 3600 * 10 ** 6)
+
+class HazardGridIndex:
+    def __init__(self, cell_degrees: float = HAZARD_GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.cells = {}
+        self.source = None
+        self.indexed_count = 0
+    
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees)
+    
+    def sync(self, locations: List[Dict]):
+        if locations is not self.source or len(locations) < self.indexed_count:
+            self.cells = {}
+            self.source = locations
+            self.indexed_count = 0
+        
+        for index in range(self.indexed_count, len(locations)):
+            location = locations[index]
+            self.cells.setdefault(self._cell(location["lat"], location["lng"]), []).append(index)
+        
+        self.indexed_count = len(locations)
+    
+    def _lng_ranges(self, lat: float, lng: float, radius: float) -> List[Tuple[float, float]]:
+        angular_radius = radius / EARTH_RADIUS * (1 + 1e-9) + 1e-12
+        lat_rad = math.radians(lat)
+        
+        if abs(lat_rad) + angular_radius >= math.pi / 2:
+            return [(-180.0, 180.0)]
+        
+        ratio = math.sin(angular_radius) / math.cos(lat_rad)
+        if ratio >= 1:
+            return [(-180.0, 180.0)]
+        
+        delta_lng = math.degrees(math.asin(ratio))
+        lng_min, lng_max = lng - delta_lng, lng + delta_lng
+        
+        ranges = [(max(lng_min, -180.0), min(lng_max, 180.0))]
+        if lng_min < -180:
+            ranges.append((lng_min + 360, 180.0))
+        if lng_max > 180:
+            ranges.append((-180.0, lng_max - 360))
+        return ranges
+    
+    def candidates(self, lat: float, lng: float, radius: float) -> List[int]:
+        if radius < 0 or not self.cells:
+            return []
+        
+        delta_lat = math.degrees(radius / EARTH_RADIUS * (1 + 1e-9) + 1e-12)
+        row_min = math.floor(max(lat - delta_lat, -90.0) / self.cell_degrees)
+        row_max = math.floor(min(lat + delta_lat, 90.0) / self.cell_degrees)
+        col_ranges = [
+            (math.floor(lng_min / self.cell_degrees), math.floor(lng_max / self.cell_degrees))
+            for lng_min, lng_max in self._lng_ranges(lat, lng, radius)
+        ]
+        
+        box_size = (row_max - row_min + 1) * sum(col_max - col_min + 1 for col_min, col_max in col_ranges)
+        
+        indexes = []
+        if box_size > len(self.cells):
+            for (row, col), cell_indexes in self.cells.items():
+                if row_min <= row <= row_max and any(col_min <= col <= col_max for col_min, col_max in col_ranges):
+                    indexes.extend(cell_indexes)
+        else:
+            for row in range(row_min, row_max + 1):
+                for col_min, col_max in col_ranges:
+                    for col in range(col_min, col_max + 1):
+                        indexes.extend(self.cells.get((row, col), ()))
+        
+        indexes.sort()
+        return indexes
+    
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        if getattr(self, '_arrays_source', None) is not self.source or self._arrays_count > self.indexed_count:
+            self._arrays = (np.empty(0, dtype=float), np.empty(0, dtype=float))
+            self._arrays_count = 0
+            self._arrays_source = self.source
+        
+        if self._arrays_count != self.indexed_count:
+            added = self.source[self._arrays_count:self.indexed_count]
+            self._arrays = (
+                np.concatenate([self._arrays[0], np.array([location["lat"] for location in added], dtype=float)]),
+                np.concatenate([self._arrays[1], np.array([location["lng"] for location in added], dtype=float)])
+            )
+            self._arrays_count = self.indexed_count
+        return self._arrays
+    
+    def _brute_force_match(self, lats: np.ndarray, lngs: np.ndarray, radius: float, first: np.ndarray, nearest: np.ndarray):
+        hazard_lats, hazard_lngs = self.arrays()
+        chunk_size = max(1, BATCH_CHUNK_SIZE // max(len(hazard_lats), 1))
+        
+        for start in range(0, len(lats), chunk_size):
+            end = start + chunk_size
+            distances = haversine_distances(lats[start:end, None], lngs[start:end, None], hazard_lats[None, :], hazard_lngs[None, :])
+            within = distances <= radius
+            matched = within.any(axis=1)
+            
+            first[start:end] = np.where(matched, within.argmax(axis=1), -1)
+            nearest[start:end] = np.where(within, distances, np.inf).min(axis=1)
+    
+    def _grid_match(self, lats: np.ndarray, lngs: np.ndarray, radius: float, first: np.ndarray, nearest: np.ndarray) -> np.ndarray:
+        hazard_lats, hazard_lngs = self.arrays()
+        cell = self.cell_degrees
+        key_base = 2 ** 32
+        
+        angular_radius = radius / EARTH_RADIUS * (1 + 1e-9) + 1e-12
+        delta_lat = math.degrees(angular_radius)
+        lat_rad = np.radians(lats)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.sin(angular_radius) / np.cos(lat_rad)
+        wide = (np.abs(lat_rad) + angular_radius >= math.pi / 2) | ~(ratio < 1)
+        delta_lng = np.degrees(np.arcsin(np.where(wide, 0.0, ratio)))
+        wide |= (lngs - delta_lng < -180) | (lngs + delta_lng > 180)
+        
+        row_min = np.floor((lats - delta_lat) / cell).astype(np.int64)
+        row_max = np.floor((lats + delta_lat) / cell).astype(np.int64)
+        col_min = np.floor((lngs - delta_lng) / cell).astype(np.int64)
+        col_max = np.floor((lngs + delta_lng) / cell).astype(np.int64)
+        
+        narrow = ~wide
+        if not narrow.any():
+            return wide
+        
+        row_span = int((row_max - row_min)[narrow].max()) + 1
+        col_span = int((col_max - col_min)[narrow].max()) + 1
+        if row_span * col_span > GRID_JOIN_MAX_CELLS:
+            return np.ones(len(lats), dtype=bool)
+        
+        hazard_keys = np.floor(hazard_lats / cell).astype(np.int64) * key_base + np.floor(hazard_lngs / cell).astype(np.int64)
+        order = np.argsort(hazard_keys, kind='stable')
+        sorted_keys = hazard_keys[order]
+        first_match = np.full(len(lats), len(hazard_lats), dtype=np.int64)
+        
+        for row_offset in range(row_span):
+            for col_offset in range(col_span):
+                rows = row_min + row_offset
+                cols = col_min + col_offset
+                points = np.flatnonzero(narrow & (rows <= row_max) & (cols <= col_max))
+                
+                keys = rows[points] * key_base + cols[points]
+                low = np.searchsorted(sorted_keys, keys, side='left')
+                counts = np.searchsorted(sorted_keys, keys, side='right') - low
+                
+                hit = counts > 0
+                if not hit.any():
+                    continue
+                points, low, counts = points[hit], low[hit], counts[hit]
+                
+                pair_points = np.repeat(points, counts)
+                pair_offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                pair_hazards = order[np.repeat(low, counts) + pair_offsets]
+                
+                distances = haversine_distances(lats[pair_points], lngs[pair_points], hazard_lats[pair_hazards], hazard_lngs[pair_hazards])
+                within = distances <= radius
+                np.minimum.at(nearest, pair_points[within], distances[within])
+                np.minimum.at(first_match, pair_points[within], pair_hazards[within])
+        
+        first[narrow] = np.where(first_match[narrow] < len(hazard_lats), first_match[narrow], -1)
+        return wide
+    
+    def match(self, lats: np.ndarray, lngs: np.ndarray, radius: float) -> Tuple[np.ndarray, np.ndarray]:
+        first = np.full(len(lats), -1, dtype=np.int64)
+        nearest = np.full(len(lats), np.inf)
+        
+        if radius < 0 or not self.indexed_count or not len(lats):
+            return first, nearest
+        
+        finite = np.isfinite(lats) & np.isfinite(lngs)
+        points = np.flatnonzero(finite)
+        point_lats, point_lngs = lats[points], lngs[points]
+        point_first = np.full(len(points), -1, dtype=np.int64)
+        point_nearest = np.full(len(points), np.inf)
+        
+        if self.indexed_count <= BRUTE_FORCE_HAZARD_LIMIT:
+            remaining = np.ones(len(points), dtype=bool)
+        else:
+            remaining = self._grid_match(point_lats, point_lngs, radius, point_first, point_nearest)
+        
+        if remaining.any():
+            rest = np.flatnonzero(remaining)
+            rest_first = np.full(len(rest), -1, dtype=np.int64)
+            rest_nearest = np.full(len(rest), np.inf)
+            self._brute_force_match(point_lats[rest], point_lngs[rest], radius, rest_first, rest_nearest)
+            point_first[rest] = rest_first
+            point_nearest[rest] = rest_nearest
+        
+        first[points] = point_first
+        nearest[points] = point_nearest
+        return first, nearest
+
+def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lng = math.radians(lng2 - lng1)
+    
+    a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lng / 2) ** 2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    
+    return EARTH_RADIUS * c
+
+def parse_timestamp(value: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+
+def minutes_since(current_time: datetime, last_alert_time: Union[datetime, str, None]) -> Optional[float]:
+    if not last_alert_time:
+        return None
+    if isinstance(last_alert_time, str):
+        last_alert_time = parse_timestamp(last_alert_time)
+        if last_alert_time is None:
+            return None
+        if last_alert_time.tzinfo is None:
+            last_alert_time = last_alert_time.replace(tzinfo=timezone.utc)
+    if (current_time.tzinfo is None) != (last_alert_time.tzinfo is None):
+        current_time = current_time.astimezone(timezone.utc)
+        last_alert_time = last_alert_time.astimezone(timezone.utc)
+    return (current_time - last_alert_time).total_seconds() / 60
+
+def optional_floats(values: Optional[Sequence], count: int) -> np.ndarray:
+    if values is None:
+        return np.full(count, np.nan)
+    return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+def threshold_mask(values: np.ndarray, rule: Dict) -> np.ndarray:
+    mask = np.isfinite(values)
+    if "min" in rule:
+        mask &= values >= rule["min"]
+    if "max" in rule:
+        mask &= values <= rule["max"]
+    return mask
+
+def in_threshold(value: Optional[float], rule: Dict) -> bool:
+    if value is None or not math.isfinite(value):
+        return False
+    return rule.get("min", -math.inf) <= value <= rule.get("max", math.inf)
+
+def risk_level_code(score: int) -> int:
+    return 2 if score >= 3 else 1 if score >= 2 else 0
+
+class BatchRiskResult:
+    def __init__(self, lats: np.ndarray, lngs: np.ndarray, times: np.ndarray, weathers: np.ndarray,
+                 rule_names: List[str], increases: np.ndarray, steps: List[Tuple[str, str, Callable]],
+                 suggestion_rules: Dict[str, str], location_ids: Optional[Sequence] = None):
+        self.lats = lats
+        self.lngs = lngs
+        self.times = times
+        self.weathers = weathers
+        self.rule_names = rule_names
+        self.increases = increases
+        self.matched = increases > 0
+        self.steps = steps
+        self.risk_score = increases.sum(axis=0) if len(rule_names) else np.zeros(len(lats), dtype=np.int64)
+        self.risk_level_codes = np.where(self.risk_score >= 3, 2, np.where(self.risk_score >= 2, 1, 0)).astype(np.int8)
+        self.suggestion_rules = suggestion_rules
+        self.location_ids = location_ids
+    
+    def __len__(self) -> int:
+        return len(self.risk_score)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.materialize(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("BatchRiskResult index out of range")
+        return self.materialize(index)
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.materialize(index)
+    
+    @property
+    def risk_levels(self) -> np.ndarray:
+        return np.array(RISK_LEVELS, dtype=object)[self.risk_level_codes]
+    
+    def level_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.risk_level_codes, minlength=len(RISK_LEVELS))
+        return {level: int(count) for level, count in zip(RISK_LEVELS, counts)}
+    
+    def factor_mask(self, rule_name: str) -> np.ndarray:
+        return self.matched[self.rule_names.index(rule_name)]
+    
+    def factors(self, index: int) -> List[Dict]:
+        return [
+            {"factor": factor, "description": describe(index), "risk_increase": int(self.increases[row, index])}
+            for row, (factor, _, describe) in enumerate(self.steps)
+            if self.matched[row, index]
+        ]
+    
+    def suggestions(self, index: int) -> List[str]:
+        suggestions = [suggestion for row, (_, suggestion, _) in enumerate(self.steps) if self.matched[row, index]]
+        suggestions.append(self.suggestion_rules[f"{RISK_LEVELS[self.risk_level_codes[index]]}_risk"])
+        return list(set(suggestions))
+    
+    def materialize(self, index: int) -> Dict:
+        current_time = self.times[index].astype(datetime)
+        result = {
+            "risk_level": RISK_LEVELS[self.risk_level_codes[index]],
+            "risk_score": int(self.risk_score[index]),
+            "risk_factors": self.factors(index),
+            "suggestions": self.suggestions(index),
+            "assessment_time": current_time.strftime(TIME_FORMAT),
+            "location": {"lat": float(self.lats[index]), "lng": float(self.lngs[index])},
+            "weather": str(self.weathers[index])
+        }
+        
+        if self.location_ids is not None:
+            result["location_id"] = self.location_ids[index]
+        
+        return result
+    
+    def to_list(self) -> List[Dict]:
+        return list(self)
+
+class RiskRuleEngine:
+    def __init__(self, rules: List[Dict], river_locations: List[Dict], hazard_layers: List[HazardLayer],
+                 weather_risk_map: Dict[str, int], suggestion_rules: Dict[str, str]):
+        self.rules = tuple(dict(rule) for rule in rules)
+        self.river_locations = [dict(river) for river in river_locations]
+        self.river_index = HazardGridIndex()
+        self.river_index.sync(self.river_locations)
+        self.river_index.arrays()
+        self.hazard_layers = tuple(hazard_layers)
+        self.weather_risk_map = dict(weather_risk_map)
+        self.suggestion_rules = dict(suggestion_rules)
+        
+        self.plan = tuple(self._compile(rule) for rule in self.rules)
+        self.context_steps = tuple(step for step in self.plan if step[0] in CONTEXT_PREDICATES)
+        self.hazard_distance = max([rule.get("distance", 0) for rule in self.rules if rule["predicate"] in LOCATION_PREDICATES] or [0])
+    
+    def add_river_location(self, river: Dict):
+        self.river_locations.append(dict(river))
+        self.river_index.sync(self.river_locations)
+        self.river_index.arrays()
+    
+    def set_river_locations(self, river_locations: List[Dict]):
+        self.river_locations = [dict(river) for river in river_locations]
+        self.river_index.sync(self.river_locations)
+        self.river_index.arrays()
+    
+    def set_hazard_layers(self, hazard_layers: List[HazardLayer]):
+        self.hazard_layers = tuple(hazard_layers)
+    
+    def set_weather_risk_map(self, weather_risk_map: Dict[str, int]):
+        self.weather_risk_map.clear()
+        self.weather_risk_map.update(weather_risk_map)
+    
+    def _compile(self, rule: Dict) -> Tuple:
+        compiler = getattr(self, f"_compile_{rule['predicate']}", None)
+        if compiler is None:
+            raise ValueError(f"Unknown risk rule predicate: {rule['predicate']}")
+        
+        evaluate, evaluate_arrays = compiler(rule)
+        return rule["predicate"], rule["name"], rule["factor"], self.suggestion_rules[rule["suggestion"]], evaluate, evaluate_arrays
+    
+    def _compile_night(self, rule: Dict):
+        weight = rule.get("weight", 1)
+        night_start = time(22, 0)
+        night_end = time(6, 0)
+        template = rule["description"]
+        
+        def evaluate(lat, lng, current_time, weather, age, temperature, minutes):
+            time_only = current_time.time()
+            if night_start <= time_only or time_only <= night_end:
+                return weight, template.format(time=current_time.strftime('%H:%M'))
+            return None
+        
+        def evaluate_arrays(inputs):
+            times = inputs["times"]
+            describe = lambda i: template.format(time=times[i].astype(datetime).strftime('%H:%M'))
+            return night_flags(times) * weight, describe
+        
+        return evaluate, evaluate_arrays
+    
+    def _compile_near_hazard(self, rule: Dict):
+        weight = rule.get("weight", 2)
+        distance = rule.get("distance", 100)
+        template = rule["description"]
+        
+        def evaluate(lat, lng, current_time, weather, age, temperature, minutes):
+            near_river, river_name = self.is_near_river(lat, lng, distance)
+            if not near_river:
+                river_line = self.find_hazard_feature(lat, lng, 'line', distance)
+                if river_line is None:
+                    return None
+                river_name = river_line[0]["name"]
+            return weight, template.format(name=river_name, distance=distance)
+        
+        def evaluate_arrays(inputs):
+            lats, lngs = inputs["lats"], inputs["lngs"]
+            hazard_index, _ = self.river_index.match(lats, lngs, distance)
+            hazard_names = [river["name"] for river in self.river_locations]
+            
+            if self.hazard_layers:
+                missed = np.flatnonzero(hazard_index < 0)
+                line_index, _, lines = self.match_hazard_features(lats[missed], lngs[missed], 'line', distance)
+                hit = line_index >= 0
+                hazard_index[missed[hit]] = line_index[hit] + len(hazard_names)
+                hazard_names.extend(line["name"] for line in lines)
+            
+            describe = lambda i: template.format(name=hazard_names[hazard_index[i]], distance=distance)
+            return (hazard_index >= 0) * weight, describe
         
-        self.river_locations = [
+        return evaluate, evaluate_arrays
+    
+    def _compile_flood_zone(self, rule: Dict):
+        distance = rule.get("distance", 100)
+        template = rule["description"]
+        nearby_template = rule["nearby_description"]
+        
+        def describe_zone(zone: Dict, zone_distance: float) -> str:
+            if zone_distance > 0:
+                return nearby_template.format(name=zone["name"], distance=zone_distance)
+            return template.format(name=zone["name"])
+        
+        def evaluate(lat, lng, current_time, weather, age, temperature, minutes):
+            flood_zone = self.find_hazard_feature(lat, lng, 'polygon', distance)
+            if flood_zone is None:
+                return None
+            zone, zone_distance = flood_zone
+            return rule.get("weight", zone["risk_increase"]), describe_zone(zone, zone_distance)
+        
+        def evaluate_arrays(inputs):
+            flood_index, flood_distance, zones = self.match_hazard_features(inputs["lats"], inputs["lngs"], 'polygon', distance)
+            weights = np.array([rule.get("weight", zone["risk_increase"]) for zone in zones] + [0], dtype=np.int64)
+            describe = lambda i: describe_zone(zones[flood_index[i]], float(flood_distance[i]))
+            return weights[flood_index], describe
+        
+        return evaluate, evaluate_arrays
+    
+    def _compile_weather(self, rule: Dict):
+        weather_risk_map = self.weather_risk_map
+        template = rule["description"]
+        
+        def evaluate(lat, lng, current_time, weather, age, temperature, minutes):
+            weather_risk = weather_risk_map.get(weather, 0)
+            if weather_risk > 0:
+                return weather_risk, template.format(weather=weather)
+            return None
+        
+        def evaluate_arrays(inputs):
+            weathers = inputs["weathers"]
+            unique_weathers, inverse = np.unique(weathers.astype(str), return_inverse=True)
+            weather_risk = np.array([weather_risk_map.get(value, 0) for value in unique_weathers], dtype=np.int64)[inverse]
+            describe = lambda i: template.format(weather=weathers[i])
+            return weather_risk, describe
+        
+        return evaluate, evaluate_arrays
+    
+    def _compile_value(self, rule: Dict, argument: str):
+        weight = rule.get("weight", 1)
+        template = rule["description"]
+        pick = {
+            "ages": lambda age, temperature, minutes: age,
+            "temperatures": lambda age, temperature, minutes: temperature,
+            "minutes": lambda age, temperature, minutes: minutes
+        }[argument]
+        
+        def evaluate(lat, lng, current_time, weather, age, temperature, minutes):
+            value = pick(age, temperature, minutes)
+            if in_threshold(value, rule):
+                return weight, template.format(value=value)
+            return None
+        
+        def evaluate_arrays(inputs):
+            values = inputs[argument]
+            describe = lambda i: template.format(value=values[i])
+            return threshold_mask(values, rule) * weight, describe
+        
+        return evaluate, evaluate_arrays
+    
+    def _compile_age(self, rule: Dict):
+        return self._compile_value(rule, "ages")
+    
+    def _compile_temperature(self, rule: Dict):
+        return self._compile_value(rule, "temperatures")
+    
+    def _compile_since_last_alert(self, rule: Dict):
+        return self._compile_value(rule, "minutes")
+    
+    def is_near_river(self, lat: float, lng: float, threshold: float = 100) -> Tuple[bool, str]:
+        if not (math.isfinite(lat) and math.isfinite(lng)):
+            return False, ""
+        
+        for index in self.river_index.candidates(lat, lng, threshold):
+            river = self.river_locations[index]
+            if calculate_distance(lat, lng, river["lat"], river["lng"]) <= threshold:
+                return True, river["name"]
+        return False, ""
+    
+    def find_hazard_feature(self, lat: float, lng: float, kind: str = 'line', threshold: float = 100) -> Optional[Tuple[Dict, float]]:
+        if not (math.isfinite(lat) and math.isfinite(lng)):
+            return None
+        
+        nearest = None
+        for layer in self.hazard_layers:
+            hit = layer.nearest(lat, lng, threshold, kind)
+            if hit and (nearest is None or hit[1] < nearest[1]):
+                nearest = hit
+        return nearest
+    
+    def match_hazard_features(self, lats: np.ndarray, lngs: np.ndarray, kind: str = 'line',
+                              threshold: float = 100) -> Tuple[np.ndarray, np.ndarray, List[Dict]]:
+        feature_index = np.full(len(lats), -1, dtype=np.int64)
+        feature_distance = np.full(len(lats), np.inf)
+        features = []
+        
+        for layer in self.hazard_layers:
+            layer_index, layer_distance = layer.query(lats, lngs, threshold, kind)
+            closer = (layer_index >= 0) & (layer_distance < feature_distance)
+            feature_index[closer] = layer_index[closer] + len(features)
+            feature_distance[closer] = layer_distance[closer]
+            features.extend(layer.features)
+        
+        return feature_index, feature_distance, features
+    
+    def evaluate_context(self, lat: float, lng: float, current_time: datetime, weather: str) -> Tuple:
+        return tuple(step[4](lat, lng, current_time, weather, None, None, None) for step in self.context_steps)
+    
+    def assess(self, lat: float, lng: float, current_time: datetime = None, weather: str = "晴",
+               age: Optional[float] = None, temperature: Optional[float] = None,
+               last_alert_time: Union[datetime, str, None] = None, context_outcomes: Tuple = None) -> Dict:
+        if current_time is None:
+            current_time = datetime.now()
+        if context_outcomes is None:
+            context_outcomes = self.evaluate_context(lat, lng, current_time, weather)
+        
+        minutes = minutes_since(current_time, last_alert_time)
+        risk_score = 0
+        risk_factors = []
+        suggestions = set()
+        context_slot = 0
+        
+        for predicate, _, factor, suggestion, evaluate, _ in self.plan:
+            if predicate in CONTEXT_PREDICATES:
+                outcome = context_outcomes[context_slot]
+                context_slot += 1
+            else:
+                outcome = evaluate(lat, lng, current_time, weather, age, temperature, minutes)
+            
+            if outcome is None or outcome[0] <= 0:
+                continue
+            
+            risk_score += outcome[0]
+            risk_factors.append({"factor": factor, "description": outcome[1], "risk_increase": outcome[0]})
+            suggestions.add(suggestion)
+        
+        risk_level = RISK_LEVELS[risk_level_code(risk_score)]
+        suggestions.add(self.suggestion_rules[f"{risk_level}_risk"])
+        
+        return {
+            "risk_level": risk_level,
+            "risk_score": risk_score,
+            "risk_factors": risk_factors,
+            "suggestions": list(suggestions),
+            "assessment_time": current_time.strftime(TIME_FORMAT),
+            "location": {"lat": lat, "lng": lng},
+            "weather": weather
+        }
+    
+    def assess_arrays(self, lats: Sequence[float], lngs: Sequence[float], times: Sequence = None,
+                      weather: Union[str, Sequence[str]] = "晴", ages: Optional[Sequence] = None,
+                      temperatures: Optional[Sequence] = None, last_alert_times: Optional[Sequence] = None,
+                      location_ids: Optional[Sequence] = None) -> BatchRiskResult:
+        lats = np.asarray(lats, dtype=float)
+        lngs = np.asarray(lngs, dtype=float)
+        now = datetime.now()
+        times = parse_times(times if times is not None else [None] * len(lats), now=now)
+        
+        if isinstance(weather, str):
+            weathers = np.full(len(lats), weather, dtype=object)
+        else:
+            weathers = np.asarray(weather, dtype=object)
+        
+        minutes = np.full(len(lats), np.nan)
+        if last_alert_times is not None:
+            present = np.array([bool(value) for value in last_alert_times], dtype=bool)
+            last_times = parse_times(last_alert_times, now=datetime.min)
+            present &= last_times != np.datetime64(datetime.min, 'us')
+            utc_now = np.datetime64(now.astimezone(timezone.utc).replace(tzinfo=None), 'us')
+            reference = np.where(times == np.datetime64(now, 'us'), utc_now, times)
+            minutes[present] = (reference[present] - last_times[present]) / np.timedelta64(1, 'm')
+        
+        inputs = {
+            "lats": lats,
+            "lngs": lngs,
+            "times": times,
+            "weathers": weathers,
+            "ages": optional_floats(ages, len(lats)),
+            "temperatures": optional_floats(temperatures, len(lats)),
+            "minutes": minutes
+        }
+        
+        increases = np.zeros((len(self.plan), len(lats)), dtype=np.int64)
+        steps = []
+        for row, (_, _, factor, suggestion, _, evaluate_arrays) in enumerate(self.plan):
+            increases[row], describe = evaluate_arrays(inputs)
+            steps.append((factor, suggestion, describe))
+        
+        return BatchRiskResult(
+            lats, lngs, times, weathers, [step[1] for step in self.plan], increases, steps,
+            self.suggestion_rules, location_ids
+        )
+
+class RiskCache:
+    def __init__(self, max_size: int = RISK_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.bypasses = 0
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+    
+    def bypass(self):
+        with self.lock:
+            self.bypasses += 1
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.invalidations += 1
+    
+    def get_metrics(self) -> Dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "bypasses": self.bypasses
+            }
+
+class RiskAssessment:
+    def __init__(self, hazard_layers: List[HazardLayer] = None, cache_size: int = RISK_CACHE_SIZE,
+                 rules: List[Dict] = None):
+        self._river_locations = [
             {"name": "永定河", "lat": 39.9100, "lng": 116.4000},
             {"name": "潮白河", "lat": 39.8900, "lng": 116.4200},
             {"name": "北运河", "lat": 39.9200, "lng": 116.3800},
             {"name": "拒马河", "lat": 39.8800, "lng": 116.4500}
         ]
+        self._hazard_layers = load_default_hazard_layers() if hazard_layers is None else list(hazard_layers)
+        self._rules = [dict(rule) for rule in (RISK_RULES if rules is None else rules)]
+        self.risk_cache = RiskCache(cache_size)
+        self.cell_cache = RiskCache(cache_size)
+        self.version = 0
+        self._engine = None
+        self._engine_lock = threading.Lock()
         
-        self.weather_risk_map = {
+        self._weather_risk_map = {
             "晴": 0,
             "多云": 0,
             "阴": 0,
@@ -31,27 +889,80 @@ class RiskAssessment:
             "沙尘暴": 1
         }
         
-        self.suggestion_rules = {
+        self._suggestion_rules = {
             "night": "夜间出行请携带照明设备，避免单独行动",
             "near_river": "请远离河道边缘，注意防滑",
+            "flood_zone": "您处于洪涝风险区域，请尽快转移至地势较高的安全地点",
             "bad_weather": "恶劣天气请减少外出，注意保暖防滑",
+            "elderly": "高龄老人外出请尽量有人陪同，随身携带紧急联系卡",
+            "extreme_temperature": "极端气温请减少户外活动，注意防暑或保暖",
+            "repeat_alert": "短时间内再次求助，请优先安排人员上门查看",
             "high_risk": "建议立即联系家人或救援人员",
             "medium_risk": "请保持警惕，随时准备求助",
             "low_risk": "注意安全，保持通讯畅通"
         }
     
+    @property
+    def river_locations(self) -> Tuple[Mapping, ...]:
+        return tuple(MappingProxyType(river) for river in self._river_locations)
+    
+    @river_locations.setter
+    def river_locations(self, river_locations: List[Dict]):
+        self._river_locations = [dict(river) for river in river_locations]
+        self._update_engine(lambda engine: engine.set_river_locations(self._river_locations))
+    
+    @property
+    def hazard_layers(self) -> Tuple[HazardLayer, ...]:
+        return tuple(self._hazard_layers)
+    
+    @hazard_layers.setter
+    def hazard_layers(self, hazard_layers: List[HazardLayer]):
+        self._hazard_layers = list(hazard_layers)
+        self._update_engine(lambda engine: engine.set_hazard_layers(self._hazard_layers))
+    
+    @property
+    def rules(self) -> Tuple[Mapping, ...]:
+        return tuple(MappingProxyType(rule) for rule in self._rules)
+    
+    @rules.setter
+    def rules(self, rules: List[Dict]):
+        self._rules = [dict(rule) for rule in rules]
+        self.invalidate_cache()
+    
+    @property
+    def weather_risk_map(self) -> Mapping[str, int]:
+        return MappingProxyType(self._weather_risk_map)
+    
+    @weather_risk_map.setter
+    def weather_risk_map(self, weather_risk_map: Dict[str, int]):
+        self._weather_risk_map = dict(weather_risk_map)
+        self._update_engine(lambda engine: engine.set_weather_risk_map(self._weather_risk_map))
+    
+    @property
+    def suggestion_rules(self) -> Mapping[str, str]:
+        return MappingProxyType(self._suggestion_rules)
+    
+    @suggestion_rules.setter
+    def suggestion_rules(self, suggestion_rules: Dict[str, str]):
+        self._suggestion_rules = dict(suggestion_rules)
+        self.invalidate_cache()
+    
+    @property
+    def engine(self) -> RiskRuleEngine:
+        current = self._engine
+        if current is None or current[0] != self.version:
+            with self._engine_lock:
+                current = self._engine
+                if current is None or current[0] != self.version:
+                    current = (self.version, RiskRuleEngine(
+                        self._rules, self._river_locations, self._hazard_layers,
+                        self._weather_risk_map, self._suggestion_rules
+                    ))
+                    self._engine = current
+        return current[1]
+    
     def calculate_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-        R = 6371000
-        
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lng = math.radians(lng2 - lng1)
-        
-        a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lng / 2) ** 2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        
-        return R * c
+        return calculate_distance(lat1, lng1, lat2, lng2)
     
     def is_night_time(self, current_time: datetime) -> bool:
         night_start = time(22, 0)
@@ -64,106 +975,182 @@ class RiskAssessment:
         return False
     
     def is_near_river(self, lat: float, lng: float, threshold: float = 100) -> Tuple[bool, str]:
-        for river in self.river_locations:
-            distance = self.calculate_distance(lat, lng, river["lat"], river["lng"])
-            if distance <= threshold:
-                return True, river["name"]
-        return False, ""
+        return self.engine.is_near_river(lat, lng, threshold)
+    
+    def find_hazard_feature(self, lat: float, lng: float, kind: str = 'line', threshold: float = 100) -> Optional[Tuple[Dict, float]]:
+        return self.engine.find_hazard_feature(lat, lng, kind, threshold)
     
     def get_weather_risk(self, weather: str) -> int:
-        return self.weather_risk_map.get(weather, 0)
+        return self._weather_risk_map.get(weather, 0)
+    
+    def assess_risk(self, lat: float, lng: float, current_time: datetime = None, weather: str = "晴",
+                    age: Optional[float] = None, temperature: Optional[float] = None,
+                    last_alert_time: Union[datetime, str, None] = None) -> Dict:
+        return self.engine.assess(lat, lng, current_time, weather, age, temperature, last_alert_time)
     
-    def assess_risk(self, lat: float, lng: float, current_time: datetime = None, weather: str = "晴") -> Dict:
+    @property
+    def cache_version(self) -> Tuple:
+        return tuple(layer.version for layer in self._hazard_layers), self.version
+    
+    def time_bucket(self, current_time: datetime) -> str:
+        return current_time.strftime('%H:%M') if self.is_night_time(current_time) else 'day'
+    
+    def is_clear_cell(self, geohash: str, threshold: float = None) -> bool:
+        engine = self.engine
+        if threshold is None:
+            threshold = engine.hazard_distance
+        
+        lat_min, lat_max, lng_min, lng_max = geohash_bounds(geohash)
+        center_lat = (lat_min + lat_max) / 2
+        center_lng = (lng_min + lng_max) / 2
+        reach = threshold + calculate_distance(center_lat, center_lng, lat_max, lng_max) * 1.01 + 1
+        
+        return (
+            not engine.is_near_river(center_lat, center_lng, reach)[0]
+            and engine.find_hazard_feature(center_lat, center_lng, 'line', reach) is None
+            and engine.find_hazard_feature(center_lat, center_lng, 'polygon', reach) is None
+        )
+    
+    def assess_cached(self, lat: float, lng: float, current_time: datetime = None, weather: str = "晴",
+                      age: Optional[float] = None, temperature: Optional[float] = None,
+                      last_alert_time: Union[datetime, str, None] = None) -> Dict:
+        version = self.cache_version
+        engine = self.engine
         if current_time is None:
             current_time = datetime.now()
         
-        self.base_risk = 0
-        self.risk_factors = []
-        self.suggestions = []
-        
-        is_night = self.is_night_time(current_time)
-        if is_night:
-            self.base_risk += 1
-            self.risk_factors.append({
-                "factor": "夜间时段",
-                "description": f"当前时间 {current_time.strftime('%H:%M')} 处于夜间时段（22:00-06:00）",
-                "risk_increase": 1
-            })
-            self.suggestions.append(self.suggestion_rules["night"])
-        
-        near_river, river_name = self.is_near_river(lat, lng)
-        if near_river:
-            self.base_risk += 2
-            self.risk_factors.append({
-                "factor": "靠近河流",
-                "description": f"距离 {river_name} 100米范围内",
-                "risk_increase": 2
-            })
-            self.suggestions.append(self.suggestion_rules["near_river"])
-        
-        weather_risk = self.get_weather_risk(weather)
-        if weather_risk > 0:
-            self.base_risk += weather_risk
-            self.risk_factors.append({
-                "factor": "恶劣天气",
-                "description": f"当前天气为 {weather}",
-                "risk_increase": weather_risk
-            })
-            self.suggestions.append(self.suggestion_rules["bad_weather"])
-        
-        if self.base_risk >= 3:
-            self.risk_level = "high"
-            self.suggestions.append(self.suggestion_rules["high_risk"])
-        elif self.base_risk >= 2:
-            self.risk_level = "medium"
-            self.suggestions.append(self.suggestion_rules["medium_risk"])
+        if not (math.isfinite(lat) and math.isfinite(lng)):
+            return engine.assess(lat, lng, current_time, weather, age, temperature, last_alert_time)
+        
+        geohash = geohash_encode(lat, lng)
+        
+        clear_cell = self.cell_cache.get((geohash, version))
+        if clear_cell is None:
+            clear_cell = self.is_clear_cell(geohash)
+            self.cell_cache.put((geohash, version), clear_cell)
+        
+        if clear_cell:
+            key = (geohash, version, self.time_bucket(current_time), weather)
+            context_outcomes = self.risk_cache.get(key)
+            if context_outcomes is None:
+                context_outcomes = engine.evaluate_context(lat, lng, current_time, weather)
+                self.risk_cache.put(key, context_outcomes)
         else:
-            self.risk_level = "low"
-            self.suggestions.append(self.suggestion_rules["low_risk"])
+            self.risk_cache.bypass()
+            context_outcomes = engine.evaluate_context(lat, lng, current_time, weather)
         
-        return {
-            "risk_level": self.risk_level,
-            "risk_score": self.base_risk,
-            "risk_factors": self.risk_factors,
-            "suggestions": list(set(self.suggestions)),
-            "assessment_time": current_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "location": {"lat": lat, "lng": lng},
-            "weather": weather
-        }
+        return engine.assess(lat, lng, current_time, weather, age, temperature, last_alert_time, context_outcomes)
     
-    def batch_assess(self, locations: List[Dict], weather: str = "晴") -> List[Dict]:
-        results = []
-        for loc in locations:
-            lat = loc.get("lat")
-            lng = loc.get("lng")
-            time_str = loc.get("time")
-            
-            if time_str:
-                try:
-                    current_time = datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S")
-                except:
-                    current_time = datetime.now()
-            else:
-                current_time = datetime.now()
-            
-            result = self.assess_risk(lat, lng, current_time, weather)
-            result["location_id"] = loc.get("id", "")
-            results.append(result)
-        
-        return results
+    def invalidate_cache(self):
+        with self._engine_lock:
+            self.version += 1
+            self._engine = None
+        self.risk_cache.clear()
+        self.cell_cache.clear()
+    
+    def _update_engine(self, update: Callable[[RiskRuleEngine], None]):
+        with self._engine_lock:
+            current = self._engine
+            self.version += 1
+            if current is not None:
+                update(current[1])
+                self._engine = (self.version, current[1])
+        self.risk_cache.clear()
+        self.cell_cache.clear()
+    
+    def get_cache_metrics(self) -> Dict:
+        return self.risk_cache.get_metrics()
+    
+    def assess_arrays(self, lats: Sequence[float], lngs: Sequence[float], times: Sequence = None,
+                      weather: Union[str, Sequence[str]] = "晴", ages: Optional[Sequence] = None,
+                      temperatures: Optional[Sequence] = None, last_alert_times: Optional[Sequence] = None,
+                      location_ids: Optional[Sequence] = None) -> BatchRiskResult:
+        return self.engine.assess_arrays(lats, lngs, times, weather, ages, temperatures, last_alert_times, location_ids)
+    
+    def batch_assess(self, locations: List[Dict], weather: str = "晴") -> BatchRiskResult:
+        return self.assess_arrays(
+            [loc.get("lat") for loc in locations],
+            [loc.get("lng") for loc in locations],
+            [loc.get("time") for loc in locations],
+            [loc.get("weather", weather) for loc in locations],
+            [loc.get("age") for loc in locations],
+            [loc.get("temperature") for loc in locations],
+            [loc.get("last_alert_time") for loc in locations],
+            location_ids=[loc.get("id", "") for loc in locations]
+        )
     
     def add_river_location(self, name: str, lat: float, lng: float):
-        self.river_locations.append({
+        river = {
             "name": name,
             "lat": lat,
             "lng": lng
-        })
+        }
+        self._river_locations.append(river)
+        self._update_engine(lambda engine: engine.add_river_location(river))
+    
+    def update_river_location(self, name: str, lat: float, lng: float) -> bool:
+        for river in self._river_locations:
+            if river["name"] == name:
+                river["lat"] = lat
+                river["lng"] = lng
+                self._update_engine(lambda engine: engine.set_river_locations(self._river_locations))
+                return True
+        return False
+    
+    def remove_river_location(self, name: str) -> bool:
+        remaining = [river for river in self._river_locations if river["name"] != name]
+        if len(remaining) == len(self._river_locations):
+            return False
+        self._river_locations = remaining
+        self._update_engine(lambda engine: engine.set_river_locations(self._river_locations))
+        return True
+    
+    def add_hazard_layer(self, layer: Union[HazardLayer, str]):
+        if isinstance(layer, str):
+            layer = load_hazard_layer(layer)
+        self._hazard_layers.append(layer)
+        self._update_engine(lambda engine: engine.set_hazard_layers(self._hazard_layers))
+    
+    def remove_hazard_layer(self, name: str) -> bool:
+        remaining = [layer for layer in self._hazard_layers if layer.name != name]
+        if len(remaining) == len(self._hazard_layers):
+            return False
+        self._hazard_layers = remaining
+        self._update_engine(lambda engine: engine.set_hazard_layers(self._hazard_layers))
+        return True
     
     def add_weather_risk(self, weather: str, risk_level: int):
-        self.weather_risk_map[weather] = risk_level
+        self._weather_risk_map[weather] = risk_level
+        self._update_engine(lambda engine: engine.set_weather_risk_map(self._weather_risk_map))
     
     def add_suggestion_rule(self, rule_key: str, suggestion: str):
-        self.suggestion_rules[rule_key] = suggestion
+        self._suggestion_rules[rule_key] = suggestion
+        self.invalidate_cache()
+    
+    def add_rule(self, rule: Dict):
+        self._rules.append(dict(rule))
+        self.invalidate_cache()
+    
+    def remove_rule(self, name: str) -> bool:
+        remaining = [rule for rule in self._rules if rule["name"] != name]
+        if len(remaining) == len(self._rules):
+            return False
+        self._rules = remaining
+        self.invalidate_cache()
+        return True
+
+_shared_assessor = None
+_shared_assessor_lock = threading.Lock()
+
+def get_shared_assessor() -> RiskAssessment:
+    global _shared_assessor
+    with _shared_assessor_lock:
+        if _shared_assessor is None:
+            _shared_assessor = RiskAssessment()
+        return _shared_assessor
+
+def get_risk_cache_metrics() -> Dict:
+    return get_shared_assessor().get_cache_metrics()
 
 def show_risk_assessment_ui():
     st.subheader("🎯 风险评估工具")
@@ -182,6 +1169,15 @@ def show_risk_assessment_ui():
     
     time_input = st.text_input("时间（格式：YYYY-MM-DD HH:MM:SS，留空使用当前时间）", placeholder="2024-01-01 23:30:00", key="risk_time")
     
+    with st.expander("更多风险因素（可选）"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            age_input = st.text_input("年龄", placeholder="例如 82", key="risk_age")
+        with col2:
+            temperature_input = st.text_input("气温（°C）", placeholder="例如 36", key="risk_temperature")
+        with col3:
+            last_alert_input = st.text_input("距上次求助（分钟）", placeholder="例如 15", key="risk_last_alert")
+    
     if st.button("🔍 评估风险", type="primary", key="risk_assess_btn"):
         try:
             if time_input:
@@ -189,8 +1185,11 @@ def show_risk_assessment_ui():
             else:
                 current_time = datetime.now()
             
-            assessor = RiskAssessment()
-            result = assessor.assess_risk(lat, lng, current_time, weather)
+            age = float(age_input) if age_input else None
+            temperature = float(temperature_input) if temperature_input else None
+            last_alert_time = current_time - timedelta(minutes=float(last_alert_input)) if last_alert_input else None
+            
+            result = get_shared_assessor().assess_cached(lat, lng, current_time, weather, age, temperature, last_alert_time)
             
             st.markdown("---")
             
@@ -241,6 +1240,5 @@ def show_risk_assessment_ui():
             st.error(f"评估失败: {str(e)}")
 
 def get_risk_level_from_assessment(lat: float, lng: float, weather: str = "晴") -> str:
-    assessor = RiskAssessment()
-    result = assessor.assess_risk(lat, lng, datetime.now(), weather)
+    result = get_shared_assessor().assess_cached(lat, lng, datetime.now(), weather)
     return result['risk_level']